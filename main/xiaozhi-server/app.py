@@ -1,3 +1,4 @@
+import os
 import sys
 import uuid
 import signal
@@ -10,6 +11,19 @@ from core.http_server import SimpleHttpServer
 from core.websocket_server import WebSocketServer
 from core.utils.util import check_ffmpeg_installed
 from core.utils.gc_manager import get_gc_manager
+from core.utils.cache.manager import cache_manager
+from core.utils.transport import configure_transport_registry
+from core.utils.shared_executor import configure_shared_executor
+from core.utils.tts_phrase_cache import configure_tts_phrase_cache
+from core.utils.audio_send_scheduler import configure_audio_send_scheduler
+from core.utils.worker_supervisor import (
+    AUTH_KEY_ENV,
+    WorkerSupervisor,
+    get_drain_timeout,
+    get_worker_count,
+    get_worker_id,
+    is_worker,
+)
 
 TAG = __name__
 logger = setup_logging()
@@ -37,32 +51,58 @@ async def wait_for_exit() -> None:
             pass
 
 
+async def wait_for_exit_or_failure(ws_task: asyncio.Task) -> None:
+    """阻塞直到收到退出信号，WebSocket服务启动失败（如模块加载失败）时抛出其异常"""
+    exit_task = asyncio.create_task(wait_for_exit())
+    try:
+        await asyncio.wait({exit_task, ws_task}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        exit_task.cancel()
+    if ws_task.done():
+        ws_task.result()
+
+
 async def monitor_stdin():
     """监控标准输入，消费回车键"""
     while True:
         await ainput()  # 异步等待输入，消费回车
 
 
-async def main():
-    check_ffmpeg_installed()
-    config = load_config()
+def resolve_auth_key(config: dict) -> str:
+    # 多进程模式下由主控进程统一确定auth_key，各工作进程签发的token互相认可
+    auth_key = os.environ.get(AUTH_KEY_ENV, "")
+    if auth_key:
+        return auth_key
 
     # auth_key优先级：配置文件server.auth_key > manager-api.secret > 自动生成
     # auth_key用于jwt认证，比如视觉分析接口的jwt认证、ota接口的token生成与websocket认证
     # 获取配置文件中的auth_key
     auth_key = config["server"].get("auth_key", "")
-    
+
     # 验证auth_key，无效则尝试使用manager-api.secret
     if not auth_key or len(auth_key) == 0 or "你" in auth_key:
         auth_key = config.get("manager-api", {}).get("secret", "")
         # 验证secret，无效则生成随机密钥
         if not auth_key or len(auth_key) == 0 or "你" in auth_key:
             auth_key = str(uuid.uuid4().hex)
-    
-    config["server"]["auth_key"] = auth_key
+    return auth_key
+
+
+async def main():
+    check_ffmpeg_installed()
+    config = load_config()
+    # 按配置调整进程内各缓存的容量
+    cache_manager.configure(config.get("cache"))
+    # 进程级共享组件在此用已加载的配置创建，避免首次使用时在事件循环中重新读取配置
+    configure_shared_executor(config)
+    configure_transport_registry(config)
+    configure_tts_phrase_cache(config)
+    configure_audio_send_scheduler(config)
+
+    config["server"]["auth_key"] = resolve_auth_key(config)
 
-    # 添加 stdin 监控任务
-    stdin_task = asyncio.create_task(monitor_stdin())
+    # 添加 stdin 监控任务，工作进程的标准输入由主控进程关闭，无需监控
+    stdin_task = None if is_worker() else asyncio.create_task(monitor_stdin())
 
     # 启动全局GC管理器（5分钟清理一次）
     gc_manager = get_gc_manager(interval_seconds=300)
@@ -75,6 +115,13 @@ async def main():
     ota_server = SimpleHttpServer(config)
     ota_task = asyncio.create_task(ota_server.start())
 
+    if is_worker():
+        # 主控进程广播的配置更新
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP, lambda: asyncio.create_task(ws_server.reload_config())
+        )
+        logger.bind(tag=TAG).info(f"工作进程{get_worker_id()}已启动")
+
     read_config_from_api = config.get("read_config_from_api", False)
     port = int(config["server"].get("http_port", 8003))
     if not read_config_from_api:
@@ -123,30 +170,47 @@ async def main():
     )
 
     try:
-        await wait_for_exit()  # 阻塞直到收到退出信号
+        await wait_for_exit_or_failure(ws_task)  # 阻塞直到收到退出信号
     except asyncio.CancelledError:
         print("任务被取消，清理资源中...")
     finally:
         # 停止全局GC管理器
         await gc_manager.stop()
 
+        # 工作进程退出前先排空已有会话，滚动重启时设备不会被中途断开
+        if is_worker():
+            await ws_server.drain(get_drain_timeout(config))
+
         # 取消所有任务（关键修复点）
-        stdin_task.cancel()
-        ws_task.cancel()
-        if ota_task:
-            ota_task.cancel()
+        tasks = [t for t in (stdin_task, ws_task, ota_task) if t]
+        for task in tasks:
+            task.cancel()
 
         # 等待任务终止（必须加超时）
         await asyncio.wait(
-            [stdin_task, ws_task, ota_task] if ota_task else [stdin_task, ws_task],
+            tasks,
             timeout=3.0,
             return_when=asyncio.ALL_COMPLETED,
         )
         print("服务器已关闭，程序退出。")
 
 
+async def supervise():
+    """多进程模式：主控进程只负责拉起和管理工作进程"""
+    config = load_config()
+    supervisor = WorkerSupervisor(
+        get_worker_count(config),
+        resolve_auth_key(config),
+        drain_timeout=get_drain_timeout(config),
+    )
+    await supervisor.run()
+
+
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if get_worker_count(load_config()) > 1 and not is_worker():
+            asyncio.run(supervise())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         print("手动中断，程序终止。")
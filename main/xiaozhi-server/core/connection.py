@@ -1,6 +1,5 @@
 import os
 import sys
-import copy
 import json
 import uuid
 import time
@@ -10,6 +9,7 @@ import threading
 import traceback
 import subprocess
 import websockets
+from contextlib import aclosing
 
 from core.utils.util import (
     extract_json_from_string,
@@ -26,8 +26,18 @@ from core.utils.modules_initialize import (
 )
 from core.handle.reportHandle import report
 from core.providers.tts.default import DefaultTTS
-from concurrent.futures import ThreadPoolExecutor
+from core.utils.shared_executor import get_shared_executor
+from core.utils.config_overlay import ConfigOverlay
+from core.utils.speculative_gate import SpeculativeGate
+from core.utils.worker_supervisor import request_rolling_restart
 from core.utils.dialogue import Message, Dialogue
+from core.utils import turn_trace
+from core.utils.metrics import (
+    LLM_FIRST_TOKEN_SECONDS,
+    LLM_REQUESTS_TOTAL,
+    LLM_RESPONSE_SECONDS,
+    provider_name,
+)
 from core.providers.asr.dto.dto import InterfaceType
 from core.handle.textHandle import handleTextMessage
 from core.providers.tools.unified_tool_handler import UnifiedToolHandler
@@ -63,7 +73,8 @@ class ConnectionHandler:
         server=None,
     ):
         self.common_config = config
-        self.config = copy.deepcopy(config)
+        # 共享配置只读，连接的差异化配置只写入自己的写时复制视图
+        self.config = ConfigOverlay(config)
         self.session_id = str(uuid.uuid4())
         self.logger = setup_logging()
         self.server = server  # 保存server实例的引用
@@ -88,17 +99,23 @@ class ConnectionHandler:
 
         # 客户端状态相关
         self.client_abort = False
+        # 进行中的对话任务，打断时取消
+        self.llm_task = None
+        # 推测执行中尚未放行的闸门
+        self.speculative_gate = None
+        # 当前轮的耗时追踪，未采样时为None
+        self.turn_trace = None
         self.client_is_speaking = False
         self.client_listen_mode = "auto"
 
         # 线程任务相关
         self.loop = None  # 在 handle_connection 中获取运行中的事件循环
         self.stop_event = threading.Event()
-        self.executor = ThreadPoolExecutor(max_workers=5)
+        # 进程级共享线程池中属于本连接的执行器（限制本连接同时占用的线程数）
+        self.executor = get_shared_executor().for_connection()
 
-        # 添加上报线程池
-        self.report_queue = queue.Queue()
-        self.report_thread = None
+        # 聊天记录上报是否已启用
+        self.report_enabled = False
         # 未来可以通过修改此处，调节asr的上报和tts的上报，目前默认都开启
         self.report_asr_enable = self.read_config_from_api
         self.report_tts_enable = self.read_config_from_api
@@ -124,18 +141,20 @@ class ConnectionHandler:
         self.last_activity_time = 0.0  # 统一的活动时间戳（毫秒）
         self.client_voice_stop = False
         self.last_is_voice = False
+        self.vad_stream = None  # 连接专属的VAD解码器与模型状态，由VAD按需分配
 
         # asr相关变量
         # 因为实际部署时可能会用到公共的本地ASR，不能把变量暴露给公共ASR
         # 所以涉及到ASR的变量，需要在这里定义，属于connection的私有变量
         self.asr_audio = []
-        self.asr_audio_queue = queue.Queue()
+        self.asr_audio_queue = asyncio.Queue()
+        self.asr_priority_task = None
         self.current_speaker = None  # 存储当前说话人
         self.current_language_tag = None  # 存储当前ASR识别的语言标签
 
         # llm相关变量
         self.llm_finish_task = True
-        self.dialogue = Dialogue()
+        self.dialogue = Dialogue(self.config.get("dialogue"))
 
         # tts相关变量
         self.sentence_id = None
@@ -258,8 +277,8 @@ class ConnectionHandler:
                         except Exception:
                             pass
 
-                # 启动线程保存记忆，不等待完成
-                threading.Thread(target=save_memory_task, daemon=True).start()
+                # 在共享线程池中保存记忆，不等待完成
+                get_shared_executor().submit(save_memory_task)
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"保存记忆失败: {e}")
         finally:
@@ -315,7 +334,7 @@ class ConnectionHandler:
                     return
 
             # 不需要头部处理或没有头部时，直接处理原始消息
-            self.asr_audio_queue.put(message)
+            self.asr_audio_queue.put_nowait(message)
 
     async def _process_mqtt_audio_message(self, message):
         """
@@ -342,7 +361,7 @@ class ConnectionHandler:
             elif len(message) > 16:
                 # 没有指定长度或长度无效，去掉头部后处理剩余数据
                 audio_data = message[16:]
-                self.asr_audio_queue.put(audio_data)
+                self.asr_audio_queue.put_nowait(audio_data)
                 return True
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"解析WebSocket音频包失败: {e}")
@@ -360,7 +379,7 @@ class ConnectionHandler:
 
         # 如果时间戳是递增的，直接处理
         if timestamp >= self.last_processed_timestamp:
-            self.asr_audio_queue.put(audio_data)
+            self.asr_audio_queue.put_nowait(audio_data)
             self.last_processed_timestamp = timestamp
 
             # 处理缓冲区中的后续包
@@ -370,7 +389,7 @@ class ConnectionHandler:
                 for ts in sorted(self.audio_timestamp_buffer.keys()):
                     if ts > self.last_processed_timestamp:
                         buffered_audio = self.audio_timestamp_buffer.pop(ts)
-                        self.asr_audio_queue.put(buffered_audio)
+                        self.asr_audio_queue.put_nowait(buffered_audio)
                         self.last_processed_timestamp = ts
                         processed_any = True
                         break
@@ -379,7 +398,7 @@ class ConnectionHandler:
             if len(self.audio_timestamp_buffer) < self.max_timestamp_buffer_size:
                 self.audio_timestamp_buffer[timestamp] = audio_data
             else:
-                self.asr_audio_queue.put(audio_data)
+                self.asr_audio_queue.put_nowait(audio_data)
 
     async def handle_restart(self, message):
         """处理服务器重启请求"""
@@ -399,6 +418,10 @@ class ConnectionHandler:
                 )
             )
 
+            # 多进程模式下由主控进程滚动重启所有工作进程，重启期间不中断服务
+            if request_rolling_restart():
+                return
+
             # 异步执行重启操作
             def restart_server():
                 """实际执行重启的方法"""
@@ -472,8 +495,8 @@ class ConnectionHandler:
             self._initialize_memory()
             """加载意图识别"""
             self._initialize_intent()
-            """初始化上报线程"""
-            self._init_report_threads()
+            """初始化上报"""
+            self._init_report()
             """更新系统提示词"""
             self._init_prompt_enhancement()
 
@@ -491,18 +514,14 @@ class ConnectionHandler:
             self.change_system_prompt(enhanced_prompt)
             self.logger.bind(tag=TAG).debug("系统提示词已增强更新")
 
-    def _init_report_threads(self):
-        """初始化ASR和TTS上报线程"""
+    def _init_report(self):
+        """启用ASR和TTS上报"""
         if not self.read_config_from_api or self.need_bind:
             return
         if self.chat_history_conf == 0:
             return
-        if self.report_thread is None or not self.report_thread.is_alive():
-            self.report_thread = threading.Thread(
-                target=self._report_worker, daemon=True
-            )
-            self.report_thread.start()
-            self.logger.bind(tag=TAG).info("TTS上报线程已启动")
+        self.report_enabled = True
+        self.logger.bind(tag=TAG).info("聊天记录上报已启用")
 
     def _initialize_tts(self):
         """初始化TTS"""
@@ -788,7 +807,88 @@ class ConnectionHandler:
         # 更新系统prompt至上下文
         self.dialogue.update_system_message(self.prompt)
 
+    def start_chat(self, query):
+        """在连接的事件循环中开始一轮对话，打断时通过 abort_chat 取消"""
+        self.llm_task = self.loop.create_task(self.chat_async(query))
+        return self.llm_task
+
+    def start_speculative_chat(self, query):
+        """推测执行：与意图识别同时开始对话，意图识别出结果前输出先缓冲在闸门中
+
+        Returns:
+            SpeculativeGate: 意图为普通聊天时调用 release_speculative_chat 放行，
+                             否则调用 discard_speculative_chat 丢弃
+        """
+        gate = SpeculativeGate(self.loop)
+        self.speculative_gate = gate
+        self.llm_task = self.loop.create_task(self.chat_async(query, gate=gate))
+        return gate
+
+    def release_speculative_chat(self, gate):
+        """意图为普通聊天，放行推测执行的对话"""
+        if self.speculative_gate is gate:
+            self.speculative_gate = None
+        # 意图识别过程中可能更新了sentence_id，恢复为本轮对话的sentence_id
+        if gate.sentence_id is not None:
+            self.sentence_id = gate.sentence_id
+        gate.release()
+
+    def discard_speculative_chat(self, gate):
+        """意图已由工具或退出处理，取消推测执行的对话并撤回写入的用户消息"""
+        gate.discard()
+        if self.speculative_gate is gate:
+            self.speculative_gate = None
+            self.abort_chat()
+        if gate.user_message is not None:
+            self.dialogue.dialogue = [
+                m for m in self.dialogue.dialogue if m is not gate.user_message
+            ]
+
+    def abort_chat(self):
+        """取消进行中的对话，LLM流随之关闭，上游不再继续生成"""
+        if self.speculative_gate is not None:
+            self.speculative_gate.discard()
+            self.speculative_gate = None
+        task = self.llm_task
+        if task is None or task.done():
+            return
+        try:
+            if task is asyncio.current_task():
+                return
+        except RuntimeError:
+            pass
+        task.cancel()
+
     def chat(self, query, depth=0):
+        """同步调用入口，供线程中的调用方使用，实际在连接的事件循环中执行"""
+        return asyncio.run_coroutine_threadsafe(
+            self.chat_async(query, depth), self.loop
+        ).result()
+
+    async def chat_async(self, query, depth=0, gate=None):
+        """
+        一轮对话
+
+        Args:
+            query: 用户消息，工具调用后的递归为None
+            depth: 工具调用递归深度
+            gate: 推测执行闸门，意图识别出结果前输出先缓冲，见 start_speculative_chat
+        """
+        response_message = []
+        try:
+            result = await self._chat_turn(query, depth, gate, response_message)
+        except asyncio.CancelledError:
+            # 被 abort_chat 取消：已输出的回复照常存入对话历史并结束本轮，
+            # 推测执行被丢弃时输出未发送，不做收尾；之后继续抛出取消
+            if gate is None or gate.released:
+                self._finish_chat(response_message, depth)
+            raise
+        if result:
+            self._finish_chat(response_message, depth)
+        return result
+
+    async def _chat_turn(self, query, depth, gate, response_message):
+        """执行一轮对话，输出的回复文本追加到 response_message，收尾由 chat_async 完成"""
         if query is not None:
             self.logger.bind(tag=TAG).info(f"大模型收到用户消息: {query}")
 
@@ -796,14 +896,18 @@ class ConnectionHandler:
         if depth == 0:
             self.llm_finish_task = False
             self.sentence_id = str(uuid.uuid4().hex)
-            self.dialogue.put(Message(role="user", content=query))
-            self.tts.tts_text_queue.put(
-                TTSMessageDTO(
-                    sentence_id=self.sentence_id,
-                    sentence_type=SentenceType.FIRST,
-                    content_type=ContentType.ACTION,
-                )
+            turn_trace.bind_sentence(self, self.sentence_id)
+            user_message = Message(role="user", content=query)
+            self.dialogue.put(user_message)
+            if gate is not None:
+                gate.sentence_id = self.sentence_id
+                gate.user_message = user_message
+            first_message = TTSMessageDTO(
+                sentence_id=self.sentence_id,
+                sentence_type=SentenceType.FIRST,
+                content_type=ContentType.ACTION,
             )
+            self._run_gated(gate, lambda: self.tts.tts_text_queue.put(first_message))
 
         # 设置最大递归深度，避免无限循环，可根据实际需求调整
         MAX_DEPTH = 5
@@ -831,20 +935,18 @@ class ConnectionHandler:
             and not force_final_answer
         ):
             functions = self.func_handler.get_functions()
-        response_message = []
 
         try:
             # 使用带记忆的对话
             memory_str = None
             if self.memory is not None:
-                future = asyncio.run_coroutine_threadsafe(
-                    self.memory.query_memory(query), self.loop
-                )
-                memory_str = future.result()
+                memory_str = await self.memory.query_memory(query)
 
+            llm_start_time = time.monotonic()
+            turn_trace.mark(self, "llm_request")
             if self.intent_type == "function_call" and functions is not None:
                 # 使用支持functions的streaming接口
-                llm_responses = self.llm.response_with_functions(
+                llm_responses = self.llm.response_with_functions_async(
                     self.session_id,
                     self.dialogue.get_llm_dialogue_with_memory(
                         memory_str, self.config.get("voiceprint", {})
@@ -852,7 +954,7 @@ class ConnectionHandler:
                     functions=functions,
                 )
             else:
-                llm_responses = self.llm.response(
+                llm_responses = self.llm.response_async(
                     self.session_id,
                     self.dialogue.get_llm_dialogue_with_memory(
                         memory_str, self.config.get("voiceprint", {})
@@ -869,48 +971,84 @@ class ConnectionHandler:
         content_arguments = ""
         self.client_abort = False
         emotion_flag = True
-        for response in llm_responses:
-            if self.client_abort:
-                break
-            if self.intent_type == "function_call" and functions is not None:
-                content, tools_call = response
-                if "content" in response:
-                    content = response["content"]
-                    tools_call = None
-                if content is not None and len(content) > 0:
-                    content_arguments += content
-
-                if not tool_call_flag and content_arguments.startswith("<tool_call>"):
-                    # print("content_arguments", content_arguments)
-                    tool_call_flag = True
-
-                if tools_call is not None and len(tools_call) > 0:
-                    tool_call_flag = True
-                    self._merge_tool_calls(tool_calls_list, tools_call)
-            else:
-                content = response
-
-            # 在llm回复中获取情绪表情，一轮对话只在开头获取一次
-            if emotion_flag and content is not None and content.strip():
-                asyncio.run_coroutine_threadsafe(
-                    textUtils.get_emotion(self, content),
-                    self.loop,
-                )
-                emotion_flag = False
-
-            if content is not None and len(content) > 0:
-                if not tool_call_flag:
-                    response_message.append(content)
-                    self.tts.tts_text_queue.put(
-                        TTSMessageDTO(
-                            sentence_id=self.sentence_id,
-                            sentence_type=SentenceType.MIDDLE,
-                            content_type=ContentType.TEXT,
-                            content_detail=content,
+        aborted = False
+        llm_provider = provider_name(self.llm)
+        first_token = True
+        try:
+            # 退出循环（打断或完成）时关闭生成器，供应商随之关闭上游连接
+            async with aclosing(llm_responses):
+                async for response in llm_responses:
+                    if first_token:
+                        first_token = False
+                        LLM_FIRST_TOKEN_SECONDS.observe(
+                            time.monotonic() - llm_start_time, llm_provider
                         )
-                    )
-        # 处理function call
-        if tool_call_flag:
+                        turn_trace.mark(self, "llm_first_token")
+                    if self.client_abort:
+                        aborted = True
+                        break
+                    if self.intent_type == "function_call" and functions is not None:
+                        content, tools_call = response
+                        if "content" in response:
+                            content = response["content"]
+                            tools_call = None
+                        if content is not None and len(content) > 0:
+                            content_arguments += content
+
+                        if not tool_call_flag and content_arguments.startswith("<tool_call>"):
+                            # print("content_arguments", content_arguments)
+                            tool_call_flag = True
+
+                        if tools_call is not None and len(tools_call) > 0:
+                            tool_call_flag = True
+                            self._merge_tool_calls(tool_calls_list, tools_call)
+                    else:
+                        content = response
+
+                    # 在llm回复中获取情绪表情，一轮对话只在开头获取一次
+                    if emotion_flag and content is not None and content.strip():
+                        self._run_gated(
+                            gate,
+                            lambda c=content: self.loop.create_task(
+                                textUtils.get_emotion(self, c)
+                            ),
+                        )
+                        emotion_flag = False
+
+                    if content is not None and len(content) > 0:
+                        if not tool_call_flag:
+                            response_message.append(content)
+                            message = TTSMessageDTO(
+                                sentence_id=(
+                                    self.sentence_id if gate is None else gate.sentence_id
+                                ),
+                                sentence_type=SentenceType.MIDDLE,
+                                content_type=ContentType.TEXT,
+                                content_detail=content,
+                            )
+                            self._run_gated(
+                                gate, lambda m=message: self.tts.tts_text_queue.put(m)
+                            )
+        except asyncio.CancelledError:
+            # 被 abort_chat 取消：上游连接已在生成器退出时关闭
+            aborted = True
+            self.logger.bind(tag=TAG).info("对话已被打断，停止LLM生成")
+            raise
+        finally:
+            LLM_RESPONSE_SECONDS.observe(
+                time.monotonic() - llm_start_time, llm_provider
+            )
+            LLM_REQUESTS_TOTAL.inc(
+                llm_provider, "aborted" if aborted else "completed"
+            )
+
+        # 推测执行：等待意图识别结果，意图由工具或退出处理时本轮输出全部丢弃，
+        # 工具调用和对话历史都要等放行后才执行
+        if gate is not None and not await gate.wait():
+            return None
+
+        # 处理function call，被打断时不再执行工具调用
+        if tool_call_flag and not aborted:
             bHasError = False
             # 处理基于文本的工具调用格式
             if len(tool_calls_list) == 0 and content_arguments:
@@ -951,32 +1089,28 @@ class ConnectionHandler:
                     f"检测到 {len(tool_calls_list)} 个工具调用"
                 )
 
-                # 收集所有工具调用的 Future
-                futures_with_data = []
                 for tool_call_data in tool_calls_list:
                     self.logger.bind(tag=TAG).debug(
                         f"function_name={tool_call_data['name']}, function_id={tool_call_data['id']}, function_arguments={tool_call_data['arguments']}"
                     )
 
-                    future = asyncio.run_coroutine_threadsafe(
-                        self.func_handler.handle_llm_function_call(
-                            self, tool_call_data
-                        ),
-                        self.loop,
+                # 并发执行所有工具调用（实际等待时长为最慢的那个）
+                results = await asyncio.gather(
+                    *(
+                        self.func_handler.handle_llm_function_call(self, tool_call_data)
+                        for tool_call_data in tool_calls_list
                     )
-                    futures_with_data.append((future, tool_call_data))
-
-                # 等待协程结束（实际等待时长为最慢的那个）
-                tool_results = []
-                for future, tool_call_data in futures_with_data:
-                    result = future.result()
-                    tool_results.append((result, tool_call_data))
+                )
+                tool_results = list(zip(results, tool_calls_list))
 
                 # 统一处理所有工具调用结果
                 if tool_results:
-                    self._handle_function_result(tool_results, depth=depth)
+                    await self._handle_function_result(tool_results, depth=depth)
+
+        return True
 
-        # 存储对话内容
+    def _finish_chat(self, response_message, depth):
+        """存储本轮回复，最顶层时发送LAST请求结束本轮对话"""
         if len(response_message) > 0:
             text_buff = "".join(response_message)
             self.tts_MessageText = text_buff
@@ -990,6 +1124,9 @@ class ConnectionHandler:
                 )
             )
             self.llm_finish_task = True
+            # 上下文超出预算时，在后台把移出窗口的对话轮次压缩成摘要
+            if self.dialogue.needs_summary:
+                self.loop.create_task(self.dialogue.summarize_async(self.llm))
             # 使用lambda延迟计算，只有在DEBUG级别时才执行get_llm_dialogue()
             self.logger.bind(tag=TAG).debug(
                 lambda: json.dumps(
@@ -997,9 +1134,7 @@ class ConnectionHandler:
                 )
             )
 
-        return True
-
-    def _handle_function_result(self, tool_results, depth):
+    async def _handle_function_result(self, tool_results, depth):
         need_llm_tools = []
 
         for result, tool_call_data in tool_results:
@@ -1051,41 +1186,30 @@ class ConnectionHandler:
                         )
                     )
 
-            self.chat(None, depth=depth + 1)
+            await self.chat_async(None, depth=depth + 1)
 
-    def _report_worker(self):
-        """聊天记录上报工作线程"""
-        while not self.stop_event.is_set():
-            try:
-                # 从队列获取数据，设置超时以便定期检查停止事件
-                item = self.report_queue.get(timeout=1)
-                if item is None:  # 检测毒丸对象
-                    break
-                try:
-                    # 检查线程池状态
-                    if self.executor is None:
-                        continue
-                    # 提交任务到线程池
-                    self.executor.submit(self._process_report, *item)
-                except Exception as e:
-                    self.logger.bind(tag=TAG).error(f"聊天记录上报线程异常: {e}")
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self.logger.bind(tag=TAG).error(f"聊天记录上报工作线程异常: {e}")
-
-        self.logger.bind(tag=TAG).info("聊天记录上报线程已退出")
-
-    def _process_report(self, type, text, audio_data, report_time):
+    @staticmethod
+    def _run_gated(gate, fn):
+        """推测执行时输出先经过闸门缓冲，否则直接执行"""
+        if gate is None:
+            fn()
+        else:
+            gate.run(fn)
+
+    def submit_report(self, type, text, audio_data, report_time):
+        """提交上报任务（可在任意线程调用），在连接的事件循环中异步执行"""
+        if not self.report_enabled or self.loop is None or self.loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(
+            self._process_report(type, text, audio_data, report_time), self.loop
+        )
+
+    async def _process_report(self, type, text, audio_data, report_time):
         """处理上报任务"""
         try:
-            # 执行异步上报（在事件循环中运行）
-            asyncio.run(report(self, type, text, audio_data, report_time))
+            await report(self, type, text, audio_data, report_time)
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"上报处理异常: {e}")
-        finally:
-            # 标记任务完成
-            self.report_queue.task_done()
 
     def clearSpeakStatus(self):
         self.client_is_speaking = False
@@ -1094,6 +1218,7 @@ class ConnectionHandler:
     async def close(self, ws=None):
         """资源清理方法"""
         try:
+            turn_trace.finish_turn(self, "closed")
             # 清理音频缓冲区
             if hasattr(self, "audio_buffer"):
                 self.audio_buffer.clear()
@@ -1120,6 +1245,26 @@ class ConnectionHandler:
             if self.stop_event:
                 self.stop_event.set()
 
+            # 停止ASR音频处理任务（在该任务内部触发关闭时，由任务自行检查停止事件退出）
+            if (
+                self.asr_priority_task
+                and not self.asr_priority_task.done()
+                and self.asr_priority_task is not asyncio.current_task()
+            ):
+                self.asr_priority_task.cancel()
+
+            # 取消进行中的对话，关闭LLM流
+            self.abort_chat()
+
+            # 停止TTS音频播放任务（同上，在该任务内部触发关闭时由任务自行退出）
+            audio_play_task = getattr(self.tts, "audio_play_priority_task", None)
+            if (
+                audio_play_task
+                and not audio_play_task.done()
+                and audio_play_task is not asyncio.current_task()
+            ):
+                audio_play_task.cancel()
+
             # 清空任务队列
             self.clear_queues()
 
@@ -1162,7 +1307,15 @@ class ConnectionHandler:
             if self.tts:
                 await self.tts.close()
 
-            # 最后关闭线程池（避免阻塞）
+            # 释放VAD中属于本连接的推理状态，按私有配置单独创建的VAD随连接关闭
+            if self.vad:
+                self.vad.release(self)
+                if self.vad is not self._vad:
+                    self.vad.close()
+            if self.asr:
+                self.asr.release(self)
+
+            # 最后关闭本连接的执行器，取消尚未开始的任务（避免阻塞）
             if self.executor:
                 try:
                     self.executor.shutdown(wait=False)
@@ -1190,7 +1343,6 @@ class ConnectionHandler:
             for q in [
                 self.tts.tts_text_queue,
                 self.tts.tts_audio_queue,
-                self.report_queue,
             ]:
                 if not q:
                     continue
@@ -1,4 +1,5 @@
 import json
+from core.utils import turn_trace
 
 TAG = __name__
 
@@ -7,6 +8,9 @@ async def handleAbortMessage(conn):
     conn.logger.bind(tag=TAG).info("Abort message received")
     # 设置成打断状态，会自动打断llm、tts任务
     conn.client_abort = True
+    turn_trace.finish_turn(conn, "aborted")
+    # 取消进行中的对话，关闭LLM流，上游不再继续生成
+    conn.abort_chat()
     conn.clear_queues()
     # 打断客户端说话状态
     await conn.websocket.send(
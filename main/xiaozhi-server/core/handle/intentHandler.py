@@ -12,7 +12,14 @@ from core.providers.tts.dto.dto import TTSMessageDTO, SentenceType
 TAG = __name__
 
 
-async def handle_user_intent(conn, text):
+async def handle_user_intent(conn, text, dialogue_history=None):
+    """
+    意图处理，意图已被处理（工具、退出、唤醒词）时返回True
+
+    Args:
+        dialogue_history: 意图识别使用的对话历史，默认为连接当前的对话历史；
+                          推测执行时传入写入本轮用户消息之前的快照
+    """
     # 预处理输入文本，处理可能的JSON格式
     try:
         if text.strip().startswith('{') and text.strip().endswith('}'):
@@ -36,7 +43,7 @@ async def handle_user_intent(conn, text):
         # 使用支持function calling的聊天方法,不再进行意图分析
         return False
     # 使用LLM进行意图分析
-    intent_result = await analyze_intent_with_llm(conn, text)
+    intent_result = await analyze_intent_with_llm(conn, text, dialogue_history)
     if not intent_result:
         return False
     # 会话开始时生成sentence_id
@@ -58,16 +65,17 @@ async def check_direct_exit(conn, text):
     return False
 
 
-async def analyze_intent_with_llm(conn, text):
+async def analyze_intent_with_llm(conn, text, dialogue_history=None):
     """使用LLM分析用户意图"""
     if not hasattr(conn, "intent") or not conn.intent:
         conn.logger.bind(tag=TAG).warning("意图识别服务未初始化")
         return None
 
     # 对话历史记录
-    dialogue = conn.dialogue
+    if dialogue_history is None:
+        dialogue_history = conn.dialogue.dialogue
     try:
-        intent_result = await conn.intent.detect_intent(conn, dialogue.dialogue, text)
+        intent_result = await conn.intent.detect_intent(conn, dialogue_history, text)
         return intent_result
     except Exception as e:
         conn.logger.bind(tag=TAG).error(f"意图识别失败: {str(e)}")
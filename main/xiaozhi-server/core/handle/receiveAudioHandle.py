@@ -1,6 +1,7 @@
 import time
 import json
 import asyncio
+from core.utils import turn_trace
 from core.utils.util import audio_to_data
 from core.handle.abortHandle import handleAbortMessage
 from core.handle.intentHandler import handle_user_intent
@@ -12,7 +13,7 @@ TAG = __name__
 
 async def handleAudioMessage(conn, audio):
     # 当前片段是否有人说话
-    have_voice = conn.vad.is_vad(conn, audio)
+    have_voice = await conn.vad.is_vad_async(conn, audio)
     # 如果设备刚刚被唤醒，短暂忽略VAD检测
     if hasattr(conn, "just_woken_up") and conn.just_woken_up:
         have_voice = False
@@ -85,8 +86,13 @@ async def startToChat(conn, text):
     if conn.client_is_speaking and conn.client_listen_mode != "manual":
         await handleAbortMessage(conn)
 
+    if is_speculative_enabled(conn):
+        await speculative_chat(conn, actual_text)
+        return
+
     # 首先进行意图分析，使用实际文本内容
     intent_handled = await handle_user_intent(conn, actual_text)
+    turn_trace.mark(conn, "intent_done")
 
     if intent_handled:
         # 如果意图已被处理，不再进行聊天
@@ -94,7 +100,40 @@ async def startToChat(conn, text):
 
     # 意图未被处理，继续常规聊天流程，使用实际文本内容
     await send_stt_message(conn, actual_text)
-    conn.executor.submit(conn.chat, actual_text)
+    conn.start_chat(actual_text)
+
+
+def is_speculative_enabled(conn):
+    """意图识别需要单独调用LLM时，是否与主对话同时进行"""
+    if conn.intent_type != "intent_llm":
+        return False
+    intent_name = conn.config["selected_module"].get("Intent")
+    intent_config = conn.config.get("Intent", {}).get(intent_name) or {}
+    return bool(intent_config.get("speculative", False))
+
+
+async def speculative_chat(conn, actual_text):
+    """推测执行：主对话与意图识别同时开始，主对话的输出在意图识别出结果前先缓冲"""
+    # 主对话开始后会把本轮用户消息写入对话历史，意图识别使用写入之前的快照，
+    # 否则本轮话语在意图识别的提示词中会出现两次
+    dialogue_history = list(conn.dialogue.dialogue)
+    gate = conn.start_speculative_chat(actual_text)
+    try:
+        intent_handled = await handle_user_intent(
+            conn, actual_text, dialogue_history=dialogue_history
+        )
+        turn_trace.mark(conn, "intent_done")
+    except BaseException:
+        conn.discard_speculative_chat(gate)
+        raise
+
+    if intent_handled:
+        # 意图已由工具或退出处理，取消主对话
+        conn.discard_speculative_chat(gate)
+        return
+
+    await send_stt_message(conn, actual_text)
+    conn.release_speculative_chat(gate)
 
 
 async def no_voice_close_connect(conn, have_voice):
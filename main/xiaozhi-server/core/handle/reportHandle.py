@@ -2,17 +2,19 @@
 TTS上报功能已集成到ConnectionHandler类中。
 
 上报功能包括：
-1. 每个连接对象拥有自己的上报队列和处理线程
-2. 上报线程的生命周期与连接对象绑定
-3. 使用ConnectionHandler.enqueue_tts_report方法进行上报
+1. 上报任务通过 ConnectionHandler.submit_report 提交，可在任意线程调用
+2. 上报在连接的事件循环中异步执行，Opus转WAV在共享线程池中完成
+3. 使用enqueue_tts_report、enqueue_asr_report方法进行上报
 
 具体实现请参考core/connection.py中的相关代码。
 """
 
 import time
+import asyncio
 import opuslib_next
 
 from config.manage_api_client import report as manage_report
+from core.utils.shared_executor import get_shared_executor
 
 TAG = __name__
 
@@ -29,7 +31,10 @@ async def report(conn, type, text, opus_data, report_time):
     """
     try:
         if opus_data:
-            audio_data = opus_to_wav(conn, opus_data)
+            # 解码为CPU密集操作，放到共享线程池中执行
+            audio_data = await asyncio.get_running_loop().run_in_executor(
+                get_shared_executor().pool, opus_to_wav, conn, opus_data
+            )
         else:
             audio_data = None
         # 执行异步上报
@@ -115,12 +120,12 @@ def enqueue_tts_report(conn, text, opus_data):
     try:
         # 使用连接对象的队列，传入文本和二进制数据而非文件路径
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((2, text, opus_data, int(time.time())))
+            conn.submit_report(2, text, opus_data, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"TTS数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
             )
         else:
-            conn.report_queue.put((2, text, None, int(time.time())))
+            conn.submit_report(2, text, None, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"TTS数据已加入上报队列: {conn.device_id}, 不上报音频"
             )
@@ -143,12 +148,12 @@ def enqueue_asr_report(conn, text, opus_data):
     try:
         # 使用连接对象的队列，传入文本和二进制数据而非文件路径
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((1, text, opus_data, int(time.time())))
+            conn.submit_report(1, text, opus_data, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"ASR数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
             )
         else:
-            conn.report_queue.put((1, text, None, int(time.time())))
+            conn.submit_report(1, text, None, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"ASR数据已加入上报队列: {conn.device_id}, 不上报音频"
             )
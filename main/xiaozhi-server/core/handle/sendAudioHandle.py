@@ -2,6 +2,7 @@ import json
 import time
 import asyncio
 from core.utils import textUtils
+from core.utils import turn_trace
 from core.utils.util import audio_to_data
 from core.providers.tts.dto.dto import SentenceType
 from core.utils.audioRateController import AudioRateController
@@ -41,6 +42,8 @@ async def sendAudioMessage(conn, sentenceType, audios, text):
 
     # 发送结束消息（如果是最后一个文本）
     if sentenceType == SentenceType.LAST:
+        turn_trace.mark(conn, "last_packet_queued")
+        turn_trace.finish_turn(conn)
         await send_tts_message(conn, "stop", None)
         conn.client_is_speaking = False
         if conn.close_after_chat:
@@ -234,6 +237,9 @@ async def _do_send_audio(conn, opus_packet, flow_control):
         # 直接发送opus数据包
         await conn.websocket.send(opus_packet)
 
+    if packet_index == 0:
+        turn_trace.mark(conn, "first_packet_sent")
+
     # 更新流控状态
     flow_control["packet_count"] = packet_index + 1
     flow_control["sequence"] = sequence + 1
@@ -8,6 +8,7 @@ from core.handle.sendAudioHandle import send_stt_message, send_tts_message
 from core.handle.textMessageHandler import TextMessageHandler
 from core.handle.textMessageType import TextMessageType
 from core.utils.util import remove_punctuation_and_length
+from core.utils import turn_trace
 from core.providers.asr.dto.dto import InterfaceType
 
 TAG = __name__
@@ -48,6 +49,7 @@ class ListenTextMessageHandler(TextMessageHandler):
             conn.asr_audio.clear()
             if "text" in msg_json:
                 conn.last_activity_time = time.time() * 1000
+                turn_trace.start_turn(conn, "text_input")
                 original_text = msg_json["text"]  # 保留原始文本
                 filtered_len, filtered_text = remove_punctuation_and_length(
                     original_text
@@ -3,6 +3,9 @@ from aiohttp import web
 from config.logger import setup_logging
 from core.api.ota_handler import OTAHandler
 from core.api.vision_handler import VisionHandler
+from core.utils.metrics import get_metrics_registry
+from core.utils.startup import is_ready
+from core.utils.worker_supervisor import get_worker_count, get_worker_id, is_worker
 
 TAG = __name__
 
@@ -32,6 +35,22 @@ class SimpleHttpServer:
         else:
             return f"ws://{local_ip}:{port}/xiaozhi/v1/"
 
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """以 Prometheus 文本格式导出监控指标"""
+        body = get_metrics_registry().render()
+        return web.Response(
+            body=body.encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """就绪检查：模块加载和预热完成并开始监听后返回200，之前返回503"""
+        ready = is_ready()
+        body = {"status": "ready" if ready else "starting"}
+        if is_worker():
+            body["worker"] = get_worker_id()
+        return web.json_response(body, status=200 if ready else 503)
+
     async def start(self):
         try:
             server_config = self.config["server"]
@@ -75,10 +94,25 @@ class SimpleHttpServer:
                     ]
                 )
 
+                app.add_routes([web.get("/health", self.handle_health)])
+
+                if server_config.get("metrics", True):
+                    metrics = get_metrics_registry()
+                    # 多进程模式下每次抓取只会落到其中一个工作进程，用worker标签区分
+                    if is_worker():
+                        metrics.const_labels["worker"] = str(get_worker_id())
+                    app.add_routes([web.get("/metrics", self.handle_metrics)])
+
                 # 运行服务
                 runner = web.AppRunner(app)
                 await runner.setup()
-                site = web.TCPSite(runner, host, port)
+                # 多进程模式下各工作进程共享同一个监听端口
+                site = web.TCPSite(
+                    runner,
+                    host,
+                    port,
+                    reuse_port=True if get_worker_count(self.config) > 1 else None,
+                )
                 await site.start()
 
                 # 保持服务运行
@@ -2,12 +2,12 @@ import os
 import io
 import wave
 import uuid
+import array
+import random
 import json
 import time
-import queue
 import asyncio
 import traceback
-import threading
 import opuslib_next
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
@@ -15,6 +15,8 @@ from typing import Optional, Tuple, List
 from core.handle.receiveAudioHandle import startToChat
 from core.handle.reportHandle import enqueue_asr_report
 from core.utils.util import remove_punctuation_and_length
+from core.utils.metrics import ASR_SECONDS, provider_name
+from core.utils import turn_trace
 from core.handle.receiveAudioHandle import handleAudioMessage
 
 TAG = __name__
@@ -22,28 +24,26 @@ logger = setup_logging()
 
 
 class ASRProviderBase(ABC):
+    # 是否可以直接识别已解码的PCM数据，为True时handle_voice_stop不再让speech_to_text二次解码Opus
+    supports_pcm_input = False
+
     def __init__(self):
         pass
 
     # 打开音频通道
     async def open_audio_channels(self, conn):
-        conn.asr_priority_thread = threading.Thread(
-            target=self.asr_text_priority_thread, args=(conn,), daemon=True
+        conn.asr_priority_task = asyncio.create_task(
+            self.asr_text_priority_task(conn)
         )
-        conn.asr_priority_thread.start()
 
-    # 有序处理ASR音频
-    def asr_text_priority_thread(self, conn):
+    # 有序处理ASR音频（在事件循环中按到达顺序逐包处理，不再经过独立线程中转）
+    async def asr_text_priority_task(self, conn):
         while not conn.stop_event.is_set():
             try:
-                message = conn.asr_audio_queue.get(timeout=1)
-                future = asyncio.run_coroutine_threadsafe(
-                    handleAudioMessage(conn, message),
-                    conn.loop,
-                )
-                future.result()
-            except queue.Empty:
-                continue
+                message = await conn.asr_audio_queue.get()
+                await handleAudioMessage(conn, message)
+            except asyncio.CancelledError:
+                break
             except Exception as e:
                 logger.bind(tag=TAG).error(
                     f"处理ASR文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
@@ -78,6 +78,7 @@ class ASRProviderBase(ABC):
         """并行处理ASR和声纹识别"""
         try:
             total_start_time = time.monotonic()
+            turn_trace.start_turn(conn, "voice_stop")
 
             # 准备音频数据
             if conn.audio_format == "pcm":
@@ -93,7 +94,12 @@ class ASRProviderBase(ABC):
                 wav_data = self._pcm_to_wav(combined_pcm_data)
 
             # 定义ASR任务
-            asr_task = self.speech_to_text(asr_audio_task, conn.session_id, conn.audio_format)
+            if self.supports_pcm_input:
+                asr_task = self.speech_to_text(pcm_data, conn.session_id, "pcm")
+            else:
+                asr_task = self.speech_to_text(
+                    asr_audio_task, conn.session_id, conn.audio_format
+                )
 
             if conn.voiceprint_provider and wav_data:
                 voiceprint_task = conn.voiceprint_provider.identify_speaker(wav_data, conn.session_id)
@@ -151,6 +157,8 @@ class ASRProviderBase(ABC):
             # 性能监控
             total_time = time.monotonic() - total_start_time
             logger.bind(tag=TAG).debug(f"总处理耗时: {total_time:.3f}s")
+            ASR_SECONDS.observe(total_time, provider_name(self))
+            turn_trace.mark(conn, "asr_done")
 
             # 检查文本长度
             text_len, _ = remove_punctuation_and_length(content_for_length_check)
@@ -160,6 +168,8 @@ class ASRProviderBase(ABC):
                 # 使用自定义模块进行上报
                 await startToChat(conn, enhanced_text)
                 enqueue_asr_report(conn, enhanced_text, asr_audio_task)
+            else:
+                turn_trace.finish_turn(conn, "empty")
                 
         except Exception as e:
             logger.bind(tag=TAG).error(f"处理语音停止失败: {e}")
@@ -206,6 +216,23 @@ class ASRProviderBase(ABC):
     def stop_ws_connection(self):
         pass
 
+    def release(self, conn):
+        """释放连接在共享ASR实例中占用的资源"""
+        pass
+
+    def warmup(self):
+        """启动时用合成音频做一次推理，本地模型应重写此方法，云端接口无需预热"""
+        pass
+
+    @staticmethod
+    def _warmup_pcm(seconds: float = 1.0) -> bytes:
+        """生成用于预热的低音量噪声（16kHz/单声道/16位PCM），内容固定"""
+        rng = random.Random(0)
+        samples = array.array(
+            "h", (rng.randint(-300, 300) for _ in range(int(16000 * seconds)))
+        )
+        return samples.tobytes()
+
     def save_audio_to_file(self, pcm_data: List[bytes], session_id: str) -> str:
         """PCM数据保存为WAV文件"""
         module_name = __name__.split(".")[-1]
@@ -0,0 +1,142 @@
+"""
+本地ASR微批调度器
+汇总所有连接已结束的语音片段，按批大小和等待时间预算动态组批，
+在有界线程池中每批只调用一次模型推理，队列满时对调用方施加背压
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Set
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class ASRQueueFullError(RuntimeError):
+    """ASR请求队列已满"""
+
+    pass
+
+
+class LocalASRBatchScheduler:
+    """本地ASR微批调度器"""
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 30,
+        max_workers: int = 1,
+        max_queue_size: int = 64,
+        queue_timeout: float = 1.0,
+        name: str = "local-asr",
+    ):
+        """
+        Args:
+            batch_fn: 批量推理函数，输入一批音频，按相同顺序返回识别结果
+            max_batch_size: 单批最多合并的语音片段数
+            max_wait_ms: 首个片段到达后最多等待多久以凑满一批（毫秒）
+            max_workers: 同时执行推理的批次数（推理线程数）
+            max_queue_size: 排队等待推理的语音片段上限
+            queue_timeout: 队列已满时最多等待多久（秒），超时后拒绝请求
+            name: 推理线程名前缀
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue_size = max(1, int(max_queue_size))
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix=name
+        )
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """提交一个语音片段并等待识别结果
+
+        Raises:
+            ASRQueueFullError: 队列已满且在 queue_timeout 内没有空位
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(
+                self._queue.put((item, future)), timeout=self.queue_timeout
+            )
+        except asyncio.TimeoutError:
+            raise ASRQueueFullError(
+                f"ASR队列已满（{self.max_queue_size}），请稍后重试"
+            ) from None
+        return await future
+
+    def qsize(self) -> int:
+        """当前排队中的语音片段数"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self):
+        """在首次提交时于当前事件循环中启动调度任务"""
+        if self._dispatch_task is not None and not self._dispatch_task.done():
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._dispatch_task = asyncio.create_task(self._dispatch_loop())
+
+    async def _dispatch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # 先等待空闲的推理线程，推理繁忙期间到达的片段会在队列中累积成更大的批
+            await self._slots.acquire()
+            try:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(
+                            await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                        )
+                    except asyncio.TimeoutError:
+                        break
+            except BaseException:
+                self._slots.release()
+                raise
+
+            # 跳过调用方已经放弃等待的请求
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self._executor, self.batch_fn, [item for item, _ in batch]
+            )
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"批量识别结果数量不匹配: 输入{len(batch)}条，输出{len(results)}条"
+                )
+            logger.bind(tag=TAG).debug(f"本地ASR批量识别完成，批大小: {len(batch)}")
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
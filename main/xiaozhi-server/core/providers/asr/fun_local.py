@@ -12,6 +12,10 @@ from typing import Optional, Tuple, List
 from core.providers.asr.utils import lang_tag_filter
 from core.providers.asr.base import ASRProviderBase
 from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.batch_scheduler import (
+    ASRQueueFullError,
+    LocalASRBatchScheduler,
+)
 
 TAG = __name__
 logger = setup_logging()
@@ -63,6 +67,32 @@ class ASRProvider(ASRProviderBase):
                 # device="cuda:0",  # 启用GPU加速
             )
 
+        # 本地ASR实例被所有连接共享，识别请求统一排队并动态组批推理
+        self.scheduler = LocalASRBatchScheduler(
+            self._generate_batch,
+            max_batch_size=int(config.get("batch_max_size") or 8),
+            max_wait_ms=float(config.get("batch_max_wait_ms") or 30),
+            max_workers=int(config.get("max_workers") or 1),
+            max_queue_size=int(config.get("max_queue_size") or 64),
+            name="fun-local-asr",
+        )
+
+    def warmup(self):
+        with CaptureOutput():
+            self._generate_batch([self._warmup_pcm()])
+
+    def _generate_batch(self, pcm_list: List[bytes]) -> List:
+        """在推理线程中对一批音频只调用一次 generate"""
+        results = self.model.generate(
+            input=pcm_list,
+            cache={},
+            language="auto",
+            use_itn=True,
+            batch_size=len(pcm_list),
+            batch_size_s=60,
+        )
+        return [lang_tag_filter(result["text"]) for result in results]
+
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, audio_format="opus"
     ) -> Tuple[Optional[str], Optional[str]]:
@@ -92,23 +122,19 @@ class ASRProvider(ASRProviderBase):
                 else:
                     file_path = self.save_audio_to_file(pcm_data, session_id)
 
-                # 语音识别 - 使用线程池避免阻塞事件循环
+                # 语音识别 - 交给调度器与其他连接的语音合并成批，在推理线程中执行
                 start_time = time.time()
-                result = await asyncio.to_thread(
-                    self.model.generate,
-                    input=combined_pcm_data,
-                    cache={},
-                    language="auto",
-                    use_itn=True,
-                    batch_size_s=60,
-                )
-                text = lang_tag_filter(result[0]["text"])
+                text = await self.scheduler.submit(combined_pcm_data)
                 logger.bind(tag=TAG).debug(
                     f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text['content']}"
                 )
 
                 return text, file_path
 
+            except ASRQueueFullError as e:
+                logger.bind(tag=TAG).warning(f"语音识别繁忙，已拒绝本次请求: {e}")
+                return "", file_path
+
             except OSError as e:
                 retry_count += 1
                 if retry_count >= MAX_RETRIES:
@@ -119,7 +145,7 @@ class ASRProvider(ASRProviderBase):
                 logger.bind(tag=TAG).warning(
                     f"语音识别失败，正在重试（{retry_count}/{MAX_RETRIES}）: {e}"
                 )
-                time.sleep(RETRY_DELAY)
+                await asyncio.sleep(RETRY_DELAY)
 
             except Exception as e:
                 logger.bind(tag=TAG).error(f"语音识别失败: {e}", exc_info=True)
@@ -0,0 +1,40 @@
+import asyncio
+import itertools
+from config.logger import setup_logging
+from typing import Optional, Tuple, List
+from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.base import ASRProviderBase
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_TEXTS = ["你好，今天天气怎么样", "给我讲个笑话吧", "现在几点了"]
+
+
+class ASRProvider(ASRProviderBase):
+    """
+    本地模拟ASR，不识别音频，按顺序轮流返回配置的文本
+    用于压力测试：结果确定、无需网络和模型，耗时由 delay_ms 模拟
+    """
+
+    # 直接接收已解码的PCM，省去二次解码
+    supports_pcm_input = True
+
+    def __init__(self, config: dict, delete_audio_file: bool):
+        self.interface_type = InterfaceType.NON_STREAM
+        self.delete_audio_file = delete_audio_file
+        self.output_dir = config.get("output_dir", "tmp/")
+        texts = config.get("texts") or DEFAULT_TEXTS
+        if isinstance(texts, str):
+            texts = [texts]
+        self._texts = itertools.cycle(texts)
+        self.delay = float(config.get("delay_ms", 100)) / 1000
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+        text = next(self._texts)
+        logger.bind(tag=TAG).debug(f"模拟识别结果: {text}")
+        return text, None
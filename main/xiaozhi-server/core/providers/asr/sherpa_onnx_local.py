@@ -1,8 +1,9 @@
 import time
-import wave
 import os
 import sys
 import io
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from config.logger import setup_logging
 from typing import Optional, Tuple, List
 from core.providers.asr.dto.dto import InterfaceType
@@ -35,6 +36,8 @@ class CaptureOutput:
 
 
 class ASRProvider(ASRProviderBase):
+    supports_pcm_input = True
+
     def __init__(self, config: dict, delete_audio_file: bool):
         super().__init__()
         self.interface_type = InterfaceType.LOCAL
@@ -96,29 +99,25 @@ class ASRProvider(ASRProviderBase):
                     use_itn=True,
                 )
 
-    def read_wave(self, wave_filename: str) -> Tuple[np.ndarray, int]:
-        """
-        Args:
-        wave_filename:
-            Path to a wave file. It should be single channel and each sample should
-            be 16-bit. Its sample rate does not need to be 16kHz.
-        Returns:
-        Return a tuple containing:
-        - A 1-D array of dtype np.float32 containing the samples, which are
-        normalized to the range [-1, 1].
-        - sample rate of the wave file
-        """
-
-        with wave.open(wave_filename) as f:
-            assert f.getnchannels() == 1, f.getnchannels()
-            assert f.getsampwidth() == 2, f.getsampwidth()  # it is in bytes
-            num_samples = f.getnframes()
-            samples = f.readframes(num_samples)
-            samples_int16 = np.frombuffer(samples, dtype=np.int16)
-            samples_float32 = samples_int16.astype(np.float32)
-
-            samples_float32 = samples_float32 / 32768
-            return samples_float32, f.getframerate()
+        # 识别在共享的线程池中执行，不阻塞事件循环；识别器本身被所有连接复用
+        num_workers = config.get("num_workers")
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(num_workers) if num_workers else 2,
+            thread_name_prefix="sherpa-onnx-asr",
+        )
+
+    def warmup(self):
+        samples = (
+            np.frombuffer(self._warmup_pcm(), dtype=np.int16).astype(np.float32) / 32768
+        )
+        self._recognize(samples)
+
+    def _recognize(self, samples: np.ndarray) -> str:
+        """在工作线程中完成一次识别"""
+        stream = self.model.create_stream()
+        stream.accept_waveform(16000, samples)
+        self.model.decode_stream(stream)
+        return stream.result.text
 
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, audio_format="opus"
@@ -126,24 +125,28 @@ class ASRProvider(ASRProviderBase):
         """语音转文本主处理逻辑"""
         file_path = None
         try:
-            # 保存音频文件
-            start_time = time.time()
             if audio_format == "pcm":
                 pcm_data = opus_data
             else:
                 pcm_data = self.decode_opus(opus_data)
-            file_path = self.save_audio_to_file(pcm_data, session_id)
-            logger.bind(tag=TAG).debug(
-                f"音频文件保存耗时: {time.time() - start_time:.3f}s | 路径: {file_path}"
-            )
+
+            # 只有需要保留音频时才写文件，识别直接使用内存中的PCM数据
+            if not self.delete_audio_file:
+                start_time = time.time()
+                file_path = self.save_audio_to_file(pcm_data, session_id)
+                logger.bind(tag=TAG).debug(
+                    f"音频文件保存耗时: {time.time() - start_time:.3f}s | 路径: {file_path}"
+                )
 
             # 语音识别
             start_time = time.time()
-            s = self.model.create_stream()
-            samples, sample_rate = self.read_wave(file_path)
-            s.accept_waveform(sample_rate, samples)
-            self.model.decode_stream(s)
-            text = s.result.text
+            samples = (
+                np.frombuffer(b"".join(pcm_data), dtype=np.int16).astype(np.float32)
+                / 32768
+            )
+            text = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._recognize, samples
+            )
             logger.bind(tag=TAG).debug(
                 f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
             )
@@ -153,11 +156,3 @@ class ASRProvider(ASRProviderBase):
         except Exception as e:
             logger.bind(tag=TAG).error(f"语音识别失败: {e}", exc_info=True)
             return "", file_path
-        finally:
-            # 文件清理逻辑
-            if self.delete_audio_file and file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.bind(tag=TAG).debug(f"已删除临时音频文件: {file_path}")
-                except Exception as e:
-                    logger.bind(tag=TAG).error(f"文件删除失败: {file_path} | 错误: {e}")
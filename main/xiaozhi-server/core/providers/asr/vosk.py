@@ -1,7 +1,11 @@
 import os
 import json
 import time
-from typing import Optional, Tuple, List
+import asyncio
+import threading
+import opuslib_next
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, List
 from .base import ASRProviderBase
 from config.logger import setup_logging
 from core.providers.asr.dto.dto import InterfaceType
@@ -10,6 +14,49 @@ import vosk
 TAG = __name__
 logger = setup_logging()
 
+
+class VoskRecognizerPool:
+    """VOSK识别器池，每段语音租用一个识别器，用完重置后归还"""
+
+    def __init__(self, model, max_idle: int = 16):
+        self.model = model
+        self.max_idle = max_idle
+        self._idle: List[vosk.KaldiRecognizer] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> vosk.KaldiRecognizer:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        # 初始化VOSK识别器（采样率必须为16kHz）
+        return vosk.KaldiRecognizer(self.model, 16000)
+
+    def release(self, recognizer: vosk.KaldiRecognizer):
+        recognizer.Reset()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(recognizer)
+
+
+class _VoskSession:
+    """单个连接当前语音片段的流式识别状态"""
+
+    def __init__(self, recognizer: vosk.KaldiRecognizer):
+        self.recognizer = recognizer
+        self.lock = threading.Lock()  # 同一识别器同一时间只能被一个线程使用
+        self.decoder = opuslib_next.Decoder(16000, 1)
+        self.texts: List[str] = []  # 识别器在片段内部断句得到的结果
+        self.partial_text = ""
+        self.fed_count = 0  # 已送入识别器的音频包数量
+        self.last_packet = None  # 最后一个送入识别器的音频包
+
+    def matches(self, asr_audio: List[bytes]) -> bool:
+        """已送入识别器的音频是否与连接缓存的音频一致"""
+        if len(asr_audio) != self.fed_count:
+            return False
+        return not asr_audio or asr_audio[-1] is self.last_packet
+
+
 class ASRProvider(ASRProviderBase):
     def __init__(self, config: dict, delete_audio_file: bool = True):
         super().__init__()
@@ -17,12 +64,21 @@ class ASRProvider(ASRProviderBase):
         self.model_path = config.get("model_path")
         self.output_dir = config.get("output_dir", "tmp/")
         self.delete_audio_file = delete_audio_file
-        
+
         # 初始化VOSK模型
         self.model = None
-        self.recognizer = None
+        self.recognizer_pool = None
         self._load_model()
-        
+
+        # 识别器在共享线程池中运行，不阻塞事件循环
+        num_workers = config.get("num_workers")
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(num_workers) if num_workers else 2,
+            thread_name_prefix="vosk-asr",
+        )
+        # 各连接正在进行的流式识别：session_id -> _VoskSession
+        self._sessions: Dict[str, _VoskSession] = {}
+
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
 
@@ -31,18 +87,121 @@ class ASRProvider(ASRProviderBase):
         try:
             if not os.path.exists(self.model_path):
                 raise FileNotFoundError(f"VOSK模型路径不存在: {self.model_path}")
-                
+
             logger.bind(tag=TAG).info(f"正在加载VOSK模型: {self.model_path}")
             self.model = vosk.Model(self.model_path)
-
-            # 初始化VOSK识别器（采样率必须为16kHz）
-            self.recognizer = vosk.KaldiRecognizer(self.model, 16000)
+            self.recognizer_pool = VoskRecognizerPool(self.model)
 
             logger.bind(tag=TAG).info("VOSK模型加载成功")
         except Exception as e:
             logger.bind(tag=TAG).error(f"加载VOSK模型失败: {e}")
             raise
 
+    async def receive_audio(self, conn, audio, audio_have_voice):
+        # 先把音频送入流式识别，语音结束时识别结果基本已经就绪
+        try:
+            await self._stream_audio(conn, audio, audio_have_voice)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"VOSK流式识别失败: {e}")
+            self._release_session(conn.session_id)
+        await super().receive_audio(conn, audio, audio_have_voice)
+
+    def release(self, conn):
+        self._release_session(conn.session_id)
+
+    async def _stream_audio(self, conn, audio, audio_have_voice):
+        """按音频包到达顺序增量送入识别器"""
+        if not self.model or conn.audio_format == "pcm":
+            return
+        session = self._sessions.get(conn.session_id)
+        voiced = (
+            conn.client_listen_mode == "manual"
+            or audio_have_voice
+            or conn.client_have_voice
+        )
+        if session is not None and not session.matches(conn.asr_audio):
+            # 连接缓存的音频被清空或截断（如已完成识别、唤醒后丢弃），重新开始
+            self._release_session(conn.session_id)
+            session = None
+        if not voiced:
+            return
+
+        if session is None:
+            session = _VoskSession(self.recognizer_pool.acquire())
+            self._sessions[conn.session_id] = session
+            # 补送语音开始前缓存的音频
+            packets = conn.asr_audio + [audio]
+        else:
+            packets = [audio]
+
+        pcm_data = []
+        for packet in packets:
+            try:
+                pcm_data.append(session.decoder.decode(packet, 960))
+            except opuslib_next.OpusError as e:
+                logger.bind(tag=TAG).debug(f"Opus解码错误，跳过数据包: {e}")
+        session.fed_count += len(packets)
+        session.last_packet = audio
+        if pcm_data:
+            await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._accept_waveform, session, b"".join(pcm_data)
+            )
+
+    @staticmethod
+    def _accept_waveform(session: _VoskSession, pcm: bytes):
+        """在工作线程中送入音频，并记录断句结果和中间结果"""
+        with session.lock:
+            if session.recognizer.AcceptWaveform(pcm):
+                text = json.loads(session.recognizer.Result()).get("text", "")
+                if text:
+                    session.texts.append(text)
+                session.partial_text = ""
+            else:
+                session.partial_text = json.loads(
+                    session.recognizer.PartialResult()
+                ).get("partial", "")
+
+    @staticmethod
+    def _final_text(session: _VoskSession) -> str:
+        """在工作线程中获取流式识别的最终结果"""
+        with session.lock:
+            final_text = json.loads(session.recognizer.FinalResult()).get("text", "")
+        texts = session.texts + ([final_text] if final_text else [])
+        return " ".join(texts)
+
+    def warmup(self):
+        if self.model:
+            self._recognize(self._warmup_pcm())
+
+    def _recognize(self, pcm: bytes) -> str:
+        """在工作线程中对整段音频做一次性识别"""
+        recognizer = self.recognizer_pool.acquire()
+        try:
+            # VOSK推荐每次送入2000字节的数据
+            chunk_size = 2000
+            texts = []
+            for i in range(0, len(pcm), chunk_size):
+                if recognizer.AcceptWaveform(pcm[i : i + chunk_size]):
+                    text = json.loads(recognizer.Result()).get("text", "")
+                    if text:
+                        texts.append(text)
+            final_text = json.loads(recognizer.FinalResult()).get("text", "")
+            if final_text:
+                texts.append(final_text)
+            return " ".join(texts)
+        finally:
+            self.recognizer_pool.release(recognizer)
+
+    def _release_session(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self.executor.submit(self._recycle, session)
+
+    def _recycle(self, session: _VoskSession):
+        """等待在途的识别结束后，把识别器归还到池中"""
+        with session.lock:
+            self.recognizer_pool.release(session.recognizer)
+
     async def speech_to_text(
         self, audio_data: List[bytes], session_id: str, audio_format: str = "opus"
     ) -> Tuple[Optional[str], Optional[str]]:
@@ -54,16 +213,39 @@ class ASRProvider(ASRProviderBase):
                 logger.bind(tag=TAG).error("VOSK模型未加载，无法进行识别")
                 return "", None
 
+            loop = asyncio.get_running_loop()
+            start_time = time.time()
+
+            # 流式识别已经送入了同一段音频，直接取最终结果
+            session = self._sessions.get(session_id)
+            if session is not None and session.matches(audio_data):
+                self._sessions.pop(session_id, None)
+                try:
+                    text_result = await loop.run_in_executor(
+                        self.executor, self._final_text, session
+                    )
+                finally:
+                    self.executor.submit(self._recycle, session)
+                if not self.delete_audio_file:
+                    file_path = self.save_audio_to_file(
+                        self.decode_opus(audio_data), session_id
+                    )
+                logger.bind(tag=TAG).debug(
+                    f"VOSK流式识别收尾耗时: {time.time() - start_time:.3f}s | 结果: {text_result.strip()}"
+                )
+                return text_result.strip(), file_path
+            self._release_session(session_id)
+
             # 解码音频（如果原始格式是Opus）
             if audio_format == "pcm":
                 pcm_data = audio_data
             else:
                 pcm_data = self.decode_opus(audio_data)
-                
+
             if not pcm_data:
                 logger.bind(tag=TAG).warning("解码后的PCM数据为空，无法进行识别")
                 return "", None
-                
+
             # 合并PCM数据
             combined_pcm_data = b"".join(pcm_data)
             if len(combined_pcm_data) == 0:
@@ -74,41 +256,16 @@ class ASRProvider(ASRProviderBase):
             if not self.delete_audio_file:
                 file_path = self.save_audio_to_file(pcm_data, session_id)
 
-            start_time = time.time()
-            
-            
-            # 进行识别（VOSK推荐每次送入2000字节的数据）
-            chunk_size = 2000
-            text_result = ""
-            
-            for i in range(0, len(combined_pcm_data), chunk_size):
-                chunk = combined_pcm_data[i:i+chunk_size]
-                if self.recognizer.AcceptWaveform(chunk):
-                    result = json.loads(self.recognizer.Result())
-                    text = result.get('text', '')
-                    if text:
-                        text_result += text + " "
-            
-            # 获取最终结果
-            final_result = json.loads(self.recognizer.FinalResult())
-            final_text = final_result.get('text', '')
-            if final_text:
-                text_result += final_text
-            
+            text_result = await loop.run_in_executor(
+                self.executor, self._recognize, combined_pcm_data
+            )
+
             logger.bind(tag=TAG).debug(
                 f"VOSK语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text_result.strip()}"
             )
-            
+
             return text_result.strip(), file_path
-            
+
         except Exception as e:
             logger.bind(tag=TAG).error(f"VOSK语音识别失败: {e}")
             return "", None
-        finally:
-            # 文件清理逻辑
-            if self.delete_audio_file and file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.bind(tag=TAG).debug(f"已删除临时音频文件: {file_path}")
-                except Exception as e:
-                    logger.bind(tag=TAG).error(f"文件删除失败: {file_path} | 错误: {e}")
@@ -1,5 +1,7 @@
 from typing import List, Dict
 from ..base import IntentProviderBase
+from ..local_classifier import LocalIntentClassifier
+from core.providers.tools.base import ToolType
 from plugins_func.functions.play_music import initialize_music_handler
 from config.logger import setup_logging
 import re
@@ -15,7 +17,10 @@ class IntentProvider(IntentProviderBase):
     def __init__(self, config):
         super().__init__(config)
         self.llm = None
-        self.promot = ""
+        # 按可用函数、音乐列表、设备列表缓存的系统提示词，避免每次识别都重新拼接
+        self._prompt_cache = {}
+        # 本地快速分类器，常见意图不再等待LLM
+        self.local_classifier = LocalIntentClassifier(config.get("fast_path"))
         # 导入全局缓存管理器
         from core.utils.cache.manager import cache_manager, CacheType
 
@@ -114,6 +119,50 @@ class IntentProvider(IntentProviderBase):
         )
         return prompt
 
+    def _get_system_prompt(self, conn, functions) -> str:
+        """获取意图识别的系统提示词，函数列表、音乐列表、设备列表不变时直接复用"""
+        music_config = initialize_music_handler(conn)
+        music_file_names = music_config["music_file_names"]
+
+        home_assistant_cfg = conn.config["plugins"].get("home_assistant")
+        if home_assistant_cfg:
+            devices = home_assistant_cfg.get("devices", [])
+        else:
+            devices = []
+
+        # 只用开销很小的标识作为键：函数名、音乐列表的扫描时间（列表刷新时更新）、设备列表
+        cache_key = (
+            tuple(f.get("function", {}).get("name") for f in functions),
+            music_config.get("scan_time"),
+            tuple(devices),
+        )
+        prompt_music = self._prompt_cache.get(cache_key)
+        if prompt_music is not None:
+            return prompt_music
+
+        prompt = self.get_intent_system_prompt(functions)
+        prompt_music = f"{prompt}\n<musicNames>{music_file_names}\n</musicNames>"
+        if len(devices) > 0:
+            hass_prompt = "\n下面是我家智能设备列表（位置，设备名，entity_id），可以通过homeassistant控制\n"
+            for device in devices:
+                hass_prompt += device + "\n"
+            prompt_music += hass_prompt
+
+        if len(self._prompt_cache) >= 32:
+            self._prompt_cache.clear()
+        self._prompt_cache[cache_key] = prompt_music
+        return prompt_music
+
+    @staticmethod
+    def _handle_continue_chat(conn, intent: str):
+        """普通对话只保留非工具相关的消息"""
+        if '"continue_chat"' not in intent:
+            return
+        clean_history = [
+            msg for msg in conn.dialogue.dialogue if msg.role not in ["tool", "function"]
+        ]
+        conn.dialogue.dialogue = clean_history
+
     def replyResult(self, text: str, original_text: str):
         llm_result = self.llm.response_no_stream(
             system_prompt=text,
@@ -147,32 +196,32 @@ class IntentProvider(IntentProviderBase):
             )
             return cached_intent
 
-        if self.promot == "":
-            functions = conn.func_handler.get_functions()
-            if hasattr(conn, "mcp_client"):
-                mcp_tools = conn.mcp_client.get_available_tools()
-                if mcp_tools is not None and len(mcp_tools) > 0:
-                    if functions is None:
-                        functions = []
-                    functions.extend(mcp_tools)
-
-            self.promot = self.get_intent_system_prompt(functions)
-
-        music_config = initialize_music_handler(conn)
-        music_file_names = music_config["music_file_names"]
-        prompt_music = f"{self.promot}\n<musicNames>{music_file_names}\n</musicNames>"
-
-        home_assistant_cfg = conn.config["plugins"].get("home_assistant")
-        if home_assistant_cfg:
-            devices = home_assistant_cfg.get("devices", [])
-        else:
-            devices = []
-        if len(devices) > 0:
-            hass_prompt = "\n下面是我家智能设备列表（位置，设备名，entity_id），可以通过homeassistant控制\n"
-            for device in devices:
-                hass_prompt += device + "\n"
-            prompt_music += hass_prompt
+        functions = list(conn.func_handler.get_functions() or [])
+        # 服务端插件以外的工具（设备端IoT/MCP、服务端MCP、MCP接入点）多为设备控制类工具
+        tool_manager = conn.func_handler.tool_manager
+        device_tools = any(
+            tool_manager.get_tool_type(f.get("function", {}).get("name"))
+            != ToolType.SERVER_PLUGIN
+            for f in functions
+        )
+        if hasattr(conn, "mcp_client"):
+            mcp_tools = conn.mcp_client.get_available_tools()
+            if mcp_tools is not None and len(mcp_tools) > 0:
+                functions.extend(mcp_tools)
+                device_tools = True
+
+        # 本地快速判断，命中时省去一次LLM调用
+        local_intent = self.local_classifier.classify(
+            text, functions, device_tools=device_tools
+        )
+        if local_intent is not None:
+            logger.bind(tag=TAG).info(
+                f"本地识别到意图: {local_intent}, 耗时: {time.time() - total_start_time:.4f}秒"
+            )
+            self._handle_continue_chat(conn, local_intent)
+            return local_intent
 
+        prompt_music = self._get_system_prompt(conn, functions)
         logger.bind(tag=TAG).debug(f"User prompt: {prompt_music}")
 
         # 构建用户对话历史的提示
@@ -194,7 +243,7 @@ class IntentProvider(IntentProviderBase):
         llm_start_time = time.time()
         logger.bind(tag=TAG).debug(f"开始LLM意图识别调用, 模型: {model_info}")
 
-        intent = self.llm.response_no_stream(
+        intent = await self.llm.response_no_stream_async(
             system_prompt=prompt_music, user_prompt=user_prompt
         )
 
@@ -243,13 +292,7 @@ class IntentProvider(IntentProviderBase):
 
                 elif function_name == "continue_chat":
                     # 处理普通对话
-                    # 保留非工具相关的消息
-                    clean_history = [
-                        msg
-                        for msg in conn.dialogue.dialogue
-                        if msg.role not in ["tool", "function"]
-                    ]
-                    conn.dialogue.dialogue = clean_history
+                    self._handle_continue_chat(conn, intent)
 
                 else:
                     # 处理函数调用
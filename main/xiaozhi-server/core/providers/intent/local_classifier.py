@@ -0,0 +1,238 @@
+"""
+本地意图快速分类器
+在调用LLM做意图识别之前，用规则和字符二元组相似度在本地判断常见意图：
+- 命中规则（查询时间日期、退出、播放音乐、查询天气等）直接返回对应的function_call
+- 可选：没有设备控制类工具时，与所有可用函数的描述都不相似的话语判定为普通聊天，
+  直接返回continue_chat（默认关闭）
+- 其余拿不准的话语返回None，交给LLM判断
+整个过程只做字符串运算，耗时在微秒级
+"""
+
+import re
+import json
+import threading
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+CONTINUE_CHAT = '{"function_call": {"name": "continue_chat"}}'
+
+# 默认规则：(函数名, 正则, 参数模板)
+# 参数模板中的 {名称} 会被替换为正则中同名分组匹配到的内容，匹配为空时使用 | 后面的默认值
+# 退出规则不带告别语，由插件使用默认的中文告别语
+DEFAULT_RULES = [
+    (
+        "result_for_context",
+        r"^(现在|当前)?(是)?(几点|什么时间|几点钟)(了)?$"
+        r"|^(今天|今儿)(是)?(几号|几月几号|星期几|周几|礼拜几|什么日子|什么日期|农历几号|农历多少)(啊|呀|呢)?$"
+        r"|^(现在|当前)的?时间$",
+        None,
+    ),
+    (
+        "handle_exit_intent",
+        r"^(请)?(退出系统|结束对话|退下吧|我不想和你说话了|不聊了|拜拜了)$",
+        None,
+    ),
+    (
+        "play_music",
+        # 歌名由 _clean_song_name 从 song_name 中去掉量词、语气词等后得到
+        r"^(请|帮我|给我)?(?P<verb>播放|放|来|唱)(?P<song_name>.*)$",
+        {"song_name": "{song_name|random}"},
+    ),
+    (
+        "get_weather",
+        r"^(?P<location>(?!今天|明天|现在)[一-龥]{2,4}?)?(今天|明天|现在)?的?天气(怎么样|如何|好吗|预报)?(啊|呀|呢)?$",
+        {"location": "{location|}", "lang": "zh_CN"},
+    ),
+]
+
+# play_music 规则只接受带有歌曲相关词语的话语，避免误匹配“来一个笑话”
+_MUSIC_WORDS = ("歌", "音乐", "曲")
+# 出现这些词时是切歌、换歌等操作，不是点歌，交给LLM判断
+_SONG_NAVIGATION_WORDS = ("下一", "上一", "下首", "上首", "别的", "其他", "其它", "换", "另一", "再")
+# 歌名前的量词和歌曲类别词，如“来点音乐”、“放首歌”
+_SONG_LEADING = re.compile(r"^(一)?(点|首|个|段|些|曲)?(儿)?(歌曲|音乐|歌)?")
+# 歌名后的“给我听”和语气词，如“唱首歌给我听”、“放首歌吧”
+_SONG_TRAILING = re.compile(r"(给我|给大家)?(听听|听一下|听)?(吧|呀|啊|呢|哦|嘛|好吗|好不好)*$")
+# 歌名后的歌曲类别词，如“播放周杰伦的歌”
+_SONG_SUFFIX = re.compile(r"的?(歌曲|音乐|曲子|歌)$")
+# 只是描述歌曲风格或偏好，不是明确的歌名，交给LLM判断
+_SONG_STOP_CHARS = set("我你他她")
+_SONG_STYLE_WORDS = {"好听", "轻松", "欢快", "安静", "热门", "流行", "经典", "伤感", "新", "老", "好"}
+# 地点中出现这些字时说明是“我想知道天气”之类的说法，不是地名，交给LLM判断
+_LOCATION_STOP_CHARS = set("我你他她想要查看问说下帮告诉")
+# Home Assistant 插件的函数名前缀
+_HASS_PREFIX = "hass_"
+
+
+def _clean_song_name(verb: str, text: str) -> Optional[str]:
+    """
+    从点歌话语中提取歌名：没有明确歌名时返回random，拿不准时返回None交给LLM判断
+
+    只有“播放/放/来”后面跟着的内容才视为歌名，“唱”只接受随机播放
+    """
+    if any(word in text for word in _SONG_NAVIGATION_WORDS):
+        return None
+    name = _SONG_LEADING.sub("", text, count=1)
+    name = _SONG_TRAILING.sub("", name, count=1)
+    name = _SONG_SUFFIX.sub("", name, count=1)
+    if not name:
+        return "random"
+    if verb == "唱" or _SONG_STOP_CHARS & set(name) or name in _SONG_STYLE_WORDS:
+        return None
+    return name
+
+
+def _bigrams(text: str) -> FrozenSet[str]:
+    text = re.sub(r"[^\w]", "", text.lower())
+    if len(text) < 2:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i : i + 2] for i in range(len(text) - 1))
+
+
+class LocalIntentClassifier:
+    """本地意图快速分类器，可在多个连接之间共享"""
+
+    def __init__(self, config: dict = None):
+        """
+        Args:
+            config: 配置，支持以下字段
+                enabled: 是否启用，默认启用
+                rules: 自定义规则列表，每项包含 name、pattern、arguments，优先于默认规则
+                chat_threshold: 话语与所有函数描述的相似度都低于该值时判定为普通聊天，
+                                默认为0即关闭普通聊天判定；存在设备控制类工具时始终不做该判定
+        """
+        config = config or {}
+        self.enabled = bool(config.get("enabled", True))
+        self.chat_threshold = float(config.get("chat_threshold", 0))
+        rules = [
+            (rule["name"], rule["pattern"], rule.get("arguments"))
+            for rule in config.get("rules") or []
+        ] + DEFAULT_RULES
+        self.rules = [
+            (name, re.compile(pattern), arguments) for name, pattern, arguments in rules
+        ]
+        # 按可用函数集合缓存的函数描述二元组索引
+        self._index_cache: Dict[Tuple[str, ...], Dict[str, FrozenSet[str]]] = {}
+        self._lock = threading.Lock()
+
+    def classify(
+        self, text: str, functions: Optional[List[dict]], device_tools: bool = False
+    ) -> Optional[str]:
+        """
+        本地判断意图
+
+        Args:
+            text: 用户话语
+            functions: 当前连接可用的函数列表
+            device_tools: 是否有设备端IoT/MCP、服务端MCP等控制类工具，
+                          这些工具的描述（常为英文）与中文指令几乎没有字符重合，
+                          为True时不做普通聊天判定
+
+        Returns:
+            function_call格式的JSON字符串，拿不准时返回None
+        """
+        if not self.enabled:
+            return None
+        clean_text = re.sub(r"[^\w]", "", text)
+        if not clean_text:
+            return None
+        available = {
+            f.get("function", {}).get("name") for f in functions or []
+        } | {"result_for_context", "continue_chat"}
+
+        for name, pattern, arguments in self.rules:
+            if name not in available:
+                continue
+            match = pattern.match(clean_text)
+            if match is None:
+                continue
+            if name == "play_music" and not any(w in clean_text for w in _MUSIC_WORDS):
+                continue
+            if name == "get_weather" and _LOCATION_STOP_CHARS & set(
+                match.group("location") or ""
+            ):
+                continue
+            groups = match.groupdict()
+            if name == "play_music" and groups.get("verb"):
+                song_name = _clean_song_name(groups["verb"], groups.get("song_name") or "")
+                if song_name is None:
+                    return None
+                groups["song_name"] = song_name
+            return self._build_call(name, groups, arguments)
+
+        if (
+            self.chat_threshold > 0
+            and functions
+            and not device_tools
+            and not self._has_hass_tools(functions)
+        ):
+            score, best = self._best_match(clean_text, functions)
+            if score < self.chat_threshold:
+                logger.bind(tag=TAG).debug(
+                    f"本地判定为普通聊天: {text}, 最相似函数: {best}, 相似度: {score:.3f}"
+                )
+                return CONTINUE_CHAT
+        return None
+
+    @staticmethod
+    def _has_hass_tools(functions: List[dict]) -> bool:
+        return any(
+            f.get("function", {}).get("name", "").startswith(_HASS_PREFIX)
+            for f in functions
+        )
+
+    @staticmethod
+    def _build_call(name: str, groups: Dict[str, str], arguments: Optional[dict]) -> str:
+        function_call = {"name": name}
+        if arguments:
+            resolved = {}
+            for key, template in arguments.items():
+                if isinstance(template, str) and template.startswith("{") and template.endswith("}"):
+                    group, _, default = template[1:-1].partition("|")
+                    resolved[key] = (groups.get(group) or "").strip() or default
+                else:
+                    resolved[key] = template
+            function_call["arguments"] = resolved
+        return json.dumps({"function_call": function_call}, ensure_ascii=False)
+
+    def _best_match(self, text: str, functions: List[dict]) -> Tuple[float, str]:
+        """计算话语与各函数描述的相似度（话语二元组在函数描述中出现的比例）"""
+        text_grams = _bigrams(text)
+        if not text_grams:
+            return 0.0, ""
+        best_score, best_name = 0.0, ""
+        for name, grams in self._get_index(functions).items():
+            score = len(text_grams & grams) / len(text_grams)
+            if score > best_score:
+                best_score, best_name = score, name
+        return best_score, best_name
+
+    def _get_index(self, functions: List[dict]) -> Dict[str, FrozenSet[str]]:
+        key = tuple(sorted(f.get("function", {}).get("name", "") for f in functions))
+        index = self._index_cache.get(key)
+        if index is not None:
+            return index
+        index = {}
+        for f in functions:
+            func = f.get("function", {})
+            name = func.get("name", "")
+            doc = name.replace("_", "") + func.get("description", "")
+            for param in func.get("parameters", {}).get("properties", {}).values():
+                doc += param.get("description", "")
+            index[name] = _bigrams(doc)
+        # 出现在一半以上函数描述中的二元组（如“用户”、“获取”）没有区分度，去掉
+        if len(index) > 1:
+            counts: Dict[str, int] = {}
+            for grams in index.values():
+                for gram in grams:
+                    counts[gram] = counts.get(gram, 0) + 1
+            common = {g for g, c in counts.items() if c > len(index) / 2}
+            index = {name: grams - common for name, grams in index.items()}
+        with self._lock:
+            if len(self._index_cache) > 64:
+                self._index_cache.clear()
+            self._index_cache[key] = index
+        return index
@@ -1,9 +1,60 @@
+import asyncio
+import threading
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
+from core.utils.shared_executor import get_shared_executor
 
 TAG = __name__
 logger = setup_logging()
 
+_END = object()
+
+
+async def _iterate_in_thread(make_generator):
+    """在流式生成专用线程池中迭代同步生成器，逐个产出结果
+
+    消费方停止迭代（打断、任务取消）后，生产线程在下一个结果处停止并关闭生成器
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stopped = threading.Event()
+
+    def put(item, error=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            # 事件循环已关闭
+            stopped.set()
+
+    def produce():
+        generator = None
+        try:
+            generator = make_generator()
+            for item in generator:
+                if stopped.is_set():
+                    break
+                put(item)
+        except BaseException as e:
+            put(_END, e)
+            return
+        finally:
+            if generator is not None:
+                generator.close()
+        put(_END)
+
+    get_shared_executor().submit_stream(produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
 class LLMProviderBase(ABC):
     @abstractmethod
     def response(self, session_id, dialogue):
@@ -25,7 +76,24 @@ class LLMProviderBase(ABC):
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in Ollama response generation: {e}")
             return "【LLM服务响应异常】"
-    
+
+    async def response_no_stream_async(self, system_prompt, user_prompt, **kwargs):
+        """response_no_stream 的异步版本，不阻塞事件循环"""
+        try:
+            # 构造对话格式
+            dialogue = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+            result = ""
+            async for part in self.response_async("", dialogue, **kwargs):
+                result += part
+            return result
+
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in LLM response generation: {e}")
+            return "【LLM服务响应异常】"
+
     def response_with_functions(self, session_id, dialogue, functions=None):
         """
         Default implementation for function calling (streaming)
@@ -37,3 +105,25 @@ class LLMProviderBase(ABC):
         for token in self.response(session_id, dialogue):
             yield token, None
 
+    async def response_async(self, session_id, dialogue, **kwargs):
+        """
+        异步流式响应，用 async for 逐个获取token
+        默认在流式生成专用线程池中迭代同步的 response，支持异步客户端的供应商应重写此方法；
+        关闭生成器或取消所在任务时，供应商应停止读取并关闭上游连接
+        """
+        async for token in _iterate_in_thread(
+            lambda: self.response(session_id, dialogue, **kwargs)
+        ):
+            yield token
+
+    async def response_with_functions_async(self, session_id, dialogue, functions=None):
+        """
+        异步流式响应（支持函数调用），每次产出 (content, tool_calls)
+        默认在流式生成专用线程池中迭代同步的 response_with_functions
+        """
+        async for item in _iterate_in_thread(
+            lambda: self.response_with_functions(
+                session_id, dialogue, functions=functions
+            )
+        ):
+            yield item
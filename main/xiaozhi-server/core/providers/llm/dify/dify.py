@@ -1,6 +1,6 @@
 import json
 from config.logger import setup_logging
-import requests
+from core.utils.transport import get_transport_registry
 from core.providers.llm.base import LLMProviderBase
 from core.providers.llm.system_prompt import get_system_prompt_for_function
 from core.utils.util import check_model_key
@@ -15,83 +15,113 @@ class LLMProvider(LLMProviderBase):
         self.mode = config.get("mode", "chat-messages")
         self.base_url = config.get("base_url", "https://api.dify.ai/v1").rstrip("/")
         self.session_conversation_map = {}  # 存储session_id和conversation_id的映射
+        self.transport = get_transport_registry()
         model_key_msg = check_model_key("DifyLLM", self.api_key)
         if model_key_msg:
             logger.bind(tag=TAG).error(model_key_msg)
 
+    def _build_request(self, session_id, dialogue):
+        # 取最后一条用户消息
+        last_msg = next(m for m in reversed(dialogue) if m["role"] == "user")
+        conversation_id = self.session_conversation_map.get(session_id)
+
+        # 发起流式请求
+        if self.mode == "chat-messages":
+            request_json = {
+                "query": last_msg["content"],
+                "response_mode": "streaming",
+                "user": session_id,
+                "inputs": {},
+                "conversation_id": conversation_id,
+            }
+        elif self.mode == "workflows/run":
+            request_json = {
+                "inputs": {"query": last_msg["content"]},
+                "response_mode": "streaming",
+                "user": session_id,
+            }
+        elif self.mode == "completion-messages":
+            request_json = {
+                "inputs": {"query": last_msg["content"]},
+                "response_mode": "streaming",
+                "user": session_id,
+            }
+        return request_json, conversation_id
+
+    def _handle_event(self, session_id, line, conversation_id):
+        """解析一行SSE数据，返回 (要输出的文本或None, conversation_id)"""
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.startswith("data: "):
+            return None, conversation_id
+        event = json.loads(line[6:])
+        if self.mode == "chat-messages":
+            # 如果没有找到conversation_id，则获取此次conversation_id
+            if not conversation_id:
+                conversation_id = event.get("conversation_id")
+                self.session_conversation_map[session_id] = (
+                    conversation_id  # 更新映射
+                )
+            # 过滤 message_replace 事件，此事件会全量推一次
+            if event.get("event") != "message_replace" and event.get("answer"):
+                return event["answer"], conversation_id
+        elif self.mode == "workflows/run":
+            if event.get("event") == "workflow_finished":
+                if event["data"]["status"] == "succeeded":
+                    return event["data"]["outputs"]["answer"], conversation_id
+                return "【服务响应异常】", conversation_id
+        elif self.mode == "completion-messages":
+            # 过滤 message_replace 事件，此事件会全量推一次
+            if event.get("event") != "message_replace" and event.get("answer"):
+                return event["answer"], conversation_id
+        return None, conversation_id
+
     def response(self, session_id, dialogue, **kwargs):
         try:
-            # 取最后一条用户消息
-            last_msg = next(m for m in reversed(dialogue) if m["role"] == "user")
-            conversation_id = self.session_conversation_map.get(session_id)
+            request_json, conversation_id = self._build_request(session_id, dialogue)
+            url = f"{self.base_url}/{self.mode}"
+            with self.transport.http_session(url) as session, session.post(
+                url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json=request_json,
+                stream=True,
+            ) as r:
+                for line in r.iter_lines():
+                    answer, conversation_id = self._handle_event(
+                        session_id, line, conversation_id
+                    )
+                    if answer:
+                        yield answer
 
-            # 发起流式请求
-            if self.mode == "chat-messages":
-                request_json = {
-                    "query": last_msg["content"],
-                    "response_mode": "streaming",
-                    "user": session_id,
-                    "inputs": {},
-                    "conversation_id": conversation_id,
-                }
-            elif self.mode == "workflows/run":
-                request_json = {
-                    "inputs": {"query": last_msg["content"]},
-                    "response_mode": "streaming",
-                    "user": session_id,
-                }
-            elif self.mode == "completion-messages":
-                request_json = {
-                    "inputs": {"query": last_msg["content"]},
-                    "response_mode": "streaming",
-                    "user": session_id,
-                }
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in response generation: {e}")
+            yield "【服务响应异常】"
 
-            with requests.post(
-                f"{self.base_url}/{self.mode}",
+    async def response_async(self, session_id, dialogue, **kwargs):
+        try:
+            request_json, conversation_id = self._build_request(session_id, dialogue)
+            url = f"{self.base_url}/{self.mode}"
+            client = self.transport.async_httpx_client(url)
+            # 退出时关闭响应，被打断后不再占用Dify的生成资源
+            async with client.stream(
+                "POST",
+                url,
                 headers={"Authorization": f"Bearer {self.api_key}"},
                 json=request_json,
-                stream=True,
+                timeout=None,
             ) as r:
-                if self.mode == "chat-messages":
-                    for line in r.iter_lines():
-                        if line.startswith(b"data: "):
-                            event = json.loads(line[6:])
-                            # 如果没有找到conversation_id，则获取此次conversation_id
-                            if not conversation_id:
-                                conversation_id = event.get("conversation_id")
-                                self.session_conversation_map[session_id] = (
-                                    conversation_id  # 更新映射
-                                )
-                            # 过滤 message_replace 事件，此事件会全量推一次
-                            if event.get("event") != "message_replace" and event.get(
-                                "answer"
-                            ):
-                                yield event["answer"]
-                elif self.mode == "workflows/run":
-                    for line in r.iter_lines():
-                        if line.startswith(b"data: "):
-                            event = json.loads(line[6:])
-                            if event.get("event") == "workflow_finished":
-                                if event["data"]["status"] == "succeeded":
-                                    yield event["data"]["outputs"]["answer"]
-                                else:
-                                    yield "【服务响应异常】"
-                elif self.mode == "completion-messages":
-                    for line in r.iter_lines():
-                        if line.startswith(b"data: "):
-                            event = json.loads(line[6:])
-                            # 过滤 message_replace 事件，此事件会全量推一次
-                            if event.get("event") != "message_replace" and event.get(
-                                "answer"
-                            ):
-                                yield event["answer"]
+                async for line in r.aiter_lines():
+                    answer, conversation_id = self._handle_event(
+                        session_id, line, conversation_id
+                    )
+                    if answer:
+                        yield answer
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in response generation: {e}")
             yield "【服务响应异常】"
 
-    def response_with_functions(self, session_id, dialogue, functions=None):
+    def _prepare_function_dialogue(self, dialogue, functions):
         if len(dialogue) == 2 and functions is not None and len(functions) > 0:
             # 第一次调用llm， 取最后一条用户消息，附加tool提示词
             last_msg = dialogue[-1]["content"]
@@ -108,5 +138,12 @@ class LLMProvider(LLMProviderBase):
                     break
                 dialogue.pop()
 
+    def response_with_functions(self, session_id, dialogue, functions=None):
+        self._prepare_function_dialogue(dialogue, functions)
         for token in self.response(session_id, dialogue):
             yield token, None
+
+    async def response_with_functions_async(self, session_id, dialogue, functions=None):
+        self._prepare_function_dialogue(dialogue, functions)
+        async for token in self.response_async(session_id, dialogue):
+            yield token, None
@@ -125,7 +125,16 @@ class LLMProvider(LLMProviderBase):
     def response_with_functions(self, session_id, dialogue, functions=None):
         yield from self._generate(dialogue, self._build_tools(functions))
 
-    def _generate(self, dialogue, tools):
+    async def response_async(self, session_id, dialogue, **kwargs):
+        async for item in self._generate_async(dialogue, None):
+            yield item
+
+    async def response_with_functions_async(self, session_id, dialogue, functions=None):
+        async for item in self._generate_async(dialogue, self._build_tools(functions)):
+            yield item
+
+    @staticmethod
+    def _build_contents(dialogue):
         role_map = {"assistant": "model", "user": "user"}
         contents: list = []
         # 拼接对话
@@ -164,7 +173,10 @@ class LLMProvider(LLMProviderBase):
                     "parts": [{"text": str(m.get("content", ""))}],
                 }
             )
+        return contents
 
+    def _generate(self, dialogue, tools):
+        contents = self._build_contents(dialogue)
         stream: GenerateContentResponse = self.model.generate_content(
             contents=contents,
             generation_config=self.gen_cfg,
@@ -179,19 +191,7 @@ class LLMProvider(LLMProviderBase):
                 for part in cand.content.parts:
                     # a) 函数调用-通常是最后一段话才是函数调用
                     if getattr(part, "function_call", None):
-                        fc = part.function_call
-                        yield None, [
-                            SimpleNamespace(
-                                id=uuid.uuid4().hex,
-                                type="function",
-                                function=SimpleNamespace(
-                                    name=fc.name,
-                                    arguments=json.dumps(
-                                        dict(fc.args), ensure_ascii=False
-                                    ),
-                                ),
-                            )
-                        ]
+                        yield None, [self._to_tool_call(part.function_call)]
                         return
                     # b) 普通文本
                     if getattr(part, "text", None):
@@ -201,6 +201,41 @@ class LLMProvider(LLMProviderBase):
             if tools is not None:
                 yield None, None  # function‑mode 结束，返回哑包
 
+    async def _generate_async(self, dialogue, tools):
+        """异步流式生成，所在任务被取消时停止读取，由SDK关闭上游流"""
+        stream = await self.model.generate_content_async(
+            contents=self._build_contents(dialogue),
+            generation_config=self.gen_cfg,
+            tools=tools,
+            stream=True,
+            request_options={"timeout": self.timeout},
+        )
+
+        async for chunk in stream:
+            cand = chunk.candidates[0]
+            for part in cand.content.parts:
+                # a) 函数调用-通常是最后一段话才是函数调用
+                if getattr(part, "function_call", None):
+                    yield None, [self._to_tool_call(part.function_call)]
+                    return
+                # b) 普通文本
+                if getattr(part, "text", None):
+                    yield part.text if tools is None else (part.text, None)
+
+        if tools is not None:
+            yield None, None  # function‑mode 结束，返回哑包
+
+    @staticmethod
+    def _to_tool_call(fc):
+        return SimpleNamespace(
+            id=uuid.uuid4().hex,
+            type="function",
+            function=SimpleNamespace(
+                name=fc.name,
+                arguments=json.dumps(dict(fc.args), ensure_ascii=False),
+            ),
+        )
+
     # 关闭stream，预留后续打断对话功能的功能方法，官方文档推荐打断对话要关闭上一个流，可以有效减少配额计费和资源占用
     @staticmethod
     def _safe_finish_stream(stream: GenerateContentResponse):
@@ -0,0 +1,57 @@
+import time
+import asyncio
+from config.logger import setup_logging
+from core.providers.llm.base import LLMProviderBase
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_REPLY = (
+    "好的，这是一条用于压力测试的模拟回复。"
+    "它会按照固定的速度逐字输出，方便观察首个token和整句的耗时。"
+    "测试结束后请切换回真实的大模型。"
+)
+
+
+class LLMProvider(LLMProviderBase):
+    """
+    本地模拟LLM，按固定节奏流式输出配置的回复，不访问网络
+    first_token_delay_ms 模拟首个token延迟，token_delay_ms 模拟后续每个token的间隔
+    """
+
+    def __init__(self, config):
+        self.reply = config.get("reply") or DEFAULT_REPLY
+        self.first_token_delay = float(config.get("first_token_delay_ms", 300)) / 1000
+        self.token_delay = float(config.get("token_delay_ms", 30)) / 1000
+        # 每个token包含的字符数
+        self.chunk_size = max(1, int(config.get("chunk_size", 2)))
+
+    def _tokens(self):
+        for i in range(0, len(self.reply), self.chunk_size):
+            yield self.reply[i : i + self.chunk_size]
+
+    def _delays(self):
+        delay = self.first_token_delay
+        for token in self._tokens():
+            yield delay, token
+            delay = self.token_delay
+
+    def response(self, session_id, dialogue, **kwargs):
+        for delay, token in self._delays():
+            if delay > 0:
+                time.sleep(delay)
+            yield token
+
+    def response_with_functions(self, session_id, dialogue, functions=None):
+        for token in self.response(session_id, dialogue):
+            yield token, None
+
+    async def response_async(self, session_id, dialogue, **kwargs):
+        for delay, token in self._delays():
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield token
+
+    async def response_with_functions_async(self, session_id, dialogue, functions=None):
+        async for token in self.response_async(session_id, dialogue):
+            yield token, None
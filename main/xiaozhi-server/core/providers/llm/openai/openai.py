@@ -3,6 +3,7 @@ import openai
 from openai.types import CompletionUsage
 from config.logger import setup_logging
 from core.utils.util import check_model_key
+from core.utils.transport import get_transport_registry
 from core.providers.llm.base import LLMProviderBase
 
 TAG = __name__
@@ -45,7 +46,30 @@ class LLMProvider(LLMProviderBase):
         model_key_msg = check_model_key("LLM", self.api_key)
         if model_key_msg:
             logger.bind(tag=TAG).error(model_key_msg)
-        self.client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=httpx.Timeout(self.timeout))
+        # 同一服务端点的所有连接共享keep-alive连接池，首个token不再等待TCP+TLS握手
+        self.transport = get_transport_registry()
+        self.client = openai.OpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=httpx.Timeout(self.timeout),
+            http_client=self.transport.httpx_client(self._endpoint_url()),
+        )
+        self._async_client = None
+
+    def _endpoint_url(self):
+        return self.base_url or "https://api.openai.com/v1"
+
+    def _get_async_client(self):
+        """获取绑定当前事件循环共享连接池的异步客户端"""
+        http_client = self.transport.async_httpx_client(self._endpoint_url())
+        if self._async_client is None or self._async_client._client is not http_client:
+            self._async_client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout),
+                http_client=http_client,
+            )
+        return self._async_client
 
     @staticmethod
     def normalize_dialogue(dialogue):
@@ -57,86 +81,136 @@ class LLMProvider(LLMProviderBase):
 
     def response(self, session_id, dialogue, **kwargs):
         try:
-            dialogue = self.normalize_dialogue(dialogue)
-
-            request_params = {
-                "model": self.model_name,
-                "messages": dialogue,
-                "stream": True,
-            }
-
-            # 添加可选参数,只有当参数不为None时才添加
-            optional_params = {
-                "max_tokens": kwargs.get("max_tokens", self.max_tokens),
-                "temperature": kwargs.get("temperature", self.temperature),
-                "top_p": kwargs.get("top_p", self.top_p),
-                "frequency_penalty": kwargs.get("frequency_penalty", self.frequency_penalty),
-            }
-
-            for key, value in optional_params.items():
-                if value is not None:
-                    request_params[key] = value
-
+            request_params = self._build_request_params(dialogue, kwargs)
             responses = self.client.chat.completions.create(**request_params)
 
             is_active = True
             for chunk in responses:
-                try:
-                    delta = chunk.choices[0].delta if getattr(chunk, "choices", None) else None
-                    content = getattr(delta, "content", "") if delta else ""
-                except IndexError:
-                    content = ""
+                content, is_active = self._filter_think(
+                    self._chunk_content(chunk), is_active
+                )
                 if content:
-                    if "<think>" in content:
-                        is_active = False
-                        content = content.split("<think>")[0]
-                    if "</think>" in content:
-                        is_active = True
-                        content = content.split("</think>")[-1]
-                    if is_active:
-                        yield content
+                    yield content
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in response generation: {e}")
 
     def response_with_functions(self, session_id, dialogue, functions=None, **kwargs):
         try:
-            dialogue = self.normalize_dialogue(dialogue)
-
-            request_params = {
-                "model": self.model_name,
-                "messages": dialogue,
-                "stream": True,
-                "tools": functions,
-            }
-
-            optional_params = {
-                "max_tokens": kwargs.get("max_tokens", self.max_tokens),
-                "temperature": kwargs.get("temperature", self.temperature),
-                "top_p": kwargs.get("top_p", self.top_p),
-                "frequency_penalty": kwargs.get("frequency_penalty", self.frequency_penalty),
-            }
-
-            for key, value in optional_params.items():
-                if value is not None:
-                    request_params[key] = value
-
+            request_params = self._build_request_params(dialogue, kwargs, functions)
             stream = self.client.chat.completions.create(**request_params)
 
             for chunk in stream:
-                if getattr(chunk, "choices", None):
-                    delta = chunk.choices[0].delta
-                    content = getattr(delta, "content", "")
-                    tool_calls = getattr(delta, "tool_calls", None)
-                    yield content, tool_calls
-                elif isinstance(getattr(chunk, "usage", None), CompletionUsage):
-                    usage_info = getattr(chunk, "usage", None)
-                    logger.bind(tag=TAG).info(
-                        f"Token 消耗：输入 {getattr(usage_info, 'prompt_tokens', '未知')}，"
-                        f"输出 {getattr(usage_info, 'completion_tokens', '未知')}，"
-                        f"共计 {getattr(usage_info, 'total_tokens', '未知')}"
-                    )
+                item = self._function_chunk(chunk)
+                if item is not None:
+                    yield item
+
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in function call streaming: {e}")
+            yield f"【OpenAI服务响应异常: {e}】", None
+
+    async def response_async(self, session_id, dialogue, **kwargs):
+        stream = None
+        try:
+            request_params = self._build_request_params(dialogue, kwargs)
+            stream = await self._get_async_client().chat.completions.create(
+                **request_params
+            )
+
+            is_active = True
+            async for chunk in stream:
+                content, is_active = self._filter_think(
+                    self._chunk_content(chunk), is_active
+                )
+                if content:
+                    yield content
+
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error in response generation: {e}")
+        finally:
+            # 被打断时关闭响应，上游随之停止生成
+            if stream is not None:
+                await stream.close()
+
+    async def response_with_functions_async(
+        self, session_id, dialogue, functions=None, **kwargs
+    ):
+        stream = None
+        try:
+            request_params = self._build_request_params(dialogue, kwargs, functions)
+            stream = await self._get_async_client().chat.completions.create(
+                **request_params
+            )
+
+            async for chunk in stream:
+                item = self._function_chunk(chunk)
+                if item is not None:
+                    yield item
 
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error in function call streaming: {e}")
             yield f"【OpenAI服务响应异常: {e}】", None
+        finally:
+            if stream is not None:
+                await stream.close()
+
+    def _build_request_params(self, dialogue, kwargs, functions=None):
+        dialogue = self.normalize_dialogue(dialogue)
+
+        request_params = {
+            "model": self.model_name,
+            "messages": dialogue,
+            "stream": True,
+        }
+        if functions is not None:
+            request_params["tools"] = functions
+
+        # 添加可选参数,只有当参数不为None时才添加
+        optional_params = {
+            "max_tokens": kwargs.get("max_tokens", self.max_tokens),
+            "temperature": kwargs.get("temperature", self.temperature),
+            "top_p": kwargs.get("top_p", self.top_p),
+            "frequency_penalty": kwargs.get("frequency_penalty", self.frequency_penalty),
+        }
+
+        for key, value in optional_params.items():
+            if value is not None:
+                request_params[key] = value
+        return request_params
+
+    @staticmethod
+    def _chunk_content(chunk):
+        try:
+            delta = chunk.choices[0].delta if getattr(chunk, "choices", None) else None
+            return getattr(delta, "content", "") if delta else ""
+        except IndexError:
+            return ""
+
+    @staticmethod
+    def _filter_think(content, is_active):
+        """过滤<think>标签中的内容，返回 (可输出的内容, 是否处于输出状态)"""
+        if not content:
+            return "", is_active
+        if "<think>" in content:
+            is_active = False
+            content = content.split("<think>")[0]
+        if "</think>" in content:
+            is_active = True
+            content = content.split("</think>")[-1]
+        return (content if is_active else ""), is_active
+
+    @staticmethod
+    def _function_chunk(chunk):
+        if getattr(chunk, "choices", None):
+            delta = chunk.choices[0].delta
+            content = getattr(delta, "content", "")
+            tool_calls = getattr(delta, "tool_calls", None)
+            return content, tool_calls
+        if isinstance(getattr(chunk, "usage", None), CompletionUsage):
+            usage_info = getattr(chunk, "usage", None)
+            logger.bind(tag=TAG).info(
+                f"Token 消耗：输入 {getattr(usage_info, 'prompt_tokens', '未知')}，"
+                f"输出 {getattr(usage_info, 'completion_tokens', '未知')}，"
+                f"共计 {getattr(usage_info, 'total_tokens', '未知')}"
+            )
+        return None
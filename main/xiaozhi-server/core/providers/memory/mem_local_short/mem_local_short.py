@@ -2,11 +2,11 @@ from ..base import MemoryProviderBase, logger
 import time
 import json
 import os
-import yaml
 from config.config_loader import get_project_dir
 from config.manage_api_client import generate_and_save_chat_summary
 import asyncio
 from core.utils.util import check_model_key
+from .memory_store import get_memory_store
 
 
 short_term_memory_prompt = """
@@ -101,6 +101,17 @@ class MemoryProvider(MemoryProviderBase):
         self.short_memory = ""
         self.save_to_file = True
         self.memory_path = get_project_dir() + "data/.memory.yaml"
+        # 本地记忆存储：sqlite（默认，每个设备一行）或 yaml（旧版单文件）
+        store_type = config.get("store") or "sqlite"
+        if store_type == "yaml":
+            self.store = get_memory_store("yaml", self.memory_path)
+        else:
+            db_path = config.get("db_path") or "data/memory.db"
+            if not os.path.isabs(db_path):
+                db_path = get_project_dir() + db_path
+            self.store = get_memory_store(
+                store_type, db_path, legacy_yaml_path=self.memory_path
+            )
         self.load_memory(summary_memory)
 
     def init_memory(
@@ -116,21 +127,14 @@ class MemoryProvider(MemoryProviderBase):
             self.short_memory = summary_memory
             return
 
-        all_memory = {}
-        if os.path.exists(self.memory_path):
-            with open(self.memory_path, "r", encoding="utf-8") as f:
-                all_memory = yaml.safe_load(f) or {}
-        if self.role_id in all_memory:
-            self.short_memory = all_memory[self.role_id]
-
-    def save_memory_to_file(self):
-        all_memory = {}
-        if os.path.exists(self.memory_path):
-            with open(self.memory_path, "r", encoding="utf-8") as f:
-                all_memory = yaml.safe_load(f) or {}
-        all_memory[self.role_id] = self.short_memory
-        with open(self.memory_path, "w", encoding="utf-8") as f:
-            yaml.dump(all_memory, f, allow_unicode=True)
+        if self.role_id is None:
+            return
+        memory = self.store.load(self.role_id)
+        if memory is not None:
+            self.short_memory = memory
+
+    async def save_memory_to_file(self):
+        await self.store.save_async(self.role_id, self.short_memory)
 
     async def save_memory(self, msgs, session_id=None):
         # 打印使用的模型信息
@@ -172,7 +176,7 @@ class MemoryProvider(MemoryProviderBase):
             try:
                 json.loads(json_str)  # 检查json格式是否正确
                 self.short_memory = json_str
-                self.save_memory_to_file()
+                await self.save_memory_to_file()
             except Exception as e:
                 print("Error:", e)
         else:
@@ -0,0 +1,195 @@
+"""
+本地短期记忆存储
+- sqlite: 每个设备一行，WAL模式，读写单个设备的记忆与设备总数无关，多个工作进程可以同时读写；
+          首次打开时自动把旧版 .memory.yaml 中的记忆迁移进来
+- yaml:   旧版单文件存储，每次保存都要读写所有设备的记忆，仅为兼容保留
+同一进程内同一路径的存储共享一个实例，异步接口在共享线程池中执行，不阻塞事件循环
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+import yaml
+from config.logger import setup_logging
+from core.utils.shared_executor import get_shared_executor
+
+TAG = __name__
+logger = setup_logging()
+
+
+class MemoryStore(ABC):
+    """按设备（role_id）保存一段记忆文本"""
+
+    @abstractmethod
+    def load(self, role_id: str) -> Optional[str]:
+        """读取设备的记忆，没有时返回None"""
+
+    @abstractmethod
+    def save(self, role_id: str, content: str):
+        """保存设备的记忆"""
+
+    async def load_async(self, role_id: str) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_shared_executor().pool, self.load, role_id
+        )
+
+    async def save_async(self, role_id: str, content: str):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            get_shared_executor().pool, self.save, role_id, content
+        )
+
+
+def _to_text(value) -> str:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+class YamlMemoryStore(MemoryStore):
+    """旧版单文件存储，所有设备的记忆保存在同一个yaml文件中"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read_all(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+
+    def load(self, role_id: str) -> Optional[str]:
+        with self._lock:
+            return _to_text(self._read_all().get(role_id))
+
+    def save(self, role_id: str, content: str):
+        with self._lock:
+            all_memory = self._read_all()
+            all_memory[role_id] = content
+            with open(self.path, "w", encoding="utf-8") as f:
+                yaml.dump(all_memory, f, allow_unicode=True)
+
+
+class SqliteMemoryStore(MemoryStore):
+    """SQLite存储，每个设备一行"""
+
+    def __init__(self, path: str, legacy_yaml_path: str = None):
+        """
+        Args:
+            path: 数据库文件路径
+            legacy_yaml_path: 旧版yaml文件路径，数据库为空时从中迁移记忆
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 单个连接跨线程共用，读写都很短，用锁串行化即可
+        self._conn = sqlite3.connect(
+            path, timeout=10, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS memory ("
+                "role_id TEXT PRIMARY KEY, content TEXT, updated_at REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+        if legacy_yaml_path:
+            self._migrate_yaml(legacy_yaml_path)
+
+    def _migrate_yaml(self, yaml_path: str):
+        """一次性迁移旧版yaml记忆，多个工作进程同时启动时只有一个会执行"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                migrated = self._conn.execute(
+                    "SELECT value FROM meta WHERE key = 'yaml_migrated'"
+                ).fetchone()
+                count = 0
+                if migrated is None and os.path.exists(yaml_path):
+                    with open(yaml_path, "r", encoding="utf-8") as f:
+                        all_memory = yaml.safe_load(f) or {}
+                    now = time.time()
+                    # 数据库中已有的记忆比yaml中的新，不覆盖
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO memory (role_id, content, updated_at) "
+                        "VALUES (?, ?, ?)",
+                        [
+                            (str(role_id), _to_text(content), now)
+                            for role_id, content in all_memory.items()
+                        ],
+                    )
+                    count = len(all_memory)
+                if migrated is None:
+                    self._conn.execute(
+                        "INSERT INTO meta (key, value) VALUES ('yaml_migrated', ?)",
+                        (yaml_path,),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if count:
+            logger.bind(tag=TAG).info(
+                f"已将 {count} 个设备的记忆从 {yaml_path} 迁移到 {self.path}"
+            )
+
+    def load(self, role_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM memory WHERE role_id = ?", (role_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save(self, role_id: str, content: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO memory (role_id, content, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(role_id) DO UPDATE SET "
+                "content = excluded.content, updated_at = excluded.updated_at",
+                (role_id, content, time.time()),
+            )
+
+
+# 按 (存储类型, 路径) 共享的实例
+_stores: Dict[Tuple[str, str], MemoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_memory_store(
+    store_type: str, path: str, legacy_yaml_path: str = None
+) -> MemoryStore:
+    """
+    获取记忆存储（同一路径单例）
+
+    Args:
+        store_type: sqlite 或 yaml
+        path: 存储文件路径
+        legacy_yaml_path: sqlite存储首次打开时迁移的旧版yaml文件路径
+
+    Returns:
+        MemoryStore实例
+    """
+    key = (store_type, os.path.abspath(path))
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                if store_type == "yaml":
+                    store = YamlMemoryStore(path)
+                elif store_type == "sqlite":
+                    store = SqliteMemoryStore(path, legacy_yaml_path)
+                else:
+                    raise ValueError(f"不支持的本地记忆存储类型: {store_type}")
+                _stores[key] = store
+    return store
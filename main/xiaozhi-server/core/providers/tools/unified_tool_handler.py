@@ -1,12 +1,14 @@
 """统一工具处理器"""
 
 import json
+import time
 from typing import Dict, List, Any, Optional
 from config.logger import setup_logging
 from plugins_func.loadplugins import auto_import_modules
 
 from .base import ToolType
 from plugins_func.register import Action, ActionResponse
+from core.utils.metrics import TOOL_CALLS_TOTAL, TOOL_SECONDS
 from .unified_tool_manager import ToolManager
 from .server_plugins import ServerPluginExecutor
 from .server_mcp import ServerMCPExecutor
@@ -167,8 +169,16 @@ class UnifiedToolHandler:
 
             self.logger.debug(f"调用函数: {function_name}, 参数: {arguments}")
 
+            # 函数名由LLM给出，未注册的名称统一记为unknown，避免指标标签无限增长
+            metric_name = function_name if self.has_tool(function_name) else "unknown"
+
             # 执行工具调用
+            start_time = time.monotonic()
             result = await self.tool_manager.execute_tool(function_name, arguments)
+            TOOL_SECONDS.observe(time.monotonic() - start_time, metric_name)
+            TOOL_CALLS_TOTAL.inc(
+                metric_name, result.action.name if result is not None else "NONE"
+            )
             return result
 
         except Exception as e:
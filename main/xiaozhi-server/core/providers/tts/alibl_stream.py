@@ -32,6 +32,8 @@ class TTSProvider(TTSProviderBase):
         self.ws = None
         self._monitor_task = None
         self.last_active_time = None
+        # 上一个会话是否已正常结束，结束后的连接可以归还到连接池
+        self._ws_reusable = False
 
         # 模型和音色配置
         self.model = config.get("model", "cosyvoice-v2")
@@ -75,12 +77,16 @@ class TTSProvider(TTSProviderBase):
                 return self.ws
             logger.bind(tag=TAG).info("开始建立新连接...")
 
-            self.ws = await websockets.connect(
-                self.ws_url,
-                additional_headers=self.header,
-                ping_interval=30,
-                ping_timeout=10,
-                close_timeout=10,
+            self.ws = await self.transport.acquire_websocket(
+                self.transport.websocket_key(self.ws_url, self.header),
+                lambda: websockets.connect(
+                    self.ws_url,
+                    additional_headers=self.header,
+                    ping_interval=30,
+                    ping_timeout=10,
+                    close_timeout=10,
+                ),
+                max_idle=60,
             )
 
             logger.bind(tag=TAG).info("WebSocket连接建立成功")
@@ -226,6 +232,7 @@ class TTSProvider(TTSProviderBase):
             await self._ensure_connection()
 
             # 启动监听任务
+            self._ws_reusable = False
             self._monitor_task = asyncio.create_task(self._start_monitor_tts_response())
 
             # 发送run-task消息启动会话
@@ -299,6 +306,13 @@ class TTSProvider(TTSProviderBase):
 
     async def close(self):
         """清理资源"""
+        # 没有进行中的会话时，连接可以交给其他连接复用
+        reusable = (
+            self._monitor_task is None
+            and self._ws_reusable
+            and self.last_active_time is not None
+            and time.time() - self.last_active_time < 60
+        )
         # 取消监听任务
         if self._monitor_task:
             try:
@@ -310,14 +324,20 @@ class TTSProvider(TTSProviderBase):
                 logger.bind(tag=TAG).warning(f"关闭时取消监听任务错误: {e}")
             self._monitor_task = None
 
-        # 关闭WebSocket连接
+        # 关闭WebSocket连接，会话已正常结束的连接归还到连接池
         if self.ws:
-            try:
-                await self.ws.close()
-            except:
-                pass
+            if reusable:
+                self.transport.release_websocket(
+                    self.transport.websocket_key(self.ws_url, self.header), self.ws
+                )
+            else:
+                try:
+                    await self.ws.close()
+                except:
+                    pass
             self.ws = None
             self.last_active_time = None
+            self._ws_reusable = False
 
     async def _start_monitor_tts_response(self):
         """监听TTS响应"""
@@ -355,6 +375,7 @@ class TTSProvider(TTSProviderBase):
                                 logger.bind(tag=TAG).debug("TTS任务完成~")
                                 self._process_before_stop_play_files()
                                 session_finished = True
+                                self._ws_reusable = True
                                 break
                             elif event == "task-failed":
                                 error_code = data["header"].get("error_code", "unknown")
@@ -3,9 +3,10 @@ import json
 import hmac
 import hashlib
 import base64
-import requests
+import asyncio
 from datetime import datetime
 from core.providers.tts.base import TTSProviderBase
+from core.utils.transport import get_transport_registry
 from config.logger import setup_logging
 import time
 import uuid
@@ -71,7 +72,8 @@ class AccessToken:
         )
         # print('url: %s' % full_url)
         # 提交HTTP GET请求
-        response = requests.get(full_url)
+        with get_transport_registry().http_session(full_url) as session:
+            response = session.get(full_url)
         if response.ok:
             root_obj = response.json()
             key = "Token"
@@ -166,7 +168,7 @@ class TTSProvider(TTSProviderBase):
     async def text_to_speak(self, text, output_file):
         if self._is_token_expired():
             logger.warning("Token已过期，正在自动刷新...")
-            self._refresh_token()
+            await asyncio.get_running_loop().run_in_executor(None, self._refresh_token)
         request_json = {
             "appkey": self.appkey,
             "token": self.token,
@@ -181,13 +183,18 @@ class TTSProvider(TTSProviderBase):
 
         # print(self.api_url, json.dumps(request_json, ensure_ascii=False))
         try:
-            resp = requests.post(
-                self.api_url, json.dumps(request_json), headers=self.header
+            resp = await self.transport.request(
+                "POST", self.api_url, data=json.dumps(request_json), headers=self.header
             )
             if resp.status_code == 401:  # Token过期特殊处理
-                self._refresh_token()
-                resp = requests.post(
-                    self.api_url, json.dumps(request_json), headers=self.header
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._refresh_token
+                )
+                resp = await self.transport.request(
+                    "POST",
+                    self.api_url,
+                    data=json.dumps(request_json),
+                    headers=self.header,
                 )
             # 检查返回请求数据的mime类型是否是audio/***，是则保存到指定路径下；返回的是binary格式的
             if resp.headers["Content-Type"].startswith("audio/"):
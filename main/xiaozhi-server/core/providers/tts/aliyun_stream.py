@@ -16,6 +16,7 @@ from urllib import parse
 from core.providers.tts.base import TTSProviderBase
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
 from core.utils.tts import MarkdownCleaner
+from core.utils.transport import get_transport_registry
 from core.utils import opus_encoder_utils, textUtils
 from config.logger import setup_logging
 
@@ -72,9 +73,8 @@ class AccessToken:
             query_string,
         )
 
-        import requests
-
-        response = requests.get(full_url)
+        with get_transport_registry().http_session(full_url) as session:
+            response = session.get(full_url)
         if response.ok:
             root_obj = response.json()
             key = "Token"
@@ -130,6 +130,8 @@ class TTSProvider(TTSProviderBase):
         self.ws = None
         self._monitor_task = None
         self.last_active_time = None
+        # 上一个会话是否已正常结束，结束后的连接可以归还到连接池
+        self._ws_reusable = False
 
         # 专属tts设置
         self.task_id = uuid.uuid4().hex
@@ -182,7 +184,9 @@ class TTSProvider(TTSProviderBase):
         try:
             if self._is_token_expired():
                 logger.bind(tag=TAG).warning("Token已过期，正在自动刷新...")
-                self._refresh_token()
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._refresh_token
+                )
             current_time = time.time()
             if self.ws and current_time - self.last_active_time < 10:
                 # 10秒内才可以复用链接进行连续对话
@@ -191,12 +195,17 @@ class TTSProvider(TTSProviderBase):
                 return self.ws
             logger.bind(tag=TAG).debug("开始建立新连接...")
 
-            self.ws = await websockets.connect(
-                self.ws_url,
-                additional_headers={"X-NLS-Token": self.token},
-                ping_interval=30,
-                ping_timeout=10,
-                close_timeout=10,
+            headers = {"X-NLS-Token": self.token}
+            self.ws = await self.transport.acquire_websocket(
+                self.transport.websocket_key(self.ws_url, headers),
+                lambda: websockets.connect(
+                    self.ws_url,
+                    additional_headers=headers,
+                    ping_interval=30,
+                    ping_timeout=10,
+                    close_timeout=10,
+                ),
+                max_idle=10,
             )
             self.task_id = uuid.uuid4().hex
             logger.bind(tag=TAG).debug(f"WebSocket连接建立成功, task_id: {self.task_id}")
@@ -330,6 +339,7 @@ class TTSProvider(TTSProviderBase):
             await self._ensure_connection()
 
             # 启动监听任务
+            self._ws_reusable = False
             self._monitor_task = asyncio.create_task(self._start_monitor_tts_response())
 
             start_request = {
@@ -392,6 +402,13 @@ class TTSProvider(TTSProviderBase):
 
     async def close(self):
         """资源清理"""
+        # 没有进行中的会话时，连接可以交给其他连接复用
+        reusable = (
+            self._monitor_task is None
+            and self._ws_reusable
+            and self.last_active_time is not None
+            and time.time() - self.last_active_time < 10
+        )
         if self._monitor_task:
             try:
                 self._monitor_task.cancel()
@@ -402,13 +419,23 @@ class TTSProvider(TTSProviderBase):
                 logger.bind(tag=TAG).warning(f"关闭时取消监听任务错误: {e}")
             self._monitor_task = None
 
+        # 会话已正常结束的连接归还到连接池，其余关闭
         if self.ws:
-            try:
-                await self.ws.close()
-            except:
-                pass
+            if reusable:
+                self.transport.release_websocket(
+                    self.transport.websocket_key(
+                        self.ws_url, {"X-NLS-Token": self.token}
+                    ),
+                    self.ws,
+                )
+            else:
+                try:
+                    await self.ws.close()
+                except:
+                    pass
             self.ws = None
             self.last_active_time = None
+            self._ws_reusable = False
 
     async def _start_monitor_tts_response(self):
         """监听TTS响应"""
@@ -446,6 +473,7 @@ class TTSProvider(TTSProviderBase):
                                 logger.bind(tag=TAG).debug(f"会话结束～～")
                                 self._process_before_stop_play_files()
                                 session_finished = True
+                                self._ws_reusable = True
                                 break
                         except json.JSONDecodeError:
                             logger.bind(tag=TAG).warning("收到无效的JSON消息")
@@ -484,7 +512,9 @@ class TTSProvider(TTSProviderBase):
             async def _generate_audio():
                 # 刷新Token（如果需要）
                 if self._is_token_expired():
-                    self._refresh_token()
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, self._refresh_token
+                    )
 
                 # 建立WebSocket连接
                 ws = await websockets.connect(
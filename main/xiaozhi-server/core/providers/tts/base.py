@@ -1,6 +1,8 @@
 import os
 import re
+import json
 import time
+import hashlib
 import uuid
 import queue
 import asyncio
@@ -16,6 +18,12 @@ from core.utils.tts import MarkdownCleaner
 from core.utils.output_counter import add_device_output
 from core.handle.reportHandle import enqueue_tts_report
 from core.handle.sendAudioHandle import sendAudioMessage
+from core.utils.loop_queue import LoopQueue
+from core.utils import turn_trace
+from core.utils.metrics import TTS_SECONDS, TTS_SENTENCES_TOTAL, provider_name
+from core.utils.transport import get_transport_registry
+from core.utils.tts_phrase_cache import get_tts_phrase_cache
+from core.utils.text_segmenter import StreamingTextSegmenter
 from core.utils.util import audio_bytes_to_data_stream, audio_to_data_stream
 from core.providers.tts.dto.dto import (
     TTSMessageDTO,
@@ -36,11 +44,12 @@ class TTSProviderBase(ABC):
         self.audio_file_type = "wav"
         self.output_file = config.get("output_dir", "tmp/")
         self.tts_text_queue = queue.Queue()
-        self.tts_audio_queue = queue.Queue()
+        # 音频队列由TTS线程写入，在事件循环中消费
+        self.tts_audio_queue = LoopQueue()
+        self.audio_play_priority_task = None
         self.tts_audio_first_sentence = True
         self.before_stop_play_files = []
 
-        self.tts_text_buff = []
         self.punctuations = (
             "。",
             "？",
@@ -66,8 +75,19 @@ class TTSProviderBase(ABC):
             "：",
         )
         self.tts_stop_request = False
-        self.processed_chars = 0
-        self.is_first_sentence = True
+        self.segmenter = StreamingTextSegmenter(
+            self.punctuations, self.first_sentence_punctuations
+        )
+
+        # 进程级HTTP/WebSocket连接池，各供应商复用同一端点的连接
+        self.transport = get_transport_registry()
+
+        # 短语缓存键的一部分：供应商配置变化（音色、语速、模型等）后不会命中旧缓存
+        self.phrase_cache = get_tts_phrase_cache()
+        self.phrase_cache_fingerprint = hashlib.sha1(
+            f"{type(self).__module__}:"
+            f"{json.dumps(config, sort_keys=True, default=str)}".encode("utf-8")
+        ).hexdigest()
 
     def generate_filename(self, extension=".wav"):
         return os.path.join(
@@ -83,7 +103,51 @@ class TTSProviderBase(ABC):
         self.before_stop_play_files.append((file_audio, text))
 
     def to_tts_stream(self, text, opus_handler: Callable[[bytes], None] = None) -> None:
+        turn_trace.mark(self.conn, "tts_start")
         text = MarkdownCleaner.clean_markdown(text)
+        cache_key = self._get_phrase_cache_key(text)
+        if cache_key is None:
+            self._timed_tts_stream(text, opus_handler)
+            return None
+
+        packets = self.phrase_cache.get(cache_key)
+        if packets is not None:
+            logger.bind(tag=TAG).info(f"命中TTS短语缓存: {text}")
+            TTS_SENTENCES_TOTAL.inc(provider_name(self), "cache")
+            self.tts_audio_queue.put((SentenceType.FIRST, None, text))
+            for packet in packets:
+                opus_handler(packet)
+            return None
+
+        recorded = []
+
+        def record_handler(opus_data: bytes):
+            recorded.append(opus_data)
+            opus_handler(opus_data)
+
+        if self._timed_tts_stream(text, record_handler):
+            self.phrase_cache.put(cache_key, recorded)
+        return None
+
+    def _timed_tts_stream(self, text, opus_handler: Callable[[bytes], None] = None) -> bool:
+        """合成语音并记录耗时指标"""
+        start_time = time.monotonic()
+        result = self._to_tts_stream(text, opus_handler)
+        provider = provider_name(self)
+        TTS_SECONDS.observe(time.monotonic() - start_time, provider)
+        TTS_SENTENCES_TOTAL.inc(provider, "synthesis")
+        return result
+
+    def _get_phrase_cache_key(self, text):
+        """生成短语缓存键，不适合缓存时返回None"""
+        if self.conn is None or self.conn.audio_format == "pcm":
+            return None
+        return self.phrase_cache.make_key(
+            self.phrase_cache_fingerprint, getattr(self, "voice", ""), text
+        )
+
+    def _to_tts_stream(self, text, opus_handler: Callable[[bytes], None] = None) -> bool:
+        """合成语音并通过opus_handler推送音频，首次合成即成功时返回True"""
         max_repeat_time = 5
         if self.delete_audio_file:
             # 需要删除文件的直接转为音频数据
@@ -114,7 +178,7 @@ class TTSProviderBase(ABC):
                 logger.bind(tag=TAG).error(
                     f"语音生成失败: {text}，请检查网络或服务是否正常"
                 )
-            return None
+            return max_repeat_time == 5
         else:
             tmp_file = self.generate_filename()
             try:
@@ -140,9 +204,10 @@ class TTSProviderBase(ABC):
                     )
                     self.tts_audio_queue.put((SentenceType.FIRST, None, text))
                 self._process_audio_file_stream(tmp_file, callback=opus_handler)
+                return max_repeat_time == 5
             except Exception as e:
                 logger.bind(tag=TAG).error(f"Failed to generate TTS file: {e}")
-                return None
+                return False
     
     def to_tts(self, text):
         text = MarkdownCleaner.clean_markdown(text)
@@ -258,11 +323,10 @@ class TTSProviderBase(ABC):
         )
         self.tts_priority_thread.start()
 
-        # 音频播放 消化线程
-        self.audio_play_priority_thread = threading.Thread(
-            target=self._audio_play_priority_thread, daemon=True
+        # 音频播放 消化任务（运行在连接的事件循环中）
+        self.audio_play_priority_task = asyncio.create_task(
+            self._audio_play_priority_task()
         )
-        self.audio_play_priority_thread.start()
 
     # 这里默认是非流式的处理方式
     # 流式处理方式请在子类中重写
@@ -278,13 +342,10 @@ class TTSProviderBase(ABC):
                 if message.sentence_type == SentenceType.FIRST:
                     # 初始化参数
                     self.tts_stop_request = False
-                    self.processed_chars = 0
-                    self.tts_text_buff = []
-                    self.is_first_sentence = True
+                    self.segmenter.reset()
                     self.tts_audio_first_sentence = True
                 elif ContentType.TEXT == message.content_type:
-                    self.tts_text_buff.append(message.content_detail)
-                    segment_text = self._get_segment_text()
+                    segment_text = self._get_segment_text(message.content_detail)
                     if segment_text:
                         self.to_tts_stream(segment_text, opus_handler=self.handle_opus)
                 elif ContentType.FILE == message.content_type:
@@ -308,21 +369,14 @@ class TTSProviderBase(ABC):
                 )
                 continue
 
-    def _audio_play_priority_thread(self):
+    async def _audio_play_priority_task(self):
         # 需要上报的文本和音频列表
         enqueue_text = None
         enqueue_audio = None
         while not self.conn.stop_event.is_set():
             text = None
             try:
-                try:
-                    sentence_type, audio_datas, text = self.tts_audio_queue.get(
-                        timeout=0.1
-                    )
-                except queue.Empty:
-                    if self.conn.stop_event.is_set():
-                        break
-                    continue
+                sentence_type, audio_datas, text = await self.tts_audio_queue.get()
 
                 if self.conn.client_abort:
                     logger.bind(tag=TAG).debug("收到打断信号，跳过当前音频数据")
@@ -337,23 +391,24 @@ class TTSProviderBase(ABC):
                     enqueue_audio = []
                     enqueue_text = text
 
+                if audio_datas:
+                    turn_trace.mark(self.conn, "tts_first_audio")
+
                 # 收集上报音频数据
                 if isinstance(audio_datas, bytes) and enqueue_audio is not None:
                     enqueue_audio.append(audio_datas)
 
                 # 发送音频
-                future = asyncio.run_coroutine_threadsafe(
-                    sendAudioMessage(self.conn, sentence_type, audio_datas, text),
-                    self.conn.loop,
-                )
-                future.result()
+                await sendAudioMessage(self.conn, sentence_type, audio_datas, text)
 
                 # 记录输出和报告
                 if self.conn.max_output_size > 0 and text:
                     add_device_output(self.conn.headers.get("device-id"), len(text))
 
+            except asyncio.CancelledError:
+                break
             except Exception as e:
-                logger.bind(tag=TAG).error(f"audio_play_priority_thread: {text} {e}")
+                logger.bind(tag=TAG).error(f"audio_play_priority_task: {text} {e}")
 
     async def start_session(self, session_id):
         pass
@@ -366,41 +421,14 @@ class TTSProviderBase(ABC):
         if hasattr(self, "ws") and self.ws:
             await self.ws.close()
 
-    def _get_segment_text(self):
-        # 合并当前全部文本并处理未分割部分
-        full_text = "".join(self.tts_text_buff)
-        current_text = full_text[self.processed_chars :]  # 从未处理的位置开始
-        last_punct_pos = -1
-
-        # 根据是否是第一句话选择不同的标点符号集合
-        punctuations_to_use = (
-            self.first_sentence_punctuations
-            if self.is_first_sentence
-            else self.punctuations
-        )
-
-        for punct in punctuations_to_use:
-            pos = current_text.rfind(punct)
-            if (pos != -1 and last_punct_pos == -1) or (
-                pos != -1 and pos < last_punct_pos
-            ):
-                last_punct_pos = pos
-
-        if last_punct_pos != -1:
-            segment_text_raw = current_text[: last_punct_pos + 1]
-            segment_text = textUtils.get_string_no_punctuation_or_emoji(
-                segment_text_raw
-            )
-            self.processed_chars += len(segment_text_raw)  # 更新已处理字符位置
-
-            # 如果是第一句话，在找到第一个逗号后，将标志设置为False
-            if self.is_first_sentence:
-                self.is_first_sentence = False
-
-            return segment_text
-        elif self.tts_stop_request and current_text:
-            segment_text = current_text
-            self.is_first_sentence = True  # 重置标志
+    def _get_segment_text(self, text):
+        """追加LLM输出的文本，出现断句标点时返回可以合成的片段"""
+        segment_text_raw = self.segmenter.append(text)
+        if segment_text_raw:
+            return textUtils.get_string_no_punctuation_or_emoji(segment_text_raw)
+        elif self.tts_stop_request and self.segmenter.has_pending():
+            segment_text = self.segmenter.flush()
+            self.segmenter.is_first_sentence = True  # 重置标志
             return segment_text
         else:
             return None
@@ -443,12 +471,10 @@ class TTSProviderBase(ABC):
         Returns:
             bool: 是否成功处理了文本
         """
-        full_text = "".join(self.tts_text_buff)
-        remaining_text = full_text[self.processed_chars :]
+        remaining_text = self.segmenter.flush()
         if remaining_text:
             segment_text = textUtils.get_string_no_punctuation_or_emoji(remaining_text)
             if segment_text:
                 self.to_tts_stream(segment_text, opus_handler=opus_handler)
-                self.processed_chars += len(full_text)
                 return True
         return False
@@ -1,4 +1,3 @@
-import requests
 from core.providers.tts.base import TTSProviderBase
 
 
@@ -29,7 +28,7 @@ class TTSProvider(TTSProviderBase):
         }
 
         try:
-            response = requests.request(
+            response = await self.transport.request(
                 "POST", self.api_url, json=request_json, headers=headers
             )
             data = response.content
@@ -0,0 +1,65 @@
+import io
+import os
+import math
+import wave
+import array
+import asyncio
+from core.providers.tts.base import TTSProviderBase
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+
+
+class TTSProvider(TTSProviderBase):
+    """
+    本地模拟TTS，不访问网络，按文本长度生成固定频率的提示音WAV
+    用于压力测试：音频时长 = 字数 × ms_per_char，合成耗时由 delay_ms 模拟
+    """
+
+    def __init__(self, config, delete_audio_file):
+        super().__init__(config, delete_audio_file)
+        self.voice = config.get("voice", "mock")
+        self.audio_file_type = "wav"
+        self.delay = float(config.get("delay_ms", 200)) / 1000
+        self.ms_per_char = int(config.get("ms_per_char", 200))
+        frequency = int(config.get("frequency", 400))
+        volume = float(config.get("volume", 0.3))
+        # 预先生成1秒的波形，合成时按需截取拼接，避免压测时在Python里逐点计算
+        samples = array.array(
+            "h",
+            (
+                int(32767 * volume * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE))
+                if frequency > 0
+                else 0
+                for i in range(SAMPLE_RATE)
+            ),
+        )
+        self._second = samples.tobytes()
+
+    def _make_pcm(self, text: str) -> bytes:
+        total = max(1, len(text)) * self.ms_per_char * SAMPLE_RATE // 1000 * 2
+        repeat, remainder = divmod(total, len(self._second))
+        return self._second * repeat + self._second[:remainder]
+
+    def _make_wav(self, text: str) -> bytes:
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(SAMPLE_RATE)
+            wav_file.writeframes(self._make_pcm(text))
+        return buffer.getvalue()
+
+    async def text_to_speak(self, text, output_file):
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+        audio_bytes = self._make_wav(text)
+        if output_file:
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            with open(output_file, "wb") as f:
+                f.write(audio_bytes)
+        else:
+            return audio_bytes
@@ -1,4 +1,3 @@
-import requests
 from core.providers.tts.base import TTSProviderBase
 
 
@@ -32,7 +31,7 @@ class TTSProvider(TTSProviderBase):
             "Content-Type": "application/json",
         }
         try:
-            response = requests.request(
+            response = await self.transport.request(
                 "POST", self.api_url, json=request_json, headers=headers
             )
             data = response.content
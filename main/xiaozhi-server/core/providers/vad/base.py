@@ -7,3 +7,19 @@ class VADProviderBase(ABC):
     def is_vad(self, conn, data) -> bool:
         """检测音频数据中的语音活动"""
         pass
+
+    async def is_vad_async(self, conn, data) -> bool:
+        """在事件循环中检测语音活动，默认直接调用同步实现"""
+        return self.is_vad(conn, data)
+
+    def release(self, conn):
+        """释放连接占用的VAD资源"""
+        pass
+
+    def warmup(self):
+        """启动时用合成音频做一次推理，避免第一个连接承担首次推理的额外耗时"""
+        pass
+
+    def close(self):
+        """释放模型、推理线程等共享资源，在没有连接再使用该实例后调用"""
+        pass
@@ -0,0 +1,234 @@
+"""
+Silero VAD 批量推理服务
+汇总所有连接待推理的音频块，在独立工作线程中合并为一次批量前向计算，
+再把每个连接的结果交还给事件循环，避免CPU推理阻塞事件循环
+"""
+
+import time
+import queue
+import asyncio
+import threading
+import concurrent.futures
+from collections import deque
+from typing import Deque, List, Tuple
+
+import numpy as np
+import torch
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+CHUNK_SAMPLES = 512  # 16kHz下模型每次推理的采样点数
+CONTEXT_SAMPLES = 64  # 16kHz下模型使用的上下文采样点数
+
+
+class _InferenceRequest:
+    """单个连接的一次推理请求（可能包含多个连续音频块）"""
+
+    __slots__ = ("stream", "chunks", "future")
+
+    def __init__(self, stream, chunks: List[np.ndarray]):
+        self.stream = stream
+        self.chunks = chunks
+        self.future = concurrent.futures.Future()
+
+
+class SileroBatchInference:
+    """Silero VAD 批量推理服务"""
+
+    def __init__(
+        self, model, stream_pool, max_batch_size: int = 64, max_wait_ms: float = 0
+    ):
+        """
+        Args:
+            model: 已加载的Silero VAD模型（所有连接共享权重）
+            stream_pool: 音频流状态池，释放的音频流由工作线程归还
+            max_batch_size: 单次前向计算最多合并的连接数
+            max_wait_ms: 攒批最长等待时间（毫秒），0 表示只合并已在排队的请求
+        """
+        self.model = model
+        self.stream_pool = stream_pool
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        # 待释放的音频流，由工作线程在批次结束后统一归还，避免与推理中的批次竞争
+        self._released: Deque = deque()
+        self._queue: "queue.Queue[_InferenceRequest]" = queue.Queue()
+        self._stop_event = threading.Event()
+        # 保证停止后不再有请求进入队列，停止前入队的请求由工作线程退出时统一失败
+        self._submit_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._worker, name="silero-vad-batch", daemon=True
+        )
+        self._thread.start()
+
+    async def infer(self, stream, chunks: List[np.ndarray]) -> List[float]:
+        """异步提交推理请求，返回每个音频块的语音概率"""
+        request = self._submit(stream, chunks)
+        return await asyncio.wrap_future(request.future)
+
+    def infer_blocking(self, stream, chunks: List[np.ndarray]) -> List[float]:
+        """同步提交推理请求并等待结果（仅用于非事件循环线程）"""
+        return self._submit(stream, chunks).future.result()
+
+    def release(self, stream):
+        """释放音频流，待在途的推理结束后归还到状态池"""
+        self._released.append(stream)
+
+    def stop(self):
+        """停止工作线程，尚未完成的请求和之后提交的请求都以 RuntimeError 失败"""
+        with self._submit_lock:
+            self._stop_event.set()
+
+    def _submit(self, stream, chunks: List[np.ndarray]) -> _InferenceRequest:
+        request = _InferenceRequest(stream, chunks)
+        if not chunks:
+            request.future.set_result([])
+            return request
+        with self._submit_lock:
+            if not self._stop_event.is_set():
+                self._queue.put(request)
+                return request
+        request.future.set_exception(RuntimeError("VAD已关闭"))
+        return request
+
+    def _worker(self):
+        pending: Deque[_InferenceRequest] = deque()
+        while not self._stop_event.is_set():
+            if not pending:
+                try:
+                    pending.append(self._queue.get(timeout=1))
+                except queue.Empty:
+                    self._recycle_released(pending)
+                    continue
+            self._collect(pending)
+
+            # 同一音频流的请求必须按顺序推理，重复的留到下一批
+            batch: List[_InferenceRequest] = []
+            deferred: Deque[_InferenceRequest] = deque()
+            seen = set()
+            for request in pending:
+                if id(request.stream) in seen or len(batch) >= self.max_batch_size:
+                    deferred.append(request)
+                else:
+                    seen.add(id(request.stream))
+                    batch.append(request)
+            pending = deferred
+
+            # 调用方已取消（如连接断开）的请求不再推理，其余请求标记为执行中后不可再取消
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if batch:
+                try:
+                    results = self._run_batch(batch)
+                except Exception as e:
+                    logger.bind(tag=TAG).error(f"VAD批量推理失败: {e}")
+                    for request in batch:
+                        self._complete(request, error=e)
+                else:
+                    for request, probs in zip(batch, results):
+                        self._complete(request, result=probs)
+            self._recycle_released(pending)
+        self._fail_remaining(pending)
+
+    def _fail_remaining(self, pending: Deque[_InferenceRequest]):
+        """停止后让尚未推理的请求失败，避免调用方一直等待"""
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        error = RuntimeError("VAD已关闭")
+        for request in pending:
+            if request.future.set_running_or_notify_cancel():
+                self._complete(request, error=error)
+        pending.clear()
+
+    @staticmethod
+    def _complete(request: _InferenceRequest, result=None, error=None):
+        """交付推理结果，任何异常都不能让唯一的工作线程退出"""
+        try:
+            if error is not None:
+                request.future.set_exception(error)
+            else:
+                request.future.set_result(result)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"VAD推理结果交付失败: {e}")
+
+    def _collect(self, pending: Deque[_InferenceRequest]):
+        """从队列中收集请求，直到达到批大小或等待超时"""
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            try:
+                if self.max_wait > 0:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    pending.append(self._queue.get(timeout=timeout))
+                else:
+                    pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+    def _run_batch(self, batch: List[_InferenceRequest]) -> List[List[float]]:
+        """按块序号分轮次做批量前向计算，每轮每个音频流最多一个块"""
+        results: List[List[float]] = [[] for _ in batch]
+        rounds = max(len(request.chunks) for request in batch)
+
+        for step in range(rounds):
+            indexes = [i for i, request in enumerate(batch) if len(request.chunks) > step]
+            audio = torch.from_numpy(
+                np.stack([batch[i].chunks[step] for i in indexes])
+            )
+            streams = [batch[i].stream for i in indexes]
+            probs, new_states = self._forward(
+                audio, [(stream.state, stream.context) for stream in streams]
+            )
+            for prob, (state, context), stream, i in zip(
+                probs, new_states, streams, indexes
+            ):
+                results[i].append(prob)
+                stream.state = state
+                stream.context = context
+        return results
+
+    def _recycle_released(self, pending: Deque[_InferenceRequest]):
+        """将已释放且没有排队请求的音频流归还到状态池"""
+        released = len(self._released)
+        if not released:
+            return
+        # 释放前提交的请求可能还在队列中，先全部取出，否则音频流归还并分配给新连接后，
+        # 旧请求会改写新连接的推理状态
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        busy = {id(request.stream) for request in pending}
+        for _ in range(released):
+            stream = self._released.popleft()
+            if id(stream) in busy:
+                self._released.append(stream)
+            else:
+                self.stream_pool.release(stream)
+
+    def _forward(
+        self, audio: torch.Tensor, states: List[Tuple[torch.Tensor, torch.Tensor]]
+    ) -> Tuple[List[float], List[Tuple[torch.Tensor, torch.Tensor]]]:
+        """装载各音频流的循环状态后执行一次批量前向计算"""
+        batch_size = audio.shape[0]
+        self.model._state = torch.cat([state for state, _ in states], dim=1)
+        self.model._context = torch.cat([context for _, context in states], dim=0)
+        self.model._last_sr = SAMPLE_RATE
+        self.model._last_batch_size = batch_size
+
+        with torch.no_grad():
+            out = self.model(audio, SAMPLE_RATE)
+
+        new_state = self.model._state
+        new_context = self.model._context
+        new_states = [
+            (new_state[:, i : i + 1].clone(), new_context[i : i + 1].clone())
+            for i in range(batch_size)
+        ]
+        return out[:, 0].tolist(), new_states
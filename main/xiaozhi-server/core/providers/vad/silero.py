@@ -4,6 +4,8 @@ import torch
 import opuslib_next
 from config.logger import setup_logging
 from core.providers.vad.base import VADProviderBase
+from core.providers.vad.stream_pool import VADStreamPool
+from core.providers.vad.batch_inference import SileroBatchInference, CHUNK_SAMPLES
 
 TAG = __name__
 logger = setup_logging()
@@ -19,12 +21,12 @@ class VADProvider(VADProviderBase):
             force_reload=False,
         )
 
-        self.decoder = opuslib_next.Decoder(16000, 1)
-
         # 处理空字符串的情况
         threshold = config.get("threshold", "0.5")
         threshold_low = config.get("threshold_low", "0.2")
         min_silence_duration_ms = config.get("min_silence_duration_ms", "1000")
+        batch_max_size = config.get("batch_max_size", "64")
+        batch_max_wait_ms = config.get("batch_max_wait_ms", "0")
 
         self.vad_threshold = float(threshold) if threshold else 0.5
         self.vad_threshold_low = float(threshold_low) if threshold_low else 0.2
@@ -36,66 +38,126 @@ class VADProvider(VADProviderBase):
         # 至少要多少帧才算有语音
         self.frame_window_threshold = 3
 
+        # 模型权重所有连接共享，解码器与循环状态每个连接独立，从池中按需分配
+        self.stream_pool = VADStreamPool()
+
+        # 所有连接共享的批量推理服务，推理在独立线程中进行，不阻塞事件循环
+        self.inference = SileroBatchInference(
+            self.model,
+            self.stream_pool,
+            max_batch_size=int(batch_max_size) if batch_max_size else 64,
+            max_wait_ms=float(batch_max_wait_ms) if batch_max_wait_ms else 0,
+        )
+
     def __del__(self):
-        if hasattr(self, 'decoder') and self.decoder is not None:
-            try:
-                del self.decoder
-            except Exception:
-                pass
+        self.close()
+
+    def close(self):
+        """停止批量推理工作线程"""
+        if getattr(self, "inference", None) is not None:
+            self.inference.stop()
 
     def is_vad(self, conn, opus_packet):
         # 手动模式：直接返回True，不进行实时VAD检测，所有音频都缓存
         if conn.client_listen_mode == "manual":
             return True
-            
+
+        try:
+            stream = self._get_stream(conn)
+            chunks = self._split_chunks(conn, stream, opus_packet)
+            speech_probs = self.inference.infer_blocking(stream, chunks)
+            return self._update_voice_state(conn, speech_probs)
+        except opuslib_next.OpusError as e:
+            logger.bind(tag=TAG).info(f"解码错误: {e}")
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
+
+    async def is_vad_async(self, conn, opus_packet):
+        # 手动模式：直接返回True，不进行实时VAD检测，所有音频都缓存
+        if conn.client_listen_mode == "manual":
+            return True
+
         try:
-            pcm_frame = self.decoder.decode(opus_packet, 960)
-            conn.client_audio_buffer.extend(pcm_frame)  # 将新数据加入缓冲区
-
-            # 处理缓冲区中的完整帧（每次处理512采样点）
-            client_have_voice = False
-            while len(conn.client_audio_buffer) >= 512 * 2:
-                # 提取前512个采样点（1024字节）
-                chunk = conn.client_audio_buffer[: 512 * 2]
-                conn.client_audio_buffer = conn.client_audio_buffer[512 * 2 :]
-
-                # 转换为模型需要的张量格式
-                audio_int16 = np.frombuffer(chunk, dtype=np.int16)
-                audio_float32 = audio_int16.astype(np.float32) / 32768.0
-                audio_tensor = torch.from_numpy(audio_float32)
-
-                # 检测语音活动
-                with torch.no_grad():
-                    speech_prob = self.model(audio_tensor, 16000).item()
-
-                # 双阈值判断
-                if speech_prob >= self.vad_threshold:
-                    is_voice = True
-                elif speech_prob <= self.vad_threshold_low:
-                    is_voice = False
-                else:
-                    is_voice = conn.last_is_voice
-
-                # 声音没低于最低值则延续前一个状态，判断为有声音
-                conn.last_is_voice = is_voice
-
-                # 更新滑动窗口
-                conn.client_voice_window.append(is_voice)
-                client_have_voice = (
-                    conn.client_voice_window.count(True) >= self.frame_window_threshold
-                )
-
-                # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
-                if conn.client_have_voice and not client_have_voice:
-                    stop_duration = time.time() * 1000 - conn.last_activity_time
-                    if stop_duration >= self.silence_threshold_ms:
-                        conn.client_voice_stop = True
-                if client_have_voice:
-                    conn.client_have_voice = True
-                    conn.last_activity_time = time.time() * 1000
-
-            return client_have_voice
+            stream = self._get_stream(conn)
+            chunks = self._split_chunks(conn, stream, opus_packet)
+            # 交给批量推理服务，与其他连接的音频块合并推理
+            speech_probs = await self.inference.infer(stream, chunks)
+            return self._update_voice_state(conn, speech_probs)
         except opuslib_next.OpusError as e:
             logger.bind(tag=TAG).info(f"解码错误: {e}")
         except Exception as e:
             logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
+
+    def warmup(self):
+        # 用低音量噪声走一遍批量推理服务，提前完成torch的首次推理初始化
+        stream = self.stream_pool.acquire()
+        try:
+            rng = np.random.default_rng(0)
+            chunks = [
+                (rng.standard_normal(CHUNK_SAMPLES) * 0.01).astype(np.float32)
+                for _ in range(8)
+            ]
+            self.inference.infer_blocking(stream, chunks)
+        finally:
+            self.inference.release(stream)
+
+    def release(self, conn):
+        stream = conn.vad_stream
+        if stream is None:
+            return
+        conn.vad_stream = None
+        self.inference.release(stream)
+
+    def _get_stream(self, conn):
+        """获取连接专属的音频流状态，首次使用时从池中分配"""
+        if conn.vad_stream is None:
+            conn.vad_stream = self.stream_pool.acquire()
+        return conn.vad_stream
+
+    def _split_chunks(self, conn, stream, opus_packet):
+        """解码音频包，并从缓冲区中切出完整的推理块（每块512采样点）"""
+        pcm_frame = stream.decoder.decode(opus_packet, 960)
+        conn.client_audio_buffer.extend(pcm_frame)  # 将新数据加入缓冲区
+
+        chunks = []
+        while len(conn.client_audio_buffer) >= CHUNK_SAMPLES * 2:
+            # 提取前512个采样点（1024字节）
+            chunk = conn.client_audio_buffer[: CHUNK_SAMPLES * 2]
+            conn.client_audio_buffer = conn.client_audio_buffer[CHUNK_SAMPLES * 2 :]
+
+            # 转换为模型需要的格式
+            audio_int16 = np.frombuffer(chunk, dtype=np.int16)
+            chunks.append(audio_int16.astype(np.float32) / 32768.0)
+        return chunks
+
+    def _update_voice_state(self, conn, speech_probs):
+        """根据每个音频块的语音概率更新连接的VAD状态"""
+        client_have_voice = False
+        for speech_prob in speech_probs:
+            # 双阈值判断
+            if speech_prob >= self.vad_threshold:
+                is_voice = True
+            elif speech_prob <= self.vad_threshold_low:
+                is_voice = False
+            else:
+                is_voice = conn.last_is_voice
+
+            # 声音没低于最低值则延续前一个状态，判断为有声音
+            conn.last_is_voice = is_voice
+
+            # 更新滑动窗口
+            conn.client_voice_window.append(is_voice)
+            client_have_voice = (
+                conn.client_voice_window.count(True) >= self.frame_window_threshold
+            )
+
+            # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
+            if conn.client_have_voice and not client_have_voice:
+                stop_duration = time.time() * 1000 - conn.last_activity_time
+                if stop_duration >= self.silence_threshold_ms:
+                    conn.client_voice_stop = True
+            if client_have_voice:
+                conn.client_have_voice = True
+                conn.last_activity_time = time.time() * 1000
+
+        return client_have_voice
@@ -0,0 +1,69 @@
+"""
+VAD 音频流状态池
+模型权重由所有连接共享，而Opus解码器与模型循环状态属于每个连接，
+按需分配，连接结束后重置并回收复用
+"""
+
+import threading
+from typing import List
+
+import torch
+import opuslib_next
+from config.logger import setup_logging
+from core.providers.vad.batch_inference import SAMPLE_RATE, CONTEXT_SAMPLES
+
+TAG = __name__
+logger = setup_logging()
+
+
+class VADStream:
+    """单个连接的VAD状态：独立的Opus解码器与模型循环状态"""
+
+    __slots__ = ("decoder", "state", "context")
+
+    def __init__(self):
+        self.decoder = opuslib_next.Decoder(SAMPLE_RATE, 1)
+        self.state = None
+        self.context = None
+        self.reset()
+
+    def reset(self):
+        """重置解码器与模型循环状态，便于回收给其他连接使用"""
+        self.state = torch.zeros(2, 1, 128)
+        self.context = torch.zeros(1, CONTEXT_SAMPLES)
+        try:
+            self.decoder.reset_state()
+        except Exception:
+            # 解码器不支持重置时直接重建
+            self.decoder = opuslib_next.Decoder(SAMPLE_RATE, 1)
+
+
+class VADStreamPool:
+    """VAD音频流状态池"""
+
+    def __init__(self, max_idle: int = 256):
+        """
+        Args:
+            max_idle: 池中最多保留的空闲音频流数量
+        """
+        self.max_idle = max_idle
+        self._idle: List[VADStream] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> VADStream:
+        """获取一个空闲音频流，池为空时新建"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return VADStream()
+
+    def release(self, stream: VADStream):
+        """重置音频流并归还到池中"""
+        try:
+            stream.reset()
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"重置VAD音频流失败，直接丢弃: {e}")
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(stream)
@@ -2,6 +2,7 @@ import time
 import asyncio
 from collections import deque
 from config.logger import setup_logging
+from core.utils.audio_send_scheduler import get_audio_send_scheduler
 
 TAG = __name__
 logger = setup_logging()
@@ -10,7 +11,7 @@ logger = setup_logging()
 class AudioRateController:
     """
     音频速率控制器 - 按照60ms帧时长精确控制音频发送
-    解决高并发下的时间累积误差问题
+    解决高并发下的时间累积误差问题，发送时机由全局调度器统一驱动
     """
 
     def __init__(self, frame_duration=60):
@@ -23,6 +24,14 @@ class AudioRateController:
         self.play_position = 0  # 虚拟播放位置（毫秒）
         self.start_timestamp = None  # 开始时间戳（只读，不修改）
         self.pending_send_task = None
+        self.send_audio_callback = None
+        self.scheduler = get_audio_send_scheduler()
+        self._scheduled_due = None  # 由调度器维护的下一次发送时间
+        # 长期运行的发送任务，调度器到期时通过事件唤醒，不再为每次发送创建任务
+        self._sender_task = None
+        self._dispatch_event = asyncio.Event()
+        self._horizon = None
+        self._sending = False  # 发送任务正在发送到期数据
         self.logger = logger
         self.queue_empty_event = asyncio.Event()  # 队列清空事件
         self.queue_empty_event.set()  # 初始为空状态
@@ -30,9 +39,8 @@ class AudioRateController:
 
     def reset(self):
         """重置控制器状态"""
-        if self.pending_send_task and not self.pending_send_task.done():
-            self.pending_send_task.cancel()
-            # 取消任务后，任务会在下次事件循环时清理，无需阻塞等待
+        # 取消任务后，任务会在下次事件循环时清理，无需阻塞等待
+        self.stop_sending()
 
         self.queue.clear()
         self.play_position = 0
@@ -47,6 +55,7 @@ class AudioRateController:
         # 相关事件处理
         self.queue_empty_event.clear()
         self.queue_has_data_event.set()
+        self._wake()
 
     def add_message(self, message_callback):
         """
@@ -59,6 +68,7 @@ class AudioRateController:
         # 相关事件处理
         self.queue_empty_event.clear()
         self.queue_has_data_event.set()
+        self._wake()
 
     def _get_elapsed_ms(self):
         """获取已经过的时间（毫秒）"""
@@ -66,95 +76,113 @@ class AudioRateController:
             return 0
         return (time.monotonic() - self.start_timestamp) * 1000
 
-    async def check_queue(self, send_audio_callback):
+    def _next_due(self):
+        """队首数据的发送时间（time.monotonic时间），队列为空时返回None"""
+        if not self.queue:
+            return None
+        item_type = self.queue[0][0]
+        if item_type == "message" or self.start_timestamp is None:
+            return time.monotonic()
+        return self.start_timestamp + self.play_position / 1000
+
+    def _wake(self):
+        """有新数据时向全局调度器登记下一次发送时间"""
+        if self.send_audio_callback is None or self._sending:
+            return
+        due = self._next_due()
+        if due is not None:
+            self.scheduler.schedule(self, due)
+
+    def _dispatch(self, horizon):
+        """由全局调度器在到期时调用，唤醒发送任务"""
+        if self.send_audio_callback is None or self._sending:
+            return
+        self._horizon = horizon
+        self._sending = True
+        self._dispatch_event.set()
+
+    async def _send_loop(self):
+        """发送任务：每次被调度器唤醒后发送已到期的音频/消息"""
+        while True:
+            await self._dispatch_event.wait()
+            self._dispatch_event.clear()
+            if self.send_audio_callback is None:
+                self._sending = False
+                continue
+            await self.check_queue(self.send_audio_callback, self._horizon)
+
+    async def check_queue(self, send_audio_callback, horizon=None):
         """
-        检查队列并按时发送音频/消息
+        发送队列中所有已到期的音频/消息，之后向调度器登记下一次发送时间
 
         Args:
             send_audio_callback: 发送音频的回调函数 async def(opus_packet)
+            horizon: 本次可发送的截止时间（time.monotonic时间），默认为当前时间
         """
-        while self.queue:
-            item = self.queue[0]
-            item_type = item[0]
-
-            if item_type == "message":
-                # 消息类型：立即发送，不占用播放时间
-                _, message_callback = item
-                self.queue.popleft()
-                try:
+        if horizon is None:
+            horizon = time.monotonic()
+        try:
+            while self.queue:
+                item = self.queue[0]
+                item_type = item[0]
+
+                if item_type == "message":
+                    # 消息类型：立即发送，不占用播放时间
+                    _, message_callback = item
+                    self.queue.popleft()
                     await message_callback()
-                except Exception as e:
-                    self.logger.bind(tag=TAG).error(f"发送消息失败: {e}")
-                    raise
-
-            elif item_type == "audio":
-                if self.start_timestamp is None:
-                    self.start_timestamp = time.monotonic()
-
-                _, opus_packet = item
-
-                # 循环等待直到时间到达
-                while True:
-                    # 计算时间差
-                    elapsed_ms = self._get_elapsed_ms()
-                    output_ms = self.play_position
-
-                    if elapsed_ms < output_ms:
-                        # 还不到发送时间，计算等待时长
-                        wait_ms = output_ms - elapsed_ms
-
-                        # 等待后继续检查（允许被中断）
-                        try:
-                            await asyncio.sleep(wait_ms / 1000)
-                        except asyncio.CancelledError:
-                            self.logger.bind(tag=TAG).debug("音频发送任务被取消")
-                            raise
-                        # 等待结束后重新检查时间（循环回到 while True）
-                    else:
-                        # 时间已到，跳出等待循环
+
+                elif item_type == "audio":
+                    if self.start_timestamp is None:
+                        self.start_timestamp = time.monotonic()
+
+                    # 还不到发送时间，交给调度器在到期时再发送
+                    if self.start_timestamp + self.play_position / 1000 > horizon:
                         break
 
-                # 时间已到，从队列移除并发送
-                self.queue.popleft()
-                self.play_position += self.frame_duration
-                try:
+                    _, opus_packet = item
+                    self.queue.popleft()
+                    self.play_position += self.frame_duration
                     await send_audio_callback(opus_packet)
-                except Exception as e:
-                    self.logger.bind(tag=TAG).error(f"发送音频失败: {e}")
-                    raise
-
-        # 队列处理完后清除事件
-        self.queue_empty_event.set()
-        self.queue_has_data_event.clear()
+        except asyncio.CancelledError:
+            self.logger.bind(tag=TAG).debug("音频发送任务被取消")
+            self.send_audio_callback = None
+            raise
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"音频发送异常: {e}")
+            self.send_audio_callback = None
+            return
+        finally:
+            self._sending = False
+
+        if self.queue:
+            self._wake()
+        else:
+            # 队列处理完后清除事件
+            self.queue_empty_event.set()
+            self.queue_has_data_event.clear()
 
     def start_sending(self, send_audio_callback):
         """
-        启动异步发送任务
+        开始发送：由全局调度器按到期时间唤醒本连接的发送任务，发送任务自身不做定时
 
         Args:
             send_audio_callback: 发送音频的回调函数
-
-        Returns:
-            asyncio.Task: 发送任务
         """
-
-        async def _send_loop():
-            try:
-                while True:
-                    # 等待队列数据事件，不轮询等待占用CPU
-                    await self.queue_has_data_event.wait()
-
-                    await self.check_queue(send_audio_callback)
-            except asyncio.CancelledError:
-                self.logger.bind(tag=TAG).debug("音频发送循环已停止")
-            except Exception as e:
-                self.logger.bind(tag=TAG).error(f"音频发送循环异常: {e}")
-
-        self.pending_send_task = asyncio.create_task(_send_loop())
-        return self.pending_send_task
+        self.send_audio_callback = send_audio_callback
+        if self._sender_task is None or self._sender_task.done():
+            self._sender_task = asyncio.create_task(self._send_loop())
+            self.pending_send_task = self._sender_task
+        self._wake()
 
     def stop_sending(self):
         """停止发送任务"""
-        if self.pending_send_task and not self.pending_send_task.done():
-            self.pending_send_task.cancel()
+        self.send_audio_callback = None
+        self.scheduler.cancel(self)
+        if self._sender_task and not self._sender_task.done():
+            self._sender_task.cancel()
             self.logger.bind(tag=TAG).debug("已取消音频发送任务")
+        self._sender_task = None
+        self.pending_send_task = None
+        self._sending = False
+        self._dispatch_event.clear()
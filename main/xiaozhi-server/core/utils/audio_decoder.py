@@ -0,0 +1,160 @@
+"""
+进程内音频解码
+将TTS返回的音频和本地音频文件解码为16kHz/单声道/16位PCM：
+WAV和裸PCM直接解析，MP3/OGG/Opus/FLAC等通过torchaudio在进程内解码，
+只有以上方式都无法处理的格式才回退到pydub（会启动ffmpeg子进程）
+"""
+
+import io
+import os
+import wave
+import threading
+import numpy as np
+from typing import Union
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+TARGET_SAMPLE_RATE = 16000
+
+# 可以交给torchaudio在进程内解码的格式
+IN_PROCESS_FORMATS = {"mp3", "ogg", "opus", "flac", "m4a", "aac", "webm"}
+
+_fallback_warned = set()
+_fallback_lock = threading.Lock()
+
+
+def decode_to_pcm(
+    source: Union[str, bytes],
+    file_type: str = None,
+    sample_rate: int = TARGET_SAMPLE_RATE,
+) -> bytes:
+    """
+    将音频文件或音频二进制数据解码为16kHz/单声道/16位小端PCM
+
+    Args:
+        source: 音频文件路径或音频二进制数据
+        file_type: 音频格式（wav、mp3、pcm等），为空时从文件后缀名推断
+        sample_rate: 仅对裸PCM数据有效，表示其采样率
+    """
+    if not file_type and isinstance(source, str):
+        file_type = os.path.splitext(source)[1].lstrip(".")
+    file_type = (file_type or "").lower()
+
+    if file_type == "pcm":
+        data = _read_bytes(source)
+        samples = np.frombuffer(data[: len(data) // 2 * 2], dtype=np.int16)
+        return _resample(samples, sample_rate).tobytes()
+
+    if file_type == "wav":
+        try:
+            return _decode_wav(source)
+        except (wave.Error, EOFError, ValueError):
+            # 浮点WAV、压缩编码WAV等wave模块不支持，交给其他解码器
+            pass
+
+    if file_type in IN_PROCESS_FORMATS or file_type == "wav":
+        try:
+            return _decode_with_torchaudio(source, file_type)
+        except Exception as e:
+            _warn_fallback(file_type, e)
+
+    return _decode_with_ffmpeg(source, file_type)
+
+
+def _read_bytes(source: Union[str, bytes]) -> bytes:
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    return bytes(source)
+
+
+def _decode_wav(source: Union[str, bytes]) -> bytes:
+    """直接解析PCM编码的WAV"""
+    fileobj = source if isinstance(source, str) else io.BytesIO(source)
+    with wave.open(fileobj, "rb") as wf:
+        channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        frame_rate = wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+
+    if sample_width == 2:
+        samples = np.frombuffer(frames, dtype=np.int16)
+    elif sample_width == 1:
+        # 8位WAV为无符号数
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif sample_width == 4:
+        samples = (np.frombuffer(frames, dtype=np.int32) >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"不支持的WAV采样位宽: {sample_width}")
+
+    if channels > 1:
+        samples = (
+            samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+        )
+    return _resample(samples, frame_rate).tobytes()
+
+
+def _decode_with_torchaudio(source: Union[str, bytes], file_type: str) -> bytes:
+    """通过torchaudio在进程内解码压缩格式"""
+    import torch
+    import torchaudio
+
+    fileobj = source if isinstance(source, str) else io.BytesIO(source)
+    waveform, frame_rate = torchaudio.load(fileobj, format=file_type or None)
+    if waveform.shape[0] > 1:
+        waveform = waveform.mean(dim=0, keepdim=True)
+    if frame_rate != TARGET_SAMPLE_RATE:
+        waveform = torchaudio.functional.resample(
+            waveform, frame_rate, TARGET_SAMPLE_RATE
+        )
+    samples = (waveform[0].clamp(-1.0, 1.0) * 32767).to(torch.int16)
+    return samples.numpy().tobytes()
+
+
+def _decode_with_ffmpeg(source: Union[str, bytes], file_type: str) -> bytes:
+    """回退方案：通过pydub调用ffmpeg解码"""
+    from pydub import AudioSegment
+
+    fileobj = source if isinstance(source, str) else io.BytesIO(source)
+    # -nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
+    audio = AudioSegment.from_file(
+        fileobj, format=file_type or None, parameters=["-nostdin"]
+    )
+    # 转换为单声道/16kHz采样率/16位小端编码（确保与编码器匹配）
+    audio = audio.set_channels(1).set_frame_rate(TARGET_SAMPLE_RATE).set_sample_width(2)
+    return audio.raw_data
+
+
+def _resample(samples: np.ndarray, frame_rate: int) -> np.ndarray:
+    """将16位PCM重采样到16kHz"""
+    if frame_rate == TARGET_SAMPLE_RATE or len(samples) == 0:
+        return samples
+    try:
+        import torch
+        import torchaudio
+
+        waveform = torch.from_numpy(samples.astype(np.float32) / 32768.0)
+        resampled = torchaudio.functional.resample(
+            waveform, frame_rate, TARGET_SAMPLE_RATE
+        )
+        return (resampled.clamp(-1.0, 1.0) * 32767).to(torch.int16).numpy()
+    except ImportError:
+        # 没有torchaudio时退化为线性插值
+        target_len = int(len(samples) * TARGET_SAMPLE_RATE / frame_rate)
+        positions = np.linspace(0, len(samples) - 1, target_len)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(
+            np.int16
+        )
+
+
+def _warn_fallback(file_type: str, error: Exception):
+    """同一格式只提示一次回退到ffmpeg"""
+    with _fallback_lock:
+        if file_type in _fallback_warned:
+            return
+        _fallback_warned.add(file_type)
+    logger.bind(tag=TAG).warning(
+        f"进程内解码{file_type}失败，回退到ffmpeg（每段音频会启动一个子进程）: {error}"
+    )
@@ -0,0 +1,136 @@
+"""
+全局音频发送调度器
+所有连接的音频流控器共用一个按到期时间排序的定时器堆，每个tick只唤醒一次事件循环，
+把到期（含tick窗口内即将到期）的连接合并处理，连接数增加时定时器唤醒次数不再随之线性增长
+"""
+
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from typing import List, Optional, Tuple
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class AudioSendScheduler:
+    """全局音频发送调度器"""
+
+    def __init__(self, tick_ms: float = 10):
+        """
+        Args:
+            tick_ms: 调度粒度（毫秒），到期时间落在同一tick内的音频包合并发送，
+                     音频包最多提前tick_ms发送
+        """
+        self.tick = max(0.0, float(tick_ms)) / 1000
+        self._heap: List[Tuple[float, int, object]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_due: Optional[float] = None
+        # 统计信息，用于观察调度抖动
+        self.ticks = 0
+        self.dispatched = 0
+        self.max_lateness_ms = 0.0
+        self._total_lateness_ms = 0.0
+
+    def schedule(self, controller, due: float):
+        """安排流控器在due（time.monotonic时间）时发送
+
+        同一流控器只保留最早的一次安排，更晚的安排会被忽略
+        """
+        current = controller._scheduled_due
+        if current is not None and current <= due:
+            return
+        controller._scheduled_due = due
+        heapq.heappush(self._heap, (due, next(self._seq), controller))
+        self._arm()
+
+    def cancel(self, controller):
+        """取消流控器的安排，堆中的旧条目在出堆时被跳过"""
+        controller._scheduled_due = None
+
+    def stats(self) -> dict:
+        """调度统计信息"""
+        return {
+            "pending": len(self._heap),
+            "ticks": self.ticks,
+            "dispatched": self.dispatched,
+            "max_lateness_ms": round(self.max_lateness_ms, 3),
+            "avg_lateness_ms": round(
+                self._total_lateness_ms / self.dispatched, 3
+            )
+            if self.dispatched
+            else 0.0,
+        }
+
+    def _arm(self):
+        """按堆顶的到期时间设置唯一的定时器"""
+        if not self._heap:
+            return
+        due = self._heap[0][0]
+        if self._timer is not None:
+            if self._timer_due <= due:
+                return
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        # time.monotonic 与事件循环时钟不一定相同，换算为相对延迟
+        delay = max(0.0, due - time.monotonic())
+        self._timer = loop.call_later(delay, self._on_tick)
+        self._timer_due = due
+
+    def _on_tick(self):
+        self._timer = None
+        self._timer_due = None
+        self.ticks += 1
+        now = time.monotonic()
+        horizon = now + self.tick
+        while self._heap and self._heap[0][0] <= horizon:
+            due, _, controller = heapq.heappop(self._heap)
+            if controller._scheduled_due != due:
+                # 已取消或已被更早的安排取代
+                continue
+            controller._scheduled_due = None
+            lateness_ms = max(0.0, now - due) * 1000
+            self.dispatched += 1
+            self._total_lateness_ms += lateness_ms
+            if lateness_ms > self.max_lateness_ms:
+                self.max_lateness_ms = lateness_ms
+            try:
+                controller._dispatch(horizon)
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"音频发送调度失败: {e}")
+        self._arm()
+
+
+# 全局单例
+_scheduler_instance = None
+_scheduler_lock = threading.Lock()
+
+
+def configure_audio_send_scheduler(config: dict) -> AudioSendScheduler:
+    """按启动时已加载的配置创建全局音频发送调度器，由 app.main 调用"""
+    global _scheduler_instance
+    with _scheduler_lock:
+        _scheduler_instance = AudioSendScheduler(
+            tick_ms=config.get("tts_audio_send_tick_ms", 10)
+        )
+    return _scheduler_instance
+
+
+def get_audio_send_scheduler() -> AudioSendScheduler:
+    """
+    获取全局音频发送调度器（单例模式），调度粒度由 configure_audio_send_scheduler
+    按 tts_audio_send_tick_ms 设置，未设置时使用默认值
+
+    Returns:
+        AudioSendScheduler实例
+    """
+    global _scheduler_instance
+    if _scheduler_instance is None:
+        with _scheduler_lock:
+            if _scheduler_instance is None:
+                _scheduler_instance = AudioSendScheduler()
+    return _scheduler_instance
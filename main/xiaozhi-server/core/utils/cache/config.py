@@ -29,6 +29,7 @@ class CacheConfig:
     strategy: CacheStrategy = CacheStrategy.TTL
     ttl: Optional[float] = 300  # 默认5分钟
     max_size: Optional[int] = 1000  # 默认最大1000条
+    max_bytes: Optional[int] = None  # 估算占用字节上限，None表示只按条数限制
     cleanup_interval: float = 60  # 清理间隔（秒）
 
     @classmethod
@@ -42,25 +43,38 @@ class CacheConfig:
                 strategy=CacheStrategy.TTL, ttl=86400, max_size=1000  # 24小时
             ),
             CacheType.WEATHER: cls(
-                strategy=CacheStrategy.TTL, ttl=28800, max_size=1000  # 8小时
+                strategy=CacheStrategy.TTL,
+                ttl=28800,  # 8小时
+                max_size=1000,
+                max_bytes=8 * 1024 * 1024,
             ),
             CacheType.LUNAR: cls(
                 strategy=CacheStrategy.TTL, ttl=2592000, max_size=365  # 30天过期
             ),
             CacheType.INTENT: cls(
-                strategy=CacheStrategy.TTL_LRU, ttl=600, max_size=1000  # 10分钟
+                strategy=CacheStrategy.TTL_LRU,
+                ttl=600,  # 10分钟
+                max_size=1000,
+                max_bytes=4 * 1024 * 1024,
             ),
             CacheType.CONFIG: cls(
                 strategy=CacheStrategy.FIXED_SIZE, ttl=None, max_size=20  # 手动失效
             ),
             CacheType.DEVICE_PROMPT: cls(
-                strategy=CacheStrategy.TTL, ttl=None, max_size=1000  # 手动失效
+                strategy=CacheStrategy.TTL,
+                ttl=None,  # 手动失效
+                max_size=1000,
+                max_bytes=16 * 1024 * 1024,
             ),
             CacheType.VOICEPRINT_HEALTH: cls(
                 strategy=CacheStrategy.TTL, ttl=600, max_size=100  # 10分钟过期
             ),
             CacheType.AUDIO_DATA: cls(
-                strategy=CacheStrategy.TTL, ttl=600, max_size=100  # 10分钟过期
+                # 解码后的音频帧大小差别很大，主要按字节限制；按LRU淘汰，常用提示音常驻
+                strategy=CacheStrategy.TTL_LRU,
+                ttl=600,  # 10分钟过期
+                max_size=100,
+                max_bytes=64 * 1024 * 1024,
             ),
         }
         return configs.get(cache_type, cls())
@@ -1,26 +1,140 @@
 """
 全局缓存管理器
+- 每个缓存同时按条数和估算字节数限制，超出时按策略淘汰（LRU类淘汰最久未访问的，其余淘汰最早写入的）
+- 过期时间放在最小堆中，写入和读取时只弹出堆顶已过期的条目，不扫描整个缓存
+- 键按 ':' 分段建立前缀索引，写入时可附带标签，按前缀或标签失效只涉及命中的条目
+- 每个缓存单独统计命中、未命中、淘汰、过期次数，通过 get_stats 导出
 """
 
 import time
+import heapq
+import itertools
 import threading
-from typing import Any, Optional, Dict
+from dataclasses import replace
+from typing import Any, Optional, Dict, Iterable, List, Set, Tuple
 from collections import OrderedDict
-from .strategies import CacheStrategy, CacheEntry
+from .strategies import CacheStrategy, CacheEntry, estimate_size
 from .config import CacheConfig, CacheType
 
+# 前缀索引最多展开的键分段数
+_MAX_PREFIX_SEGMENTS = 4
+
+
+class _Cache:
+    """单个缓存空间，所有方法都在持有 lock 时调用"""
+
+    def __init__(self, config: CacheConfig):
+        self.config = config
+        self.lock = threading.RLock()
+        self.entries: "OrderedDict[Any, CacheEntry]" = OrderedDict()
+        self.bytes = 0
+        # 过期堆：(过期时间, 序号, 键, 条目)，被覆盖或删除的条目在弹出时跳过
+        self.expiry_heap: List[Tuple[float, int, Any, CacheEntry]] = []
+        self.prefix_index: Dict[str, Set[Any]] = {}
+        self.tag_index: Dict[str, Set[Any]] = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "rejections": 0,
+        }
+
+    @property
+    def is_lru(self) -> bool:
+        return self.config.strategy in [CacheStrategy.LRU, CacheStrategy.TTL_LRU]
+
+    @staticmethod
+    def _prefixes(key) -> List[str]:
+        if not isinstance(key, str) or ":" not in key:
+            return []
+        parts = key.split(":", _MAX_PREFIX_SEGMENTS)
+        return [":".join(parts[:i]) for i in range(1, len(parts))]
+
+    def _index(self, key, entry: CacheEntry):
+        for prefix in self._prefixes(key):
+            self.prefix_index.setdefault(prefix, set()).add(key)
+        for tag in entry.tags:
+            self.tag_index.setdefault(tag, set()).add(key)
+
+    def _unindex(self, key, entry: CacheEntry):
+        for index, names in (
+            (self.prefix_index, self._prefixes(key)),
+            (self.tag_index, entry.tags),
+        ):
+            for name in names:
+                keys = index.get(name)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[name]
+
+    def remove(self, key) -> bool:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        self.bytes -= entry.size
+        self._unindex(key, entry)
+        return True
+
+    def put(self, key, entry: CacheEntry, seq: int):
+        self.remove(key)
+        self.entries[key] = entry
+        self.bytes += entry.size
+        self._index(key, entry)
+        expire_at = entry.expire_at
+        if expire_at is not None:
+            heapq.heappush(self.expiry_heap, (expire_at, seq, key, entry))
+            # 反复覆盖同一个键会在堆中留下失效项，过多时重建
+            if len(self.expiry_heap) > 2 * len(self.entries) + 64:
+                self.expiry_heap = [
+                    item for item in self.expiry_heap if self.entries.get(item[2]) is item[3]
+                ]
+                heapq.heapify(self.expiry_heap)
+        self.stats["sets"] += 1
+
+    def expire(self, now: float) -> int:
+        """弹出所有已过期的条目"""
+        heap = self.expiry_heap
+        expired = 0
+        while heap and heap[0][0] < now:
+            _, _, key, entry = heapq.heappop(heap)
+            if self.entries.get(key) is entry:
+                self.remove(key)
+                expired += 1
+        self.stats["expirations"] += expired
+        return expired
+
+    def evict(self):
+        """超出条数或字节上限时淘汰"""
+        max_size, max_bytes = self.config.max_size, self.config.max_bytes
+        while self.entries and (
+            (max_size and len(self.entries) > max_size)
+            or (max_bytes and self.bytes > max_bytes)
+        ):
+            oldest_key = next(iter(self.entries))
+            self.remove(oldest_key)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+        self.expiry_heap.clear()
+        self.prefix_index.clear()
+        self.tag_index.clear()
+
 
 class GlobalCacheManager:
     """全局缓存管理器"""
 
     def __init__(self):
         self._logger = None
-        self._caches: Dict[str, Dict[str, CacheEntry]] = {}
-        self._configs: Dict[str, CacheConfig] = {}
-        self._locks: Dict[str, threading.RLock] = {}
+        self._caches: Dict[str, _Cache] = {}
         self._global_lock = threading.RLock()
-        self._last_cleanup = time.time()
-        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "cleanups": 0}
+        # 按缓存类型覆盖的配置，见 configure
+        self._overrides: Dict[str, dict] = {}
+        self._seq = itertools.count()
 
     @property
     def logger(self):
@@ -31,25 +145,56 @@ class GlobalCacheManager:
             self._logger = setup_logging()
         return self._logger
 
+    def configure(self, overrides: Optional[Dict[str, dict]]) -> None:
+        """
+        按缓存类型覆盖预设配置，已存在的缓存立即生效
+
+        Args:
+            overrides: {缓存类型值: {ttl, max_size, max_bytes, max_mb}}，
+                       max_mb 为 max_bytes 的兆字节写法
+        """
+        if not overrides:
+            return
+        with self._global_lock:
+            for type_value, override in overrides.items():
+                override = dict(override or {})
+                if "max_mb" in override:
+                    max_mb = override.pop("max_mb")
+                    override["max_bytes"] = (
+                        int(float(max_mb) * 1024 * 1024) if max_mb else None
+                    )
+                fields = {
+                    k: v
+                    for k, v in override.items()
+                    if k in ("ttl", "max_size", "max_bytes", "cleanup_interval")
+                }
+                self._overrides[type_value] = fields
+                for cache_name, cache in self._caches.items():
+                    if cache_name.split(":", 1)[0] == type_value:
+                        with cache.lock:
+                            cache.config = replace(cache.config, **fields)
+                            cache.evict()
+
+    def _config_for(self, cache_type: CacheType) -> CacheConfig:
+        config = CacheConfig.for_type(cache_type)
+        override = self._overrides.get(cache_type.value)
+        return replace(config, **override) if override else config
+
     def _get_cache_name(self, cache_type: CacheType, namespace: str = "") -> str:
         """生成缓存名称"""
         if namespace:
             return f"{cache_type.value}:{namespace}"
         return cache_type.value
 
-    def _get_or_create_cache(
-        self, cache_name: str, config: CacheConfig
-    ) -> Dict[str, CacheEntry]:
+    def _get_or_create_cache(self, cache_type: CacheType, namespace: str = "") -> _Cache:
         """获取或创建缓存空间"""
+        cache_name = self._get_cache_name(cache_type, namespace)
+        cache = self._caches.get(cache_name)
+        if cache is not None:
+            return cache
         with self._global_lock:
             if cache_name not in self._caches:
-                self._caches[cache_name] = (
-                    OrderedDict()
-                    if config.strategy in [CacheStrategy.LRU, CacheStrategy.TTL_LRU]
-                    else {}
-                )
-                self._configs[cache_name] = config
-                self._locks[cache_name] = threading.RLock()
+                self._caches[cache_name] = _Cache(self._config_for(cache_type))
             return self._caches[cache_name]
 
     def set(
@@ -59,157 +204,161 @@ class GlobalCacheManager:
         value: Any,
         ttl: Optional[float] = None,
         namespace: str = "",
+        tags: Iterable[str] = (),
     ) -> None:
-        """设置缓存值"""
-        cache_name = self._get_cache_name(cache_type, namespace)
-        config = self._configs.get(cache_name) or CacheConfig.for_type(cache_type)
-        cache = self._get_or_create_cache(cache_name, config)
+        """
+        设置缓存值
+
+        Args:
+            ttl: 生存时间（秒），不填使用缓存配置的TTL
+            tags: 标签，可通过 invalidate_tag 按标签批量失效
+        """
+        cache = self._get_or_create_cache(cache_type, namespace)
+        config = cache.config
 
         # 使用配置的TTL或传入的TTL
         effective_ttl = ttl if ttl is not None else config.ttl
-
-        with self._locks[cache_name]:
-            # 创建缓存条目
-            entry = CacheEntry(value=value, timestamp=time.time(), ttl=effective_ttl)
-
-            # 处理不同策略
-            if config.strategy in [CacheStrategy.LRU, CacheStrategy.TTL_LRU]:
-                # LRU策略：如果已存在则移动到末尾
-                if key in cache:
-                    del cache[key]
-                cache[key] = entry
-
-                # 检查大小限制
-                if config.max_size and len(cache) > config.max_size:
-                    # 移除最旧的条目
-                    oldest_key = next(iter(cache))
-                    del cache[oldest_key]
-                    self._stats["evictions"] += 1
-
-            else:
-                cache[key] = entry
-
-                # 检查大小限制
-                if config.max_size and len(cache) > config.max_size:
-                    # 简单策略：随机移除一个条目
-                    victim_key = next(iter(cache))
-                    del cache[victim_key]
-                    self._stats["evictions"] += 1
-
-        # 定期清理过期条目
-        self._maybe_cleanup(cache_name)
+        now = time.time()
+        # 估算大小在锁外进行，大的音频列表不阻塞其他线程读取
+        size = estimate_size(value)
+
+        with cache.lock:
+            cache.expire(now)
+            if config.max_bytes and size > config.max_bytes:
+                # 单个值超过整个缓存的字节上限，不缓存
+                cache.remove(key)
+                cache.stats["rejections"] += 1
+                return
+            entry = CacheEntry(
+                value=value,
+                timestamp=now,
+                ttl=effective_ttl,
+                size=size,
+                tags=tuple(tags),
+            )
+            cache.put(key, entry, next(self._seq))
+            cache.evict()
 
     def get(
         self, cache_type: CacheType, key: str, namespace: str = ""
     ) -> Optional[Any]:
         """获取缓存值"""
-        cache_name = self._get_cache_name(cache_type, namespace)
+        cache = self._get_or_create_cache(cache_type, namespace)
 
-        if cache_name not in self._caches:
-            self._stats["misses"] += 1
-            return None
-
-        cache = self._caches[cache_name]
-        config = self._configs[cache_name]
-
-        with self._locks[cache_name]:
-            if key not in cache:
-                self._stats["misses"] += 1
+        with cache.lock:
+            entry = cache.entries.get(key)
+            if entry is None:
+                cache.stats["misses"] += 1
                 return None
 
-            entry = cache[key]
-
             # 检查过期
             if entry.is_expired():
-                del cache[key]
-                self._stats["misses"] += 1
+                cache.expire(time.time())
+                cache.remove(key)
+                cache.stats["misses"] += 1
                 return None
 
             # 更新访问信息
             entry.touch()
 
             # LRU策略：移动到末尾
-            if config.strategy in [CacheStrategy.LRU, CacheStrategy.TTL_LRU]:
-                del cache[key]
-                cache[key] = entry
+            if cache.is_lru:
+                cache.entries.move_to_end(key)
 
-            self._stats["hits"] += 1
+            cache.stats["hits"] += 1
             return entry.value
 
     def delete(self, cache_type: CacheType, key: str, namespace: str = "") -> bool:
         """删除缓存条目"""
-        cache_name = self._get_cache_name(cache_type, namespace)
-
-        if cache_name not in self._caches:
+        cache = self._caches.get(self._get_cache_name(cache_type, namespace))
+        if cache is None:
             return False
 
-        cache = self._caches[cache_name]
-
-        with self._locks[cache_name]:
-            if key in cache:
-                del cache[key]
-                return True
-            return False
+        with cache.lock:
+            return cache.remove(key)
 
     def clear(self, cache_type: CacheType, namespace: str = "") -> None:
         """清空指定缓存"""
-        cache_name = self._get_cache_name(cache_type, namespace)
-
-        if cache_name not in self._caches:
+        cache = self._caches.get(self._get_cache_name(cache_type, namespace))
+        if cache is None:
             return
 
-        with self._locks[cache_name]:
-            self._caches[cache_name].clear()
+        with cache.lock:
+            cache.clear()
 
-    def invalidate_pattern(
-        self, cache_type: CacheType, pattern: str, namespace: str = ""
+    def invalidate_prefix(
+        self, cache_type: CacheType, prefix: str, namespace: str = ""
     ) -> int:
-        """按模式失效缓存条目"""
-        cache_name = self._get_cache_name(cache_type, namespace)
-
-        if cache_name not in self._caches:
+        """
+        按前缀失效缓存条目，前缀按 ':' 分段匹配：
+        "device:123" 匹配 "device:123:prompt"，不匹配 "device:1234"
+        """
+        cache = self._caches.get(self._get_cache_name(cache_type, namespace))
+        if cache is None:
             return 0
 
-        cache = self._caches[cache_name]
-        deleted_count = 0
-
-        with self._locks[cache_name]:
-            keys_to_delete = [key for key in cache.keys() if pattern in key]
-            for key in keys_to_delete:
-                del cache[key]
-                deleted_count += 1
+        prefix = prefix.rstrip(":")
+        with cache.lock:
+            keys = set(cache.prefix_index.get(prefix, ()))
+            if prefix in cache.entries:
+                keys.add(prefix)
+            for key in keys:
+                cache.remove(key)
+        return len(keys)
+
+    def invalidate_tag(self, cache_type: CacheType, tag: str, namespace: str = "") -> int:
+        """失效带有指定标签的缓存条目"""
+        cache = self._caches.get(self._get_cache_name(cache_type, namespace))
+        if cache is None:
+            return 0
 
-        return deleted_count
+        with cache.lock:
+            keys = list(cache.tag_index.get(tag, ()))
+            for key in keys:
+                cache.remove(key)
+        return len(keys)
 
-    def _cleanup_expired(self, cache_name: str) -> int:
-        """清理过期条目"""
-        if cache_name not in self._caches:
+    def invalidate_pattern(
+        self, cache_type: CacheType, pattern: str, namespace: str = ""
+    ) -> int:
+        """按子串失效缓存条目，需要扫描整个缓存，能用前缀或标签时优先使用 invalidate_prefix/invalidate_tag"""
+        cache = self._caches.get(self._get_cache_name(cache_type, namespace))
+        if cache is None:
             return 0
 
-        cache = self._caches[cache_name]
-        deleted_count = 0
-
-        with self._locks[cache_name]:
-            expired_keys = [key for key, entry in cache.items() if entry.is_expired()]
-            for key in expired_keys:
-                del cache[key]
-                deleted_count += 1
+        with cache.lock:
+            keys_to_delete = [key for key in cache.entries if pattern in key]
+            for key in keys_to_delete:
+                cache.remove(key)
 
-        return deleted_count
+        return len(keys_to_delete)
 
-    def _maybe_cleanup(self, cache_name: str):
-        """定期清理检查"""
-        config = self._configs.get(cache_name)
-        if not config:
-            return
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各缓存的统计信息
 
+        Returns:
+            {缓存名称: {entries, bytes, max_size, max_bytes, hits, misses, sets,
+                        evictions, expirations, rejections, hit_rate}}
+        """
+        stats = {}
         now = time.time()
-        if now - self._last_cleanup > config.cleanup_interval:
-            self._last_cleanup = now
-            deleted = self._cleanup_expired(cache_name)
-            if deleted > 0:
-                self._stats["cleanups"] += 1
-                self.logger.debug(f"清理缓存 {cache_name}: 删除 {deleted} 个过期条目")
+        with self._global_lock:
+            caches = list(self._caches.items())
+        for cache_name, cache in caches:
+            with cache.lock:
+                cache.expire(now)
+                item = dict(cache.stats)
+                item.update(
+                    entries=len(cache.entries),
+                    bytes=cache.bytes,
+                    max_size=cache.config.max_size,
+                    max_bytes=cache.config.max_bytes,
+                )
+            lookups = item["hits"] + item["misses"]
+            item["hit_rate"] = item["hits"] / lookups if lookups else 0.0
+            stats[cache_name] = item
+        return stats
 
 
 # 创建全局缓存管理器实例
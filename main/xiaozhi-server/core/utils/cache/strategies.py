@@ -2,9 +2,10 @@
 缓存策略和数据结构定义
 """
 
+import sys
 import time
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
 from dataclasses import dataclass
 
 
@@ -26,11 +27,20 @@ class CacheEntry:
     ttl: Optional[float] = None  # 生存时间（秒）
     access_count: int = 0
     last_access: float = None
+    size: int = 0  # 估算的占用字节数
+    tags: Tuple[str, ...] = ()
 
     def __post_init__(self):
         if self.last_access is None:
             self.last_access = self.timestamp
 
+    @property
+    def expire_at(self) -> Optional[float]:
+        """过期时间点，永不过期时为None"""
+        if self.ttl is None:
+            return None
+        return self.timestamp + self.ttl
+
     def is_expired(self) -> bool:
         """检查是否过期"""
         if self.ttl is None:
@@ -41,3 +51,26 @@ class CacheEntry:
         """更新访问时间和计数"""
         self.last_access = time.time()
         self.access_count += 1
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    估算缓存值占用的字节数
+    bytes/str 按长度计算，列表、元组、字典逐项累加（音频数据即各帧长度之和），
+    其余对象使用 sys.getsizeof，嵌套过深时不再展开
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value) + 33
+    if isinstance(value, str):
+        return len(value.encode("utf-8", errors="ignore")) + 49
+    if _depth < 4:
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return sys.getsizeof(value) + sum(
+                estimate_size(item, _depth + 1) for item in value
+            )
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(
+                estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+                for k, v in value.items()
+            )
+    return sys.getsizeof(value)
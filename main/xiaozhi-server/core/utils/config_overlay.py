@@ -0,0 +1,93 @@
+"""
+连接级写时复制配置
+所有连接共享服务器的同一份配置（只读），每个连接持有一个 ConfigOverlay 视图：
+创建时只浅拷贝顶层键，子字典在第一次被访问时才包装为新的视图、列表在第一次被访问时才复制，
+连接对配置的修改只落在自己的视图中，不会影响共享配置和其他连接。
+相比每个连接深拷贝整份配置（提示词、插件、所有供应商配置），建立连接的开销与配置大小基本无关。
+"""
+
+import copy
+from typing import Any
+
+
+class ConfigOverlay(dict):
+    """写时复制的配置视图，可以当作普通dict使用"""
+
+    __slots__ = ("_owned",)
+
+    def __init__(self, base: dict = None):
+        """
+        Args:
+            base: 共享的基础配置，视图不会修改它
+        """
+        super().__init__(base or {})
+        # 已属于本视图的键：子字典已包装、列表已复制，或由本视图写入
+        self._owned = set()
+
+    def _materialize(self, key) -> Any:
+        value = dict.__getitem__(self, key)
+        if key in self._owned:
+            return value
+        if isinstance(value, dict):
+            value = ConfigOverlay(value)
+        elif isinstance(value, list):
+            value = copy.deepcopy(value)
+        dict.__setitem__(self, key, value)
+        self._owned.add(key)
+        return value
+
+    def __getitem__(self, key):
+        return self._materialize(key)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._owned.add(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._owned.discard(key)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self._materialize(key)
+        return default
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self._materialize(key)
+        self[key] = default
+        return default
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self._materialize(key)
+            self._owned.discard(key)
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def values(self):
+        for key in self:
+            self._materialize(key)
+        return dict.values(self)
+
+    def items(self):
+        for key in self:
+            self._materialize(key)
+        return dict.items(self)
+
+    def copy(self) -> "ConfigOverlay":
+        return ConfigOverlay(self)
+
+    def __copy__(self) -> "ConfigOverlay":
+        return ConfigOverlay(self)
+
+    def __deepcopy__(self, memo) -> dict:
+        return copy.deepcopy(dict(dict.items(self)), memo)
+
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
@@ -1,7 +1,30 @@
 import uuid
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 每条消息除内容外的固定开销（角色、分隔符等）
+_MESSAGE_OVERHEAD_TOKENS = 4
+# 中日韩字符按1字1token估算，其余字符按约4字符1token估算
+_CJK_PATTERN = re.compile(r"[　-〿぀-ヿ㐀-䶿一-鿿＀-￯]")
+
+SUMMARY_PROMPT = (
+    "你是对话摘要助手。请把【已有摘要】和【新的对话】合并成一段简洁的中文摘要，"
+    "保留用户的身份信息、偏好、提到的重要事实和尚未完成的事项，忽略寒暄，"
+    "不超过200字，直接输出摘要内容。"
+)
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """粗略估算文本的token数，用于上下文预算，不追求与具体模型的分词结果一致"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
 
 
 class Message:
@@ -21,29 +44,107 @@ class Message:
 
 
 class Dialogue:
-    def __init__(self):
-        self.dialogue: List[Message] = []
+    """
+    对话上下文
+    每条消息在写入时渲染为发给大模型的格式并估算token数，之后只追加不重建；
+    系统提示词（时间、说话人、记忆、历史摘要）渲染后缓存，相关内容变化时才重新渲染。
+    配置了token预算时，超出预算的最早对话轮次移出发送窗口：
+    - sliding: 直接丢弃
+    - summary: 由调用方在对话结束后调用 summarize_async，把移出的轮次压缩成摘要放入系统提示词
+    dialogue 属性始终保存完整的对话历史（用于记忆保存等）。
+    """
+
+    def __init__(self, config: dict = None):
+        """
+        Args:
+            config: 上下文配置，支持以下字段
+                max_tokens: 上下文token预算（包含系统提示词），0或不填表示不限制
+                eviction: 超出预算时的处理方式，sliding 或 summary，默认 sliding
+        """
+        config = config or {}
+        self.max_tokens = int(config.get("max_tokens") or 0)
+        self.eviction = config.get("eviction") or "sliding"
+        # 被移出窗口的对话轮次的摘要
+        self.summary = ""
+        self._messages: List[Message] = []
+        self._system_message: Optional[Message] = None
+        # 已渲染的非系统消息：(消息, 渲染结果, token数)
+        self._rendered: List[Tuple[Message, dict, int]] = []
+        # 发送窗口在 _rendered 中的起点及窗口内的token数
+        self._start = 0
+        self._window_tokens = 0
+        # 已移出窗口、等待压缩成摘要的消息
+        self._pending_summary: List[Message] = []
+        self._summarizing = False
+        # 系统提示词渲染缓存
+        self._system_key = None
+        self._system_rendered: Optional[dict] = None
+        self._system_tokens = 0
+        # 说话人描述渲染缓存
+        self._speakers_key = None
+        self._speakers_text = ""
         # 获取当前时间
         self.current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+    @property
+    def dialogue(self) -> List[Message]:
+        """完整的对话历史"""
+        return self._messages
+
+    @dialogue.setter
+    def dialogue(self, messages: List[Message]):
+        """整体替换对话历史（如过滤掉工具消息），已渲染的消息直接复用"""
+        cached = {id(entry[0]): entry for entry in self._rendered}
+        window = {id(entry[0]) for entry in self._rendered[self._start :]}
+        self._messages = list(messages)
+        self._system_message = next(
+            (m for m in self._messages if m.role == "system"), None
+        )
+        self._rendered = []
+        self._start = None
+        for m in self._messages:
+            if m.role == "system":
+                continue
+            entry = cached.get(id(m)) or self._render(m)
+            # 窗口起点：第一条原本在窗口内或新加入的消息
+            if self._start is None and (id(m) in window or id(m) not in cached):
+                self._start = len(self._rendered)
+            self._rendered.append(entry)
+        if self._start is None:
+            self._start = len(self._rendered)
+        self._window_tokens = sum(t for _, _, t in self._rendered[self._start :])
+
     def put(self, message: Message):
-        self.dialogue.append(message)
+        self._messages.append(message)
+        if message.role == "system":
+            if self._system_message is None:
+                self._system_message = message
+            return
+        entry = self._render(message)
+        self._rendered.append(entry)
+        self._window_tokens += entry[2]
 
     def getMessages(self, m, dialogue):
+        dialogue.append(self._render(m)[1])
+
+    @staticmethod
+    def _render(m: Message) -> Tuple[Message, dict, int]:
         if m.tool_calls is not None:
-            dialogue.append({"role": m.role, "tool_calls": m.tool_calls})
+            rendered = {"role": m.role, "tool_calls": m.tool_calls}
+            tokens = estimate_tokens(str(m.tool_calls))
         elif m.role == "tool":
-            dialogue.append(
-                {
-                    "role": m.role,
-                    "tool_call_id": (
-                        str(uuid.uuid4()) if m.tool_call_id is None else m.tool_call_id
-                    ),
-                    "content": m.content,
-                }
-            )
+            rendered = {
+                "role": m.role,
+                "tool_call_id": (
+                    str(uuid.uuid4()) if m.tool_call_id is None else m.tool_call_id
+                ),
+                "content": m.content,
+            }
+            tokens = estimate_tokens(m.content)
         else:
-            dialogue.append({"role": m.role, "content": m.content})
+            rendered = {"role": m.role, "content": m.content}
+            tokens = estimate_tokens(m.content)
+        return m, rendered, tokens + _MESSAGE_OVERHEAD_TOKENS
 
     def get_llm_dialogue(self) -> List[Dict[str, str]]:
         # 直接调用get_llm_dialogue_with_memory，传入None作为memory_str
@@ -53,12 +154,108 @@ class Dialogue:
     def update_system_message(self, new_content: str):
         """更新或添加系统消息"""
         # 查找第一个系统消息
-        system_msg = next((msg for msg in self.dialogue if msg.role == "system"), None)
-        if system_msg:
-            system_msg.content = new_content
+        if self._system_message:
+            self._system_message.content = new_content
         else:
             self.put(Message(role="system", content=new_content))
 
+    def _render_speakers(self, voiceprint_config: dict) -> str:
+        # 添加说话人个性化描述
+        try:
+            speakers = tuple((voiceprint_config or {}).get("speakers") or [])
+        except Exception:
+            # 配置读取失败时忽略错误，不影响其他功能
+            return ""
+        if speakers == self._speakers_key:
+            return self._speakers_text
+        text = ""
+        if speakers:
+            text = "\n\n<speakers_info>"
+            for speaker_str in speakers:
+                try:
+                    parts = speaker_str.split(",", 2)
+                    if len(parts) >= 2:
+                        name = parts[1].strip()
+                        # 如果描述为空，则为""
+                        description = parts[2].strip() if len(parts) >= 3 else ""
+                        text += f"\n- {name}：{description}"
+                except Exception:
+                    pass
+            text += "\n\n</speakers_info>"
+        self._speakers_key, self._speakers_text = speakers, text
+        return text
+
+    def _render_system(self, memory_str: str, voiceprint_config: dict) -> Optional[dict]:
+        if self._system_message is None:
+            return None
+        content = self._system_message.content or ""
+        speakers_text = self._render_speakers(voiceprint_config)
+        # 时间占位符精确到分钟，同一分钟内复用缓存
+        minute = (
+            datetime.now().strftime("%H:%M") if "{{current_time}}" in content else None
+        )
+        key = (content, memory_str, speakers_text, minute, self.summary)
+        if key == self._system_key:
+            return self._system_rendered
+
+        # 基础系统提示，替换时间占位符
+        enhanced_system_prompt = content
+        if minute is not None:
+            enhanced_system_prompt = enhanced_system_prompt.replace(
+                "{{current_time}}", minute
+            )
+        enhanced_system_prompt += speakers_text
+
+        # 使用正则表达式匹配 <memory> 标签，不管中间有什么内容
+        if memory_str is not None:
+            enhanced_system_prompt = re.sub(
+                r"<memory>.*?</memory>",
+                lambda _: f"<memory>\n{memory_str}\n</memory>",
+                enhanced_system_prompt,
+                flags=re.DOTALL,
+            )
+        if self.summary:
+            enhanced_system_prompt += (
+                f"\n\n<history_summary>\n{self.summary}\n</history_summary>"
+            )
+
+        self._system_key = key
+        self._system_rendered = {"role": "system", "content": enhanced_system_prompt}
+        self._system_tokens = (
+            estimate_tokens(enhanced_system_prompt) + _MESSAGE_OVERHEAD_TOKENS
+        )
+        return self._system_rendered
+
+    def _fit_window(self):
+        """按token预算把最早的对话轮次移出窗口，始终保留最后一轮"""
+        if self.max_tokens <= 0:
+            return
+        budget = self.max_tokens - self._system_tokens
+        evicted = 0
+        while self._window_tokens > budget:
+            # 只在用户消息处切分，保证工具调用和对应的工具结果不被拆开
+            next_start = next(
+                (
+                    i
+                    for i in range(self._start + 1, len(self._rendered))
+                    if self._rendered[i][0].role == "user"
+                ),
+                None,
+            )
+            if next_start is None:
+                break
+            for m, _, tokens in self._rendered[self._start : next_start]:
+                self._window_tokens -= tokens
+                if self.eviction == "summary":
+                    self._pending_summary.append(m)
+            evicted += next_start - self._start
+            self._start = next_start
+        if evicted:
+            logger.bind(tag=TAG).debug(
+                f"上下文超出预算 {self.max_tokens}，移出 {evicted} 条消息，"
+                f"当前约 {self._window_tokens + self._system_tokens} tokens"
+            )
+
     def get_llm_dialogue_with_memory(
         self, memory_str: str = None, voiceprint_config: dict = None
     ) -> List[Dict[str, str]]:
@@ -66,53 +263,50 @@ class Dialogue:
         dialogue = []
 
         # 添加系统提示和记忆
-        system_message = next(
-            (msg for msg in self.dialogue if msg.role == "system"), None
-        )
+        system_rendered = self._render_system(memory_str, voiceprint_config)
+        if system_rendered is not None:
+            dialogue.append(dict(system_rendered))
+        else:
+            self._system_tokens = 0
+        self._fit_window()
 
-        if system_message:
-            # 基础系统提示
-            enhanced_system_prompt = system_message.content
-            # 替换时间占位符
-            enhanced_system_prompt = enhanced_system_prompt.replace(
-                "{{current_time}}", datetime.now().strftime("%H:%M")
-            )
+        # 添加用户和助手的对话，返回副本，调用方修改消息不会影响缓存
+        dialogue.extend(dict(rendered) for _, rendered, _ in self._rendered[self._start :])
+        return dialogue
 
-            # 添加说话人个性化描述
-            try:
-                speakers = voiceprint_config.get("speakers", [])
-                if speakers:
-                    enhanced_system_prompt += "\n\n<speakers_info>"
-                    for speaker_str in speakers:
-                        try:
-                            parts = speaker_str.split(",", 2)
-                            if len(parts) >= 2:
-                                name = parts[1].strip()
-                                # 如果描述为空，则为""
-                                description = (
-                                    parts[2].strip() if len(parts) >= 3 else ""
-                                )
-                                enhanced_system_prompt += f"\n- {name}：{description}"
-                        except:
-                            pass
-                    enhanced_system_prompt += "\n\n</speakers_info>"
-            except:
-                # 配置读取失败时忽略错误，不影响其他功能
-                pass
-
-            # 使用正则表达式匹配 <memory> 标签，不管中间有什么内容
-            if memory_str is not None:
-                enhanced_system_prompt = re.sub(
-                    r"<memory>.*?</memory>",
-                    f"<memory>\n{memory_str}\n</memory>",
-                    enhanced_system_prompt,
-                    flags=re.DOTALL,
-                )
-            dialogue.append({"role": "system", "content": enhanced_system_prompt})
-
-        # 添加用户和助手的对话
-        for m in self.dialogue:
-            if m.role != "system":  # 跳过原始的系统消息
-                self.getMessages(m, dialogue)
+    @property
+    def needs_summary(self) -> bool:
+        """是否有移出窗口、等待压缩成摘要的消息"""
+        return bool(self._pending_summary) and not self._summarizing
 
-        return dialogue
+    async def summarize_async(self, llm):
+        """把移出窗口的对话轮次与已有摘要合并，结果在下一次请求时放入系统提示词"""
+        if not self.needs_summary:
+            return
+        self._summarizing = True
+        pending, self._pending_summary = self._pending_summary, []
+        try:
+            lines = []
+            for m in pending:
+                if m.role == "user" and m.content:
+                    lines.append(f"用户：{m.content}")
+                elif m.role == "assistant" and m.content:
+                    lines.append(f"助手：{m.content}")
+            if not lines:
+                return
+            user_prompt = (
+                f"【已有摘要】\n{self.summary or '无'}\n\n【新的对话】\n" + "\n".join(lines)
+            )
+            result = await llm.response_no_stream_async(
+                system_prompt=SUMMARY_PROMPT, user_prompt=user_prompt
+            )
+            if result and not result.startswith("【"):
+                self.summary = result.strip()
+            else:
+                # 摘要失败时放回，下次再试
+                self._pending_summary = pending + self._pending_summary
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"对话摘要失败: {e}")
+            self._pending_summary = pending + self._pending_summary
+        finally:
+            self._summarizing = False
@@ -0,0 +1,66 @@
+"""
+跨线程事件循环队列
+生产者可以在任意线程中用与 queue.Queue 相同的 put 方法放入数据，
+消费者在事件循环中 await get()，无需占用一个线程阻塞等待
+"""
+
+import queue
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Optional
+
+
+class LoopQueue:
+    """线程安全、可在事件循环中等待的单消费者队列"""
+
+    def __init__(self):
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiter: Optional[asyncio.Future] = None
+
+    def put(self, item: Any, block: bool = True, timeout: float = None):
+        """放入数据（任意线程），参数与 queue.Queue.put 保持兼容"""
+        with self._lock:
+            self._items.append(item)
+            waiter, self._waiter = self._waiter, None
+        if waiter is not None:
+            self._loop.call_soon_threadsafe(self._wake, waiter)
+
+    def put_nowait(self, item: Any):
+        self.put(item)
+
+    def get_nowait(self) -> Any:
+        """取出数据，队列为空时抛出 queue.Empty"""
+        with self._lock:
+            if not self._items:
+                raise queue.Empty
+            return self._items.popleft()
+
+    async def get(self) -> Any:
+        """在事件循环中等待并取出数据"""
+        while True:
+            with self._lock:
+                if self._items:
+                    return self._items.popleft()
+                self._loop = asyncio.get_running_loop()
+                self._waiter = self._loop.create_future()
+                waiter = self._waiter
+            try:
+                await waiter
+            finally:
+                with self._lock:
+                    if self._waiter is waiter:
+                        self._waiter = None
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    @staticmethod
+    def _wake(waiter: asyncio.Future):
+        if not waiter.done():
+            waiter.set_result(None)
@@ -0,0 +1,245 @@
+"""
+进程内监控指标
+提供计数器、仪表盘和直方图，连接、ASR、TTS、LLM、工具等各层在处理时更新，
+HTTP服务的 /metrics 接口以 Prometheus 文本格式导出。
+更新操作只是加锁后的加法，开销在微秒级；队列深度、线程池、缓存等状态量由采集函数在导出时读取。
+多进程模式下每个工作进程各自统计，导出时带有 worker 标签。
+"""
+
+import math
+import bisect
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 默认直方图分桶（秒），覆盖从几十毫秒的首包延迟到几十秒的长回复
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}")
+        return tuple(str(v) for v in labels)
+
+    def render(self, const_labels: Dict[str, str]) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        names = self.labelnames + tuple(const_labels)
+        const_values = tuple(const_labels.values())
+        for labels, line in self._samples():
+            lines.append(line(names, labels + const_values))
+        return lines
+
+    def _samples(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield labels, lambda n, v, value=value: (
+                f"{self.name}{_format_labels(n, v)} {_format_value(value)}"
+            )
+
+
+class Gauge(Counter):
+    """可增可减的仪表盘，也可以在导出前由采集函数直接设置"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, *labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """直方图，记录耗时等数值的分布"""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # 标签 -> [各分桶计数(非累计), 总和, 次数]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            item = self._values.get(key)
+            if item is None:
+                item = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            item[0][index] += 1
+            item[1] += value
+            item[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        for labels, (counts, total, count) in items:
+
+            def line(n, v, counts=counts, total=total, count=count):
+                rows = []
+                cumulative = 0
+                for bound, c in zip(self.buckets, counts):
+                    cumulative += c
+                    le = 'le="' + _format_value(float(bound)) + '"'
+                    rows.append(
+                        f"{self.name}_bucket{_format_labels(n, v, le)} {cumulative}"
+                    )
+                rows.append(f"{self.name}_sum{_format_labels(n, v)} {_format_value(total)}")
+                rows.append(f"{self.name}_count{_format_labels(n, v)} {count}")
+                return "\n".join(rows)
+
+            yield labels, line
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        # 附加到所有指标上的标签，例如多进程模式下的 worker
+        self.const_labels: Dict[str, str] = {}
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"指标 {name} 已注册为 {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def add_collector(self, collector: Callable[[], None]):
+        """注册采集函数，每次导出前调用，用于把队列深度等状态量写入仪表盘"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """以 Prometheus 文本格式导出所有指标"""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics.values())
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.bind(tag=TAG).warning(f"指标采集失败: {e}")
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render(self.const_labels))
+        return "\n".join(lines) + "\n"
+
+
+# 全局单例
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """获取进程级指标注册表"""
+    return _registry
+
+
+def provider_name(provider) -> str:
+    """供应商标签：取实现所在模块的文件名，例如 openai、doubao_stream"""
+    return type(provider).__module__.rsplit(".", 1)[-1]
+
+
+# 各层共用的指标
+CONNECTIONS_TOTAL = _registry.counter(
+    "xiaozhi_connections_total", "累计建立的WebSocket连接数"
+)
+ASR_SECONDS = _registry.histogram(
+    "xiaozhi_asr_seconds", "一句话从说完到识别出文本的耗时（秒）", ["provider"]
+)
+LLM_FIRST_TOKEN_SECONDS = _registry.histogram(
+    "xiaozhi_llm_first_token_seconds", "LLM请求到首个输出的耗时（秒）", ["provider"]
+)
+LLM_RESPONSE_SECONDS = _registry.histogram(
+    "xiaozhi_llm_response_seconds", "LLM一次流式请求的总耗时（秒）", ["provider"]
+)
+LLM_REQUESTS_TOTAL = _registry.counter(
+    "xiaozhi_llm_requests_total", "LLM请求数", ["provider", "result"]
+)
+TTS_SECONDS = _registry.histogram(
+    "xiaozhi_tts_sentence_seconds", "合成一个句子的耗时（秒）", ["provider"]
+)
+TTS_SENTENCES_TOTAL = _registry.counter(
+    "xiaozhi_tts_sentences_total", "合成的句子数", ["provider", "source"]
+)
+TOOL_SECONDS = _registry.histogram(
+    "xiaozhi_tool_call_seconds", "工具调用耗时（秒）", ["name"]
+)
+TOOL_CALLS_TOTAL = _registry.counter(
+    "xiaozhi_tool_calls_total", "工具调用次数", ["name", "action"]
+)
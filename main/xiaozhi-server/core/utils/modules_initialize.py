@@ -1,4 +1,9 @@
-from typing import Dict, Any
+import os
+import sys
+import time
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
 from config.logger import setup_logging
 from core.utils import tts, llm, intent, memory, vad, asr
 
@@ -15,23 +20,30 @@ def initialize_modules(
     init_tts=False,
     init_memory=False,
     init_intent=False,
+    parallel=False,
 ) -> Dict[str, Any]:
     """
     初始化所有模块组件
 
     Args:
         config: 配置字典
+        parallel: 是否并行初始化，本地模型的导入和加载互不等待，用于服务启动
 
     Returns:
         Dict[str, Any]: 包含所有初始化后的模块的字典
     """
-    modules = {}
+    # 模块名 -> (选中的配置名, 创建函数)，供应商模块在创建函数中才按类型导入
+    builders: Dict[str, Tuple[str, Callable[[], Any]]] = {}
+    # 模块名 -> 供应商模块路径，并行创建前先串行导入
+    providers: Dict[str, str] = {}
 
     # 初始化TTS模块
     if init_tts:
-        select_tts_module = config["selected_module"]["TTS"]
-        modules["tts"] = initialize_tts(config)
-        logger.bind(tag=TAG).info(f"初始化组件: tts成功 {select_tts_module}")
+        builders["tts"] = (
+            config["selected_module"]["TTS"],
+            lambda: initialize_tts(config),
+        )
+        providers["tts"] = _provider_module("tts", _module_type(config, "TTS"))
 
     # 初始化LLM模块
     if init_llm:
@@ -41,11 +53,14 @@ def initialize_modules(
             if "type" not in config["LLM"][select_llm_module]
             else config["LLM"][select_llm_module]["type"]
         )
-        modules["llm"] = llm.create_instance(
-            llm_type,
-            config["LLM"][select_llm_module],
+        builders["llm"] = (
+            select_llm_module,
+            lambda: llm.create_instance(
+                llm_type,
+                config["LLM"][select_llm_module],
+            ),
         )
-        logger.bind(tag=TAG).info(f"初始化组件: llm成功 {select_llm_module}")
+        providers["llm"] = _provider_module("llm", llm_type, package=True)
 
     # 初始化Intent模块
     if init_intent:
@@ -55,11 +70,14 @@ def initialize_modules(
             if "type" not in config["Intent"][select_intent_module]
             else config["Intent"][select_intent_module]["type"]
         )
-        modules["intent"] = intent.create_instance(
-            intent_type,
-            config["Intent"][select_intent_module],
+        builders["intent"] = (
+            select_intent_module,
+            lambda: intent.create_instance(
+                intent_type,
+                config["Intent"][select_intent_module],
+            ),
         )
-        logger.bind(tag=TAG).info(f"初始化组件: intent成功 {select_intent_module}")
+        providers["intent"] = _provider_module("intent", intent_type, package=True)
 
     # 初始化Memory模块
     if init_memory:
@@ -69,12 +87,15 @@ def initialize_modules(
             if "type" not in config["Memory"][select_memory_module]
             else config["Memory"][select_memory_module]["type"]
         )
-        modules["memory"] = memory.create_instance(
-            memory_type,
-            config["Memory"][select_memory_module],
-            config.get("summaryMemory", None),
+        builders["memory"] = (
+            select_memory_module,
+            lambda: memory.create_instance(
+                memory_type,
+                config["Memory"][select_memory_module],
+                config.get("summaryMemory", None),
+            ),
         )
-        logger.bind(tag=TAG).info(f"初始化组件: memory成功 {select_memory_module}")
+        providers["memory"] = _provider_module("memory", memory_type, package=True)
 
     # 初始化VAD模块
     if init_vad:
@@ -84,27 +105,80 @@ def initialize_modules(
             if "type" not in config["VAD"][select_vad_module]
             else config["VAD"][select_vad_module]["type"]
         )
-        modules["vad"] = vad.create_instance(
-            vad_type,
-            config["VAD"][select_vad_module],
+        builders["vad"] = (
+            select_vad_module,
+            lambda: vad.create_instance(
+                vad_type,
+                config["VAD"][select_vad_module],
+            ),
         )
-        logger.bind(tag=TAG).info(f"初始化组件: vad成功 {select_vad_module}")
+        providers["vad"] = _provider_module("vad", vad_type)
 
     # 初始化ASR模块
     if init_asr:
-        select_asr_module = config["selected_module"]["ASR"]
-        modules["asr"] = initialize_asr(config)
-        logger.bind(tag=TAG).info(f"初始化组件: asr成功 {select_asr_module}")
+        builders["asr"] = (
+            config["selected_module"]["ASR"],
+            lambda: initialize_asr(config),
+        )
+        providers["asr"] = _provider_module("asr", _module_type(config, "ASR"))
+
+    def build(name):
+        select_module, create = builders[name]
+        start = time.monotonic()
+        module = create()
+        logger.bind(tag=TAG).info(
+            f"初始化组件: {name}成功 {select_module}，耗时 {time.monotonic() - start:.3f}s"
+        )
+        return module
+
+    modules = {}
+    if parallel and len(builders) > 1:
+        # 本地VAD和ASR都会首次导入torch等重量级依赖，多线程同时首次导入同一模块
+        # 可能拿到未初始化完成的模块，导入阶段串行进行，只并行创建实例（加载模型）
+        for name in builders:
+            _import_provider(providers.get(name))
+        with ThreadPoolExecutor(
+            max_workers=len(builders), thread_name_prefix="module-init"
+        ) as pool:
+            futures = {name: pool.submit(build, name) for name in builders}
+        # 按声明顺序取结果，任一模块失败时抛出其异常
+        for name, future in futures.items():
+            modules[name] = future.result()
+    else:
+        for name in builders:
+            modules[name] = build(name)
     return modules
 
 
+def _module_type(config, kind):
+    """选中的配置对应的供应商类型，未设置type时与配置名相同"""
+    select_module = config["selected_module"][kind]
+    return config[kind][select_module].get("type", select_module)
+
+
+def _provider_module(kind, type_name, package=False):
+    """供应商模块路径，与 core/utils 下各工厂方法的导入规则一致"""
+    if package:
+        return f"core.providers.{kind}.{type_name}.{type_name}"
+    return f"core.providers.{kind}.{type_name}"
+
+
+def _import_provider(lib_name):
+    """导入供应商模块，模块文件不存在时跳过，由工厂方法报告不支持的类型"""
+    if not lib_name or lib_name in sys.modules:
+        return
+    if not os.path.exists(os.path.join(*lib_name.split(".")) + ".py"):
+        return
+    start = time.monotonic()
+    sys.modules[lib_name] = importlib.import_module(lib_name)
+    logger.bind(tag=TAG).debug(
+        f"导入模块: {lib_name}，耗时 {time.monotonic() - start:.3f}s"
+    )
+
+
 def initialize_tts(config):
     select_tts_module = config["selected_module"]["TTS"]
-    tts_type = (
-        select_tts_module
-        if "type" not in config["TTS"][select_tts_module]
-        else config["TTS"][select_tts_module]["type"]
-    )
+    tts_type = _module_type(config, "TTS")
     new_tts = tts.create_instance(
         tts_type,
         config["TTS"][select_tts_module],
@@ -115,11 +189,7 @@ def initialize_tts(config):
 
 def initialize_asr(config):
     select_asr_module = config["selected_module"]["ASR"]
-    asr_type = (
-        select_asr_module
-        if "type" not in config["ASR"][select_asr_module]
-        else config["ASR"][select_asr_module]["type"]
-    )
+    asr_type = _module_type(config, "ASR")
     new_asr = asr.create_instance(
         asr_type,
         config["ASR"][select_asr_module],
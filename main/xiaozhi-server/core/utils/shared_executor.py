@@ -0,0 +1,188 @@
+"""
+进程级共享线程池
+所有连接共用一个按CPU核数设定上限的线程池，替代每个连接各自创建的线程池；
+每个连接通过 ConnectionExecutor 提交任务，同一连接同时占用的线程数有上限，
+超出的任务在该连接自己的队列中排队，避免单个连接占满线程池；
+流式LLM生成会在整轮生成期间占用一个线程，使用单独的有上限线程池，不挤占共享线程池
+"""
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Tuple
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class ConnectionExecutor:
+    """单个连接在共享线程池上的视图，接口与 ThreadPoolExecutor.submit/shutdown 保持一致"""
+
+    def __init__(self, pool: ThreadPoolExecutor, max_inflight: int = 4):
+        """
+        Args:
+            pool: 进程级共享线程池
+            max_inflight: 该连接同时占用的线程数上限
+        """
+        self._pool = pool
+        self.max_inflight = max(1, int(max_inflight))
+        self._inflight = 0
+        self._pending: Deque[Tuple[Future, Callable, tuple, dict]] = deque()
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """提交任务，返回 concurrent.futures.Future"""
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("连接线程池已关闭")
+            if self._inflight >= self.max_inflight:
+                self._pending.append((future, fn, args, kwargs))
+                return future
+            self._inflight += 1
+        self._start(future, fn, args, kwargs)
+        return future
+
+    @property
+    def pending(self) -> int:
+        """因达到并发上限而在本连接队列中排队的任务数"""
+        return len(self._pending)
+
+    def shutdown(self, wait: bool = False):
+        """关闭：取消尚未开始的任务，正在执行的任务不受影响"""
+        with self._lock:
+            self._shutdown = True
+            pending, self._pending = self._pending, deque()
+        for future, _, _, _ in pending:
+            future.cancel()
+
+    def _start(self, future: Future, fn: Callable, args: tuple, kwargs: dict):
+        try:
+            self._pool.submit(self._run, future, fn, args, kwargs)
+        except Exception as e:
+            # 共享线程池已关闭（进程退出中）
+            future.set_exception(e)
+            self._on_done()
+
+    def _run(self, future: Future, fn: Callable, args: tuple, kwargs: dict):
+        try:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+                logger.bind(tag=TAG).error(f"连接任务执行异常: {e}")
+            else:
+                future.set_result(result)
+        finally:
+            self._on_done()
+
+    def _on_done(self):
+        """一个任务结束后，启动该连接排队中的下一个任务"""
+        with self._lock:
+            while self._pending:
+                future, fn, args, kwargs = self._pending.popleft()
+                if future.cancelled():
+                    continue
+                break
+            else:
+                self._inflight -= 1
+                return
+        self._start(future, fn, args, kwargs)
+
+
+class SharedExecutor:
+    """进程级共享线程池"""
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        max_inflight_per_connection: int = 4,
+        workers_per_cpu: int = 4,
+        max_llm_streams: int = 64,
+    ):
+        """
+        Args:
+            max_workers: 线程数上限，不填时为 CPU核数 * workers_per_cpu
+            max_inflight_per_connection: 每个连接同时占用的线程数上限
+            workers_per_cpu: 每个CPU核对应的线程数，连接任务以等待网络IO为主（上报、记忆等）
+            max_llm_streams: 同时在线程中迭代的流式LLM生成数上限，超出的排队等待
+        """
+        if not max_workers:
+            max_workers = (os.cpu_count() or 1) * max(1, int(workers_per_cpu))
+        self.max_workers = int(max_workers)
+        self.max_inflight_per_connection = max_inflight_per_connection
+        self.max_llm_streams = max(1, int(max_llm_streams))
+        self.pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="conn-worker"
+        )
+        self.stream_pool = ThreadPoolExecutor(
+            max_workers=self.max_llm_streams, thread_name_prefix="llm-stream"
+        )
+
+    def for_connection(self) -> ConnectionExecutor:
+        """为一个连接创建带并发上限的执行器"""
+        return ConnectionExecutor(self.pool, self.max_inflight_per_connection)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """提交不属于任何连接的任务"""
+        return self.pool.submit(fn, *args, **kwargs)
+
+    def submit_stream(self, fn: Callable, *args, **kwargs) -> Future:
+        """提交迭代流式LLM生成的任务，在整轮生成期间占用 stream_pool 中的一个线程"""
+        return self.stream_pool.submit(fn, *args, **kwargs)
+
+    def stats(self) -> dict:
+        """线程池统计信息：线程数上限、已创建线程数、等待空闲线程的任务数"""
+        return {
+            "max_workers": self.max_workers,
+            "threads": len(self.pool._threads),
+            "queued": self.pool._work_queue.qsize(),
+            "llm_stream_threads": len(self.stream_pool._threads),
+            "llm_stream_queued": self.stream_pool._work_queue.qsize(),
+        }
+
+
+# 全局单例
+_shared_executor = None
+_shared_executor_lock = threading.Lock()
+
+
+def _create_shared_executor(config: dict) -> SharedExecutor:
+    executor_config = config.get("connection_executor") or {}
+    return SharedExecutor(
+        max_workers=executor_config.get("max_workers"),
+        max_inflight_per_connection=int(
+            executor_config.get("max_inflight_per_connection", 4)
+        ),
+        workers_per_cpu=int(executor_config.get("workers_per_cpu", 4)),
+        max_llm_streams=int(executor_config.get("max_llm_streams", 64)),
+    )
+
+
+def configure_shared_executor(config: dict) -> SharedExecutor:
+    """按启动时已加载的配置创建进程级共享线程池，由 app.main 调用"""
+    global _shared_executor
+    with _shared_executor_lock:
+        _shared_executor = _create_shared_executor(config)
+    return _shared_executor
+
+
+def get_shared_executor() -> SharedExecutor:
+    """
+    获取进程级共享线程池（单例模式），配置由 configure_shared_executor 设置，
+    未设置时使用默认配置
+
+    Returns:
+        SharedExecutor实例
+    """
+    global _shared_executor
+    if _shared_executor is None:
+        with _shared_executor_lock:
+            if _shared_executor is None:
+                _shared_executor = _create_shared_executor({})
+    return _shared_executor
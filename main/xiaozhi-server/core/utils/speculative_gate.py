@@ -0,0 +1,54 @@
+"""
+推测执行闸门
+意图识别与主对话同时开始时，主对话产生的输出（TTS文本、表情等）先缓冲在闸门中：
+- 意图识别判定为普通聊天：放行，缓冲的输出按顺序交给TTS，之后的输出直接发送
+- 意图识别命中工具或退出：丢弃缓冲，由调用方取消主对话
+"""
+
+import asyncio
+from typing import Callable, List, Optional
+
+
+class SpeculativeGate:
+    """推测执行闸门，只在连接的事件循环中使用"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._future = loop.create_future()
+        self._pending: List[Callable[[], None]] = []
+        # 由主对话填写：本轮的sentence_id和写入对话历史的用户消息，用于放行或回滚
+        self.sentence_id: Optional[str] = None
+        self.user_message = None
+
+    @property
+    def released(self) -> bool:
+        return self._future.done() and self._future.result()
+
+    @property
+    def discarded(self) -> bool:
+        return self._future.done() and not self._future.result()
+
+    def run(self, fn: Callable[[], None]):
+        """已放行时直接执行，未决时缓冲，已丢弃时忽略"""
+        if self.released:
+            fn()
+        elif not self._future.done():
+            self._pending.append(fn)
+
+    def release(self):
+        """放行并按顺序执行缓冲的输出"""
+        if self._future.done():
+            return
+        self._future.set_result(True)
+        pending, self._pending = self._pending, []
+        for fn in pending:
+            fn()
+
+    def discard(self):
+        """丢弃缓冲的输出"""
+        if not self._future.done():
+            self._future.set_result(False)
+        self._pending.clear()
+
+    async def wait(self) -> bool:
+        """等待意图识别结果，放行返回True，丢弃返回False"""
+        return await asyncio.shield(self._future)
@@ -0,0 +1,84 @@
+"""
+启动编排
+- 各模块在 initialize_modules 中并行加载，供应商模块只在被选中时才导入
+- 开始接受连接前，对本地模型（VAD、本地ASR）各做一次合成音频推理预热
+- 预热完成并开始监听后标记为就绪，HTTP服务的 /health 接口和 xiaozhi_ready 指标据此返回状态
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+from config.logger import setup_logging
+from core.utils.metrics import get_metrics_registry
+
+TAG = __name__
+logger = setup_logging()
+
+_metrics = get_metrics_registry()
+STARTUP_SECONDS = _metrics.gauge(
+    "xiaozhi_startup_seconds", "最近一次启动或配置重载中各阶段的耗时（秒）", ["phase"]
+)
+READY = _metrics.gauge("xiaozhi_ready", "是否已完成初始化和预热、可以接受连接")
+READY.set(0)
+
+_ready = threading.Event()
+
+
+def get_startup_config(config: dict) -> dict:
+    startup_config = config.get("startup") or {}
+    return {
+        "parallel_init": bool(startup_config.get("parallel_init", True)),
+        "warmup": bool(startup_config.get("warmup", True)),
+    }
+
+
+def record_phase(phase: str, elapsed: float):
+    STARTUP_SECONDS.set(round(elapsed, 3), phase)
+
+
+def warmup_modules(modules: Dict[str, Any]) -> float:
+    """
+    并行预热提供了 warmup 方法的模块，单个模块预热失败只记录日志，不影响启动
+
+    Returns:
+        预热总耗时（秒）
+    """
+    targets = {
+        name: module
+        for name, module in modules.items()
+        if callable(getattr(module, "warmup", None))
+    }
+    if not targets:
+        return 0.0
+
+    def run(name, module):
+        start = time.monotonic()
+        try:
+            module.warmup()
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"模块预热失败: {name}，错误: {e}")
+            return
+        elapsed = time.monotonic() - start
+        record_phase(f"warmup_{name}", elapsed)
+        logger.bind(tag=TAG).info(f"模块预热完成: {name}，耗时 {elapsed:.3f}s")
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(
+        max_workers=len(targets), thread_name_prefix="module-warmup"
+    ) as pool:
+        for name, module in targets.items():
+            pool.submit(run, name, module)
+    elapsed = time.monotonic() - start
+    record_phase("warmup", elapsed)
+    return elapsed
+
+
+def mark_ready():
+    """模块加载、预热完成且已开始监听"""
+    _ready.set()
+    READY.set(1)
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
@@ -0,0 +1,66 @@
+"""
+流式文本分句器
+LLM逐字输出时，只扫描新追加的文本寻找断句标点，已扫描过的文本不再重复拼接和查找，
+整段回复的分句开销与文本长度成线性关系
+"""
+
+from typing import Iterable, List, Optional
+
+
+class StreamingTextSegmenter:
+    """流式文本分句器"""
+
+    def __init__(
+        self,
+        punctuations: Iterable[str],
+        first_sentence_punctuations: Iterable[str],
+    ):
+        """
+        Args:
+            punctuations: 普通句子的断句标点
+            first_sentence_punctuations: 第一句的断句标点（通常包含逗号，让首句尽快合成）
+        """
+        self.punctuations = frozenset(punctuations)
+        self.first_sentence_punctuations = frozenset(first_sentence_punctuations)
+        self._pieces: List[str] = []  # 尚未输出的文本片段
+        self.is_first_sentence = True
+
+    def reset(self):
+        """开始新一轮对话"""
+        self._pieces = []
+        self.is_first_sentence = True
+
+    def append(self, text: str) -> Optional[str]:
+        """追加文本，新文本中出现断句标点时返回到最后一个标点为止的完整片段"""
+        if not text:
+            return None
+        self._pieces.append(text)
+
+        punctuations = (
+            self.first_sentence_punctuations
+            if self.is_first_sentence
+            else self.punctuations
+        )
+        # 只需在新追加的文本中从后往前查找，之前的文本已确认没有断句标点
+        for pos in range(len(text) - 1, -1, -1):
+            if text[pos] in punctuations:
+                break
+        else:
+            return None
+
+        self._pieces[-1] = text[: pos + 1]
+        segment = "".join(self._pieces)
+        remainder = text[pos + 1 :]
+        self._pieces = [remainder] if remainder else []
+        self.is_first_sentence = False
+        return segment
+
+    def flush(self) -> str:
+        """取出剩余未输出的文本"""
+        remaining = "".join(self._pieces)
+        self._pieces = []
+        return remaining
+
+    def has_pending(self) -> bool:
+        """是否还有未输出的文本"""
+        return bool(self._pieces)
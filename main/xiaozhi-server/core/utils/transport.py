@@ -0,0 +1,347 @@
+"""
+进程级网络传输注册表
+为所有TTS、LLM供应商提供按服务端点复用的HTTP连接池和WebSocket连接池：
+- 主事件循环上的HTTP请求在共享线程池中执行，不阻塞事件循环；TTS线程等私有事件循环中直接执行，
+  不占用共享线程。同一端点复用keep-alive连接，每句话不再重新进行TCP+TLS握手
+- httpx客户端按服务端点共享（异步客户端按事件循环区分），供openai等SDK复用连接
+- WebSocket连接在会话结束后归还到池中，其他连接可以直接复用
+"""
+
+import time
+import asyncio
+import hashlib
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from http.cookiejar import DefaultCookiePolicy
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class _HttpPool:
+    """单个服务端点的HTTP连接池"""
+
+    __slots__ = ("session", "last_used", "active", "retired")
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+        self.last_used = time.monotonic()
+        # 经 request/stream 发出、尚未结束的请求数
+        self.active = 0
+        # 已被新的连接池替换，在途请求结束后关闭
+        self.retired = False
+
+
+class TransportRegistry:
+    """进程级网络传输注册表"""
+
+    def __init__(
+        self,
+        max_workers: int = 32,
+        max_connections_per_host: int = 16,
+        http_idle_timeout: float = 60,
+        ws_max_idle_per_key: int = 8,
+    ):
+        """
+        Args:
+            max_workers: 执行HTTP请求的共享线程数
+            max_connections_per_host: 每个服务端点最多保持的HTTP连接数
+            http_idle_timeout: HTTP连接池空闲超过该时间（秒）后重建，避免使用已被服务端关闭的连接
+            ws_max_idle_per_key: 每个WebSocket端点最多保留的空闲连接数
+        """
+        self.max_connections_per_host = max_connections_per_host
+        self.http_idle_timeout = http_idle_timeout
+        self.ws_max_idle_per_key = ws_max_idle_per_key
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="transport"
+        )
+        self._http_pools: Dict[str, _HttpPool] = {}
+        self._http_lock = threading.Lock()
+        self._httpx_clients: Dict[str, httpx.Client] = {}
+        # (服务端点, 事件循环) -> httpx.AsyncClient
+        self._async_httpx_clients: Dict[
+            Tuple[str, asyncio.AbstractEventLoop], httpx.AsyncClient
+        ] = {}
+        # key -> [(ws, 所属事件循环, 归还时间)]
+        self._ws_idle: Dict[str, List[Tuple[Any, asyncio.AbstractEventLoop, float]]] = {}
+        self._ws_lock = threading.Lock()
+
+    # ------------------------------ HTTP ------------------------------
+
+    @contextmanager
+    def http_session(self, url: str):
+        """获取服务端点对应的连接池会话，可在任意线程中直接使用
+
+        会话只在 with 块内有效，期间计入在途请求，连接池被替换时等退出后再关闭；
+        流式响应需在 with 块内读取完毕
+        """
+        pool = self._get_pool(url, acquire=True)
+        try:
+            yield pool.session
+        finally:
+            self._release_pool(pool)
+
+    def _get_pool(self, url: str, acquire: bool = False) -> _HttpPool:
+        endpoint = self._endpoint(url)
+        now = time.monotonic()
+        with self._http_lock:
+            pool = self._http_pools.get(endpoint)
+            if pool is None or now - pool.last_used > self.http_idle_timeout:
+                # 长时间空闲的连接大多已被服务端关闭，直接换一个新的连接池，
+                # 旧连接池在其在途请求结束后关闭
+                if pool is not None:
+                    pool.retired = True
+                    if pool.active == 0:
+                        pool.session.close()
+                pool = _HttpPool(self._create_session())
+                self._http_pools[endpoint] = pool
+            pool.last_used = now
+            if acquire:
+                pool.active += 1
+        return pool
+
+    def _release_pool(self, pool: _HttpPool):
+        with self._http_lock:
+            pool.active -= 1
+            if not pool.retired or pool.active > 0:
+                return
+        pool.session.close()
+
+    async def _run_blocking(self, func, *args):
+        """主事件循环中放到共享线程池执行；其他线程的私有事件循环（如TTS线程中的
+        asyncio.run）只运行这一个任务，直接执行，不占用共享线程"""
+        if threading.current_thread() is not threading.main_thread():
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送HTTP请求，返回requests.Response
+
+        传入 stream=True 时响应体需配合 iter_content 读取，读取完毕后调用 response.close()
+        """
+        pool = self._get_pool(url, acquire=True)
+        try:
+            return await self._run_blocking(
+                lambda: pool.session.request(method, url, **kwargs)
+            )
+        finally:
+            self._release_pool(pool)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """发送流式HTTP请求，配合 iter_content 逐块读取响应体，退出时释放连接"""
+        pool = self._get_pool(url, acquire=True)
+        try:
+            response = await self._run_blocking(
+                lambda: pool.session.request(method, url, stream=True, **kwargs)
+            )
+            try:
+                yield response
+            finally:
+                response.close()
+        finally:
+            self._release_pool(pool)
+
+    async def iter_content(
+        self, response: requests.Response, chunk_size: int = 4096
+    ) -> AsyncIterator[bytes]:
+        """逐块读取流式响应"""
+        iterator = response.iter_content(chunk_size=chunk_size)
+        while True:
+            chunk = await self._run_blocking(next, iterator, None)
+            if chunk is None:
+                break
+            if chunk:
+                yield chunk
+
+    def httpx_client(self, url: str) -> httpx.Client:
+        """获取服务端点共享的同步httpx客户端，可作为openai.OpenAI的http_client"""
+        endpoint = self._endpoint(url)
+        with self._http_lock:
+            client = self._httpx_clients.get(endpoint)
+            if client is None or client.is_closed:
+                client = httpx.Client(limits=self._httpx_limits())
+                self._httpx_clients[endpoint] = client
+        return client
+
+    def async_httpx_client(self, url: str) -> httpx.AsyncClient:
+        """获取服务端点在当前事件循环中共享的异步httpx客户端
+
+        异步客户端的连接绑定在创建它的事件循环上，不同事件循环各自持有一个
+        """
+        loop = asyncio.get_running_loop()
+        key = (self._endpoint(url), loop)
+        with self._http_lock:
+            client = self._async_httpx_clients.get(key)
+            if client is None or client.is_closed:
+                # 顺带清理已关闭事件循环的客户端
+                for stale in [k for k in self._async_httpx_clients if k[1].is_closed()]:
+                    del self._async_httpx_clients[stale]
+                client = httpx.AsyncClient(limits=self._httpx_limits())
+                self._async_httpx_clients[key] = client
+        return client
+
+    def _httpx_limits(self) -> httpx.Limits:
+        # 流式响应会长时间占用连接，不限制并发连接数，只限制保留的空闲连接数
+        return httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=self.max_connections_per_host,
+            keepalive_expiry=self.http_idle_timeout,
+        )
+
+    @staticmethod
+    def _endpoint(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        # 会话被多个连接共享，不保存任何Cookie
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        # 只对建立连接失败进行重试，已发出的请求不会重复发送
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_connections_per_host,
+            max_retries=Retry(total=2, connect=2, read=0, status=0, redirect=3),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    # ---------------------------- WebSocket ----------------------------
+
+    @staticmethod
+    def websocket_key(url: str, headers: Dict[str, str] = None) -> str:
+        """按地址和请求头（包含鉴权信息）生成WebSocket连接池的键"""
+        raw = url + "\n" + "\n".join(
+            f"{k}:{v}" for k, v in sorted((headers or {}).items())
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    async def acquire_websocket(
+        self, key: str, connect: Callable[[], Awaitable[Any]], max_idle: float = 60
+    ):
+        """从池中取出一个健康的空闲连接，没有时调用connect新建
+
+        Args:
+            key: 连接池的键，见 websocket_key
+            connect: 新建连接的协程函数
+            max_idle: 空闲超过该时间（秒）的连接不再复用
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        unhealthy = []
+        ws = None
+        with self._ws_lock:
+            idle = self._ws_idle.get(key, [])
+            while idle:
+                candidate, candidate_loop, released_at = idle.pop()
+                if (
+                    candidate_loop is loop
+                    and now - released_at < max_idle
+                    and self._is_open(candidate)
+                ):
+                    ws = candidate
+                    break
+                unhealthy.append((candidate, candidate_loop))
+        for candidate, candidate_loop in unhealthy:
+            self._close_websocket(candidate, candidate_loop)
+        if ws is not None:
+            logger.bind(tag=TAG).debug("复用WebSocket连接池中的连接")
+            return ws
+        return await connect()
+
+    def release_websocket(self, key: str, ws):
+        """会话已正常结束的连接归还到池中，池已满或连接不可用时关闭"""
+        loop = asyncio.get_running_loop()
+        if self._is_open(ws):
+            with self._ws_lock:
+                idle = self._ws_idle.setdefault(key, [])
+                if len(idle) < self.ws_max_idle_per_key:
+                    idle.append((ws, loop, time.monotonic()))
+                    return
+        self._close_websocket(ws, loop)
+
+    def stats(self) -> dict:
+        """连接池统计信息"""
+        with self._ws_lock:
+            ws_idle = sum(len(idle) for idle in self._ws_idle.values())
+        return {
+            "http_pools": len(self._http_pools),
+            "httpx_clients": len(self._httpx_clients),
+            "async_httpx_clients": len(self._async_httpx_clients),
+            "ws_idle": ws_idle,
+            "queued": self._executor._work_queue.qsize(),
+        }
+
+    @staticmethod
+    def _is_open(ws) -> bool:
+        try:
+            from websockets.protocol import State
+
+            return ws.state is State.OPEN
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_websocket(ws, loop: asyncio.AbstractEventLoop):
+        if loop.is_closed():
+            return
+        try:
+            if loop is asyncio.get_running_loop():
+                loop.create_task(ws.close())
+                return
+        except RuntimeError:
+            pass
+        asyncio.run_coroutine_threadsafe(ws.close(), loop)
+
+
+# 全局单例
+_transport_registry = None
+_transport_lock = threading.Lock()
+
+
+def _create_transport_registry(config: dict) -> TransportRegistry:
+    transport_config = config.get("transport") or {}
+    return TransportRegistry(
+        max_workers=int(transport_config.get("max_workers", 32)),
+        max_connections_per_host=int(
+            transport_config.get("max_connections_per_host", 16)
+        ),
+        http_idle_timeout=float(transport_config.get("http_idle_timeout", 60)),
+        ws_max_idle_per_key=int(transport_config.get("ws_max_idle_per_key", 8)),
+    )
+
+
+def configure_transport_registry(config: dict) -> TransportRegistry:
+    """按启动时已加载的配置创建全局网络传输注册表，由 app.main 调用"""
+    global _transport_registry
+    with _transport_lock:
+        _transport_registry = _create_transport_registry(config)
+    return _transport_registry
+
+
+def get_transport_registry() -> TransportRegistry:
+    """
+    获取全局网络传输注册表（单例模式），配置由 configure_transport_registry 设置，
+    未设置时使用默认配置
+
+    Returns:
+        TransportRegistry实例
+    """
+    global _transport_registry
+    if _transport_registry is None:
+        with _transport_lock:
+            if _transport_registry is None:
+                _transport_registry = _create_transport_registry({})
+    return _transport_registry
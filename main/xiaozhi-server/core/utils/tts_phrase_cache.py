@@ -0,0 +1,210 @@
+"""
+TTS短语缓存
+将常用短句（问候语、"好的"、结束语、错误提示等）合成后的Opus数据包缓存到本地磁盘，
+并在内存中保留一层LRU，命中时直接跳过语音合成、解码和Opus编码
+"""
+
+import os
+import re
+import struct
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class TTSPhraseCache:
+    """TTS短语缓存：内存LRU + 磁盘持久化"""
+
+    def __init__(
+        self,
+        cache_dir: str = "data/tts_cache",
+        enabled: bool = True,
+        max_text_length: int = 50,
+        max_memory_items: int = 512,
+        max_disk_items: int = 10000,
+    ):
+        """
+        Args:
+            cache_dir: 磁盘缓存目录
+            enabled: 是否启用缓存
+            max_text_length: 只缓存不超过该长度的短句
+            max_memory_items: 内存中最多保留的短句数
+            max_disk_items: 磁盘上最多保留的短句数，超出后清理最旧的一部分
+        """
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.max_text_length = max_text_length
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self._memory: "OrderedDict[str, List[bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_count = None  # 首次写入时统计
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """规范化文本，使只有空白差异的同一句话命中同一条缓存（大小写不同的短语读音可能不同，不合并）"""
+        return re.sub(r"\s+", " ", text).strip()
+
+    def make_key(
+        self, provider: str, voice: str, text: str, sample_rate: int = 16000
+    ) -> Optional[str]:
+        """生成缓存键，文本不适合缓存时返回None"""
+        if not self.enabled or not text:
+            return None
+        normalized = self.normalize_text(text)
+        if not normalized or len(normalized) > self.max_text_length:
+            return None
+        raw = "\x1f".join([provider, str(voice), normalized, str(sample_rate)])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[bytes]]:
+        """获取缓存的Opus数据包列表"""
+        with self._lock:
+            packets = self._memory.get(key)
+            if packets is not None:
+                self._memory.move_to_end(key)
+                return packets
+
+        file_path = self._file_path(key)
+        if not os.path.exists(file_path):
+            return None
+        try:
+            packets = self._read_packets(file_path)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"读取TTS短语缓存失败，已删除: {e}")
+            self._remove_file(file_path)
+            return None
+        self._remember(key, packets)
+        return packets
+
+    def put(self, key: str, packets: List[bytes]):
+        """写入缓存"""
+        if not packets:
+            return
+        packets = list(packets)
+        self._remember(key, packets)
+        file_path = self._file_path(key)
+        if os.path.exists(file_path):
+            return
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            # 先写临时文件再替换，避免并发读取到写了一半的文件；
+            # 多个工作进程共用缓存目录，临时文件名由mkstemp保证唯一
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(file_path), suffix=".tmp"
+            )
+            with os.fdopen(fd, "wb") as f:
+                for packet in packets:
+                    # 与p3格式一致：[1字节类型，1字节保留，2字节长度] + Opus数据
+                    f.write(struct.pack(">BBH", 0, 0, len(packet)))
+                    f.write(packet)
+            os.replace(tmp_path, file_path)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"写入TTS短语缓存失败: {e}")
+            if tmp_path is not None:
+                self._remove_file(tmp_path)
+            return
+        self._on_disk_write()
+
+    def _remember(self, key: str, packets: List[bytes]):
+        with self._lock:
+            self._memory[key] = packets
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def _file_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.p3")
+
+    @staticmethod
+    def _read_packets(file_path: str) -> List[bytes]:
+        packets = []
+        with open(file_path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset < len(data):
+            _, _, data_len = struct.unpack_from(">BBH", data, offset)
+            offset += 4
+            packet = data[offset : offset + data_len]
+            if len(packet) != data_len:
+                raise ValueError(f"数据长度({len(packet)})与头部({data_len})不一致")
+            packets.append(packet)
+            offset += data_len
+        return packets
+
+    @staticmethod
+    def _remove_file(file_path: str):
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+    def _list_files(self) -> List[str]:
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            files.extend(os.path.join(root, name) for name in names if name.endswith(".p3"))
+        return files
+
+    def _on_disk_write(self):
+        """统计磁盘条目数，超出上限时删除最旧的10%"""
+        with self._lock:
+            if self._disk_count is None:
+                self._disk_count = len(self._list_files())
+            else:
+                self._disk_count += 1
+            if self._disk_count <= self.max_disk_items:
+                return
+            files = sorted(self._list_files(), key=lambda p: os.path.getmtime(p))
+            remove_count = max(1, len(files) - self.max_disk_items + self.max_disk_items // 10)
+            for file_path in files[:remove_count]:
+                self._remove_file(file_path)
+            self._disk_count = len(files) - remove_count
+        logger.bind(tag=TAG).info(f"TTS短语缓存超出上限，已清理 {remove_count} 条")
+
+
+# 全局单例
+_phrase_cache_instance = None
+_phrase_cache_lock = threading.Lock()
+
+
+def _create_tts_phrase_cache(config: dict) -> TTSPhraseCache:
+    cache_config = config.get("tts_phrase_cache") or {}
+    data_dir = config.get("log", {}).get("data_dir", "data")
+    return TTSPhraseCache(
+        cache_dir=cache_config.get("cache_dir", os.path.join(data_dir, "tts_cache")),
+        enabled=cache_config.get("enabled", True),
+        max_text_length=int(cache_config.get("max_text_length", 50)),
+        max_memory_items=int(cache_config.get("max_memory_items", 512)),
+        max_disk_items=int(cache_config.get("max_disk_items", 10000)),
+    )
+
+
+def configure_tts_phrase_cache(config: dict) -> TTSPhraseCache:
+    """按启动时已加载的配置创建全局TTS短语缓存，由 app.main 调用"""
+    global _phrase_cache_instance
+    with _phrase_cache_lock:
+        _phrase_cache_instance = _create_tts_phrase_cache(config)
+    return _phrase_cache_instance
+
+
+def get_tts_phrase_cache() -> TTSPhraseCache:
+    """
+    获取全局TTS短语缓存实例（单例模式），配置由 configure_tts_phrase_cache 设置，
+    未设置时（如独立运行的测试工具）使用默认配置
+
+    Returns:
+        TTSPhraseCache实例
+    """
+    global _phrase_cache_instance
+    if _phrase_cache_instance is None:
+        with _phrase_cache_lock:
+            if _phrase_cache_instance is None:
+                _phrase_cache_instance = _create_tts_phrase_cache({})
+    return _phrase_cache_instance
@@ -0,0 +1,100 @@
+"""
+单轮对话耗时追踪
+从用户说完话（或发来文本）开始，记录本轮经过各阶段的时间点：
+speech_end/text_input -> asr_done -> intent_done -> llm_request -> llm_first_token
+-> tts_start -> tts_first_audio -> first_packet_sent -> last_packet_queued
+本轮结束时输出一行耗时明细日志，并写入 xiaozhi_turn_stage_seconds 直方图，
+用于定位“首包音频慢”具体慢在哪个阶段。
+按 sample_rate 采样，未采样的轮次不产生任何开销。
+"""
+
+import time
+import random
+from typing import Dict, Optional
+from config.logger import setup_logging
+from core.utils.metrics import get_metrics_registry
+
+TAG = __name__
+logger = setup_logging()
+
+TURN_STAGE_SECONDS = get_metrics_registry().histogram(
+    "xiaozhi_turn_stage_seconds",
+    "一轮对话从开始到各阶段的耗时（秒）",
+    ["stage"],
+    buckets=(0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10, 30),
+)
+TURNS_TOTAL = get_metrics_registry().counter(
+    "xiaozhi_traced_turns_total", "已追踪的对话轮次", ["result"]
+)
+
+
+class TurnTrace:
+    """一轮对话的阶段时间点，只记录每个阶段第一次到达的时间"""
+
+    __slots__ = ("session_id", "sentence_id", "start_stage", "start", "marks", "log")
+
+    def __init__(self, session_id: str, start_stage: str, log: bool = True):
+        self.session_id = session_id
+        self.sentence_id: Optional[str] = None
+        self.start_stage = start_stage
+        self.start = time.monotonic()
+        # 阶段 -> 距本轮开始的秒数，按到达顺序排列
+        self.marks: Dict[str, float] = {}
+        self.log = log
+
+    def mark(self, stage: str):
+        if stage not in self.marks:
+            self.marks[stage] = time.monotonic() - self.start
+
+    def finish(self, result: str = "completed"):
+        for stage, elapsed in self.marks.items():
+            TURN_STAGE_SECONDS.observe(elapsed, stage)
+        TURNS_TOTAL.inc(result)
+        if self.log:
+            detail = ", ".join(
+                f"{stage}={elapsed:.3f}s" for stage, elapsed in self.marks.items()
+            )
+            logger.bind(tag=TAG).info(
+                f"对话耗时[{result}] session={self.session_id} "
+                f"sentence={self.sentence_id} {self.start_stage}起: {detail}"
+            )
+
+
+def start_turn(conn, stage: str):
+    """开始追踪新的一轮，上一轮未结束时记为被打断"""
+    finish_turn(conn, "interrupted")
+    trace_config = conn.config.get("turn_trace") or {}
+    if not trace_config.get("enabled", False):
+        return
+    if random.random() >= float(trace_config.get("sample_rate", 1.0)):
+        return
+    conn.turn_trace = TurnTrace(
+        conn.session_id, stage, log=trace_config.get("log", True)
+    )
+
+
+def mark(conn, stage: str):
+    """记录当前轮到达某阶段，没有在追踪时什么也不做"""
+    trace = getattr(conn, "turn_trace", None)
+    if trace is not None:
+        trace.mark(stage)
+
+
+def bind_sentence(conn, sentence_id: str):
+    """关联本轮的sentence_id，便于与其他日志对应"""
+    trace = getattr(conn, "turn_trace", None)
+    if trace is not None and trace.sentence_id is None:
+        trace.sentence_id = sentence_id
+
+
+def is_tracing(conn) -> bool:
+    return getattr(conn, "turn_trace", None) is not None
+
+
+def finish_turn(conn, result: str = "completed"):
+    """结束当前轮并输出耗时明细"""
+    trace = getattr(conn, "turn_trace", None)
+    if trace is None:
+        return
+    conn.turn_trace = None
+    trace.finish(result)
@@ -5,13 +5,13 @@ import copy
 import wave
 import socket
 import asyncio
+import threading
 import requests
 import subprocess
-import numpy as np
 import opuslib_next
 from io import BytesIO
 from core.utils import p3
-from pydub import AudioSegment
+from core.utils.audio_decoder import decode_to_pcm
 from typing import Callable, Any
 
 TAG = __name__
@@ -229,20 +229,10 @@ def extract_json_from_string(input_string):
 def audio_to_data_stream(
     audio_file_path, is_opus=True, callback: Callable[[Any], Any] = None
 ) -> None:
-    # 获取文件后缀名
-    file_type = os.path.splitext(audio_file_path)[1]
-    if file_type:
-        file_type = file_type.lstrip(".")
-    # 读取音频文件，-nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
-    audio = AudioSegment.from_file(
-        audio_file_path, format=file_type, parameters=["-nostdin"]
-    )
-
-    # 转换为单声道/16kHz采样率/16位小端编码（确保与编码器匹配）
-    audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
-
-    # 获取原始PCM数据（16位小端）
-    raw_data = audio.raw_data
+    if audio_file_path.endswith(".p3"):
+        return p3.decode_opus_from_file_stream(audio_file_path, callback)
+    # 获取16kHz/单声道/16位小端PCM数据
+    raw_data = decode_to_pcm(audio_file_path)
     pcm_to_data_stream(raw_data, is_opus, callback)
 
 
@@ -269,48 +259,8 @@ async def audio_to_data(
             return cached_result
 
     def _sync_audio_to_data():
-        # 获取文件后缀名
-        file_type = os.path.splitext(audio_file_path)[1]
-        if file_type:
-            file_type = file_type.lstrip(".")
-        # 读取音频文件，-nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
-        audio = AudioSegment.from_file(
-            audio_file_path, format=file_type, parameters=["-nostdin"]
-        )
-
-        # 转换为单声道/16kHz采样率/16位小端编码（确保与编码器匹配）
-        audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
-
-        # 获取原始PCM数据（16位小端）
-        raw_data = audio.raw_data
-
-        # 初始化Opus编码器
-        encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
-
-        # 编码参数
-        frame_duration = 60  # 60ms per frame
-        frame_size = int(16000 * frame_duration / 1000)  # 960 samples/frame
-
         datas = []
-        # 按帧处理所有音频数据（包括最后一帧可能补零）
-        for i in range(0, len(raw_data), frame_size * 2):  # 16bit=2bytes/sample
-            # 获取当前帧的二进制数据
-            chunk = raw_data[i : i + frame_size * 2]
-
-            # 如果最后一帧不足，补零
-            if len(chunk) < frame_size * 2:
-                chunk += b"\x00" * (frame_size * 2 - len(chunk))
-
-            if is_opus:
-                # 转换为numpy数组处理
-                np_frame = np.frombuffer(chunk, dtype=np.int16)
-                # 编码Opus数据
-                frame_data = encoder.encode(np_frame.tobytes(), frame_size)
-            else:
-                frame_data = chunk if isinstance(chunk, bytes) else bytes(chunk)
-
-            datas.append(frame_data)
-
+        audio_to_data_stream(audio_file_path, is_opus, datas.append)
         return datas
 
     loop = asyncio.get_running_loop()
@@ -328,24 +278,33 @@ def audio_bytes_to_data_stream(
     audio_bytes, file_type, is_opus, callback: Callable[[Any], Any]
 ) -> None:
     """
-    直接用音频二进制数据转为opus/pcm数据，支持wav、mp3、p3
+    直接用音频二进制数据转为opus/pcm数据，支持wav、mp3、p3、pcm等
     """
     if file_type == "p3":
         # 直接用p3解码
         return p3.decode_opus_from_bytes_stream(audio_bytes, callback)
     else:
-        # 其他格式用pydub
-        audio = AudioSegment.from_file(
-            BytesIO(audio_bytes), format=file_type, parameters=["-nostdin"]
-        )
-        audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
-        raw_data = audio.raw_data
+        raw_data = decode_to_pcm(audio_bytes, file_type)
         pcm_to_data_stream(raw_data, is_opus, callback)
 
 
+_encoder_local = threading.local()
+
+
+def _get_thread_encoder():
+    """每个线程复用一个Opus编码器，避免每段音频都重新创建"""
+    encoder = getattr(_encoder_local, "encoder", None)
+    if encoder is None:
+        encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
+        _encoder_local.encoder = encoder
+    else:
+        encoder.reset_state()
+    return encoder
+
+
 def pcm_to_data_stream(raw_data, is_opus=True, callback: Callable[[Any], Any] = None):
-    # 初始化Opus编码器
-    encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
+    # 获取当前线程的Opus编码器（已重置状态）
+    encoder = _get_thread_encoder() if is_opus else None
 
     # 编码参数
     frame_duration = 60  # 60ms per frame
@@ -361,10 +320,8 @@ def pcm_to_data_stream(raw_data, is_opus=True, callback: Callable[[Any], Any] =
             chunk += b"\x00" * (frame_size * 2 - len(chunk))
 
         if is_opus:
-            # 转换为numpy数组处理
-            np_frame = np.frombuffer(chunk, dtype=np.int16)
             # 编码Opus数据
-            frame_data = encoder.encode(np_frame.tobytes(), frame_size)
+            frame_data = encoder.encode(bytes(chunk), frame_size)
             callback(frame_data)
         else:
             frame_data = chunk if isinstance(chunk, bytes) else bytes(chunk)
@@ -0,0 +1,254 @@
+"""
+多进程工作模式
+server.workers 大于1时，app.py 以主控进程身份启动，拉起多个工作进程，
+每个工作进程各自运行 WebSocketServer 和 SimpleHttpServer，
+通过 SO_REUSEPORT 共享同一个监听端口，由内核在进程间分配新连接。
+
+主控进程与工作进程之间通过信号协作：
+- SIGTERM/SIGINT: 主控进程转发给所有工作进程，工作进程停止接收新连接并等待已有会话结束
+- SIGHUP: 主控进程广播给所有工作进程，各自重新拉取配置
+- SIGUSR2: 滚动重启，逐个拉起新的工作进程，新进程就绪后再让旧进程排空退出
+"""
+
+import os
+import sys
+import signal
+import asyncio
+from typing import Dict, Optional
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 工作进程编号，只在工作进程中存在
+WORKER_ID_ENV = "XIAOZHI_WORKER_ID"
+# 工作进程通知主控进程已就绪的管道
+WORKER_READY_FD_ENV = "XIAOZHI_WORKER_READY_FD"
+# 所有工作进程共用主控进程确定的auth_key，保证各进程签发的token互相认可
+AUTH_KEY_ENV = "XIAOZHI_AUTH_KEY"
+
+
+def get_worker_count(config: dict) -> int:
+    """读取工作进程数，Windows不支持SO_REUSEPORT，固定为单进程"""
+    if sys.platform == "win32" or not hasattr(signal, "SIGHUP"):
+        return 1
+    try:
+        return max(1, int(config.get("server", {}).get("workers", 1) or 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def get_drain_timeout(config: dict) -> float:
+    """读取工作进程退出前等待会话结束的最长时间（秒）"""
+    return float(config.get("server", {}).get("drain_timeout", 30))
+
+
+def is_worker() -> bool:
+    """当前进程是否为主控进程拉起的工作进程"""
+    return WORKER_ID_ENV in os.environ
+
+
+def get_worker_id() -> Optional[str]:
+    return os.environ.get(WORKER_ID_ENV)
+
+
+def notify_supervisor(sig: int) -> bool:
+    """工作进程向主控进程发送信号，非工作进程直接返回False"""
+    if not is_worker():
+        return False
+    try:
+        os.kill(os.getppid(), sig)
+        return True
+    except OSError as e:
+        logger.bind(tag=TAG).error(f"通知主控进程失败: {e}")
+        return False
+
+
+def request_rolling_restart() -> bool:
+    """工作进程请求主控进程滚动重启，非工作进程直接返回False"""
+    if not is_worker():
+        return False
+    return notify_supervisor(signal.SIGUSR2)
+
+
+def notify_ready():
+    """工作进程开始监听后通知主控进程，只会通知一次"""
+    fd = os.environ.pop(WORKER_READY_FD_ENV, None)
+    if fd is None:
+        return
+    try:
+        os.write(int(fd), b"1")
+        os.close(int(fd))
+    except OSError:
+        pass
+
+
+class _Worker:
+    __slots__ = ("worker_id", "process", "ready_fd")
+
+    def __init__(self, worker_id: int, process, ready_fd: int):
+        self.worker_id = worker_id
+        self.process = process
+        self.ready_fd = ready_fd
+
+
+class WorkerSupervisor:
+    """主控进程：拉起、监控、重启工作进程"""
+
+    def __init__(
+        self,
+        workers: int,
+        auth_key: str,
+        drain_timeout: float = 30,
+        ready_timeout: float = 120,
+    ):
+        """
+        Args:
+            workers: 工作进程数
+            auth_key: 下发给所有工作进程的auth_key
+            drain_timeout: 工作进程排空会话的最长时间（秒）
+            ready_timeout: 滚动重启时等待新工作进程就绪的最长时间（秒）
+        """
+        self.workers = workers
+        self.auth_key = auth_key
+        self.drain_timeout = drain_timeout
+        self.ready_timeout = ready_timeout
+        self._workers: Dict[int, _Worker] = {}
+        self._stopping = False
+        self._restarting = False
+        self._stop_event: Optional[asyncio.Event] = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stop_event.set)
+        loop.add_signal_handler(signal.SIGHUP, self._broadcast, signal.SIGHUP)
+        loop.add_signal_handler(
+            signal.SIGUSR2, lambda: asyncio.create_task(self.rolling_restart())
+        )
+
+        logger.bind(tag=TAG).info(f"多进程模式启动，工作进程数: {self.workers}")
+        for worker_id in range(self.workers):
+            await self._spawn(worker_id)
+
+        await self._stop_event.wait()
+        await self.stop()
+
+    async def stop(self):
+        """通知所有工作进程排空退出，超时后强制结束"""
+        self._stopping = True
+        workers = list(self._workers.values())
+        logger.bind(tag=TAG).info("正在停止所有工作进程，等待已有会话结束...")
+        for worker in workers:
+            self._signal(worker, signal.SIGTERM)
+        await self._wait_or_kill(workers, self.drain_timeout + 5)
+        print("所有工作进程已退出，程序退出。")
+
+    async def rolling_restart(self):
+        """逐个替换工作进程，保证重启期间始终有进程在接收新连接"""
+        if self._restarting or self._stopping:
+            return
+        self._restarting = True
+        logger.bind(tag=TAG).info("开始滚动重启工作进程")
+        try:
+            for worker_id in range(self.workers):
+                old = self._workers.get(worker_id)
+                new = await self._spawn(worker_id)
+                if not await self._wait_ready(new):
+                    logger.bind(tag=TAG).error(
+                        f"新工作进程{worker_id}未能就绪，保留旧进程，停止滚动重启"
+                    )
+                    if old is not None:
+                        self._workers[worker_id] = old
+                    self._signal(new, signal.SIGKILL)
+                    return
+                if old is not None:
+                    # 旧进程停止接收新连接，已有会话结束后自行退出
+                    self._signal(old, signal.SIGTERM)
+                    asyncio.create_task(
+                        self._wait_or_kill([old], self.drain_timeout + 5)
+                    )
+            logger.bind(tag=TAG).info("滚动重启完成")
+        finally:
+            self._restarting = False
+
+    async def _spawn(self, worker_id: int) -> _Worker:
+        ready_r, ready_w = os.pipe()
+        env = dict(os.environ)
+        env[WORKER_ID_ENV] = str(worker_id)
+        env[WORKER_READY_FD_ENV] = str(ready_w)
+        env[AUTH_KEY_ENV] = self.auth_key
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                *sys.argv,
+                stdin=asyncio.subprocess.DEVNULL,
+                env=env,
+                pass_fds=(ready_w,),
+            )
+        finally:
+            os.close(ready_w)
+        worker = _Worker(worker_id, process, ready_r)
+        self._workers[worker_id] = worker
+        logger.bind(tag=TAG).info(f"工作进程{worker_id}已启动，pid: {process.pid}")
+        asyncio.create_task(self._watch(worker))
+        return worker
+
+    async def _watch(self, worker: _Worker):
+        """工作进程意外退出时重新拉起"""
+        returncode = await worker.process.wait()
+        self._close_ready_fd(worker)
+        if self._stopping or self._workers.get(worker.worker_id) is not worker:
+            return
+        logger.bind(tag=TAG).error(
+            f"工作进程{worker.worker_id}意外退出，退出码: {returncode}，1秒后重新拉起"
+        )
+        await asyncio.sleep(1)
+        if not self._stopping and self._workers.get(worker.worker_id) is worker:
+            await self._spawn(worker.worker_id)
+
+    async def _wait_ready(self, worker: _Worker) -> bool:
+        """等待工作进程开始监听，进程退出或超时返回False"""
+        loop = asyncio.get_running_loop()
+        try:
+            data = await asyncio.wait_for(
+                loop.run_in_executor(None, os.read, worker.ready_fd, 1),
+                self.ready_timeout,
+            )
+        except (asyncio.TimeoutError, OSError):
+            return False
+        return bool(data)
+
+    async def _wait_or_kill(self, workers, timeout: float):
+        pending = [w.process.wait() for w in workers if w.process.returncode is None]
+        if not pending:
+            return
+        await asyncio.wait([asyncio.ensure_future(p) for p in pending], timeout=timeout)
+        for worker in workers:
+            if worker.process.returncode is None:
+                logger.bind(tag=TAG).warning(
+                    f"工作进程{worker.worker_id}排空超时，强制结束"
+                )
+                self._signal(worker, signal.SIGKILL)
+
+    def _broadcast(self, sig: int):
+        logger.bind(tag=TAG).info(f"向所有工作进程广播信号: {signal.Signals(sig).name}")
+        for worker in list(self._workers.values()):
+            self._signal(worker, sig)
+
+    @staticmethod
+    def _signal(worker: _Worker, sig: int):
+        if worker.process.returncode is not None:
+            return
+        try:
+            worker.process.send_signal(sig)
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def _close_ready_fd(worker: _Worker):
+        try:
+            os.close(worker.ready_fd)
+        except OSError:
+            pass
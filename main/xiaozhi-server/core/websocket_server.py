@@ -1,3 +1,5 @@
+import time
+import signal
 import asyncio
 import logging
 
@@ -35,30 +37,81 @@ from config.config_loader import get_config_from_api_async
 from core.auth import AuthManager, AuthenticationError
 from core.utils.modules_initialize import initialize_modules
 from core.utils.util import check_vad_update, check_asr_update
+from core.utils.cache.manager import cache_manager
+from core.utils.transport import get_transport_registry
+from core.utils.shared_executor import get_shared_executor
+from core.utils.audio_send_scheduler import get_audio_send_scheduler
+from core.utils.metrics import CONNECTIONS_TOTAL, get_metrics_registry
+from core.utils.startup import (
+    get_startup_config,
+    mark_ready,
+    record_phase,
+    warmup_modules,
+)
+from core.utils.worker_supervisor import (
+    get_worker_count,
+    notify_ready,
+    notify_supervisor,
+)
 
 TAG = __name__
 
+_metrics = get_metrics_registry()
+ACTIVE_CONNECTIONS = _metrics.gauge(
+    "xiaozhi_active_connections", "当前进程中正在处理的WebSocket连接数"
+)
+QUEUE_DEPTH = _metrics.gauge(
+    "xiaozhi_queue_depth", "所有连接的队列中等待处理的条目数之和", ["queue"]
+)
+EXECUTOR_STATE = _metrics.gauge(
+    "xiaozhi_executor", "共享线程池状态（线程数上限、已创建线程数、排队任务数）", ["pool", "state"]
+)
+TRANSPORT_STATE = _metrics.gauge(
+    "xiaozhi_transport", "共享网络连接池状态", ["state"]
+)
+AUDIO_SCHEDULER_STATE = _metrics.gauge(
+    "xiaozhi_audio_scheduler", "音频发送调度器状态（待发送数、累计发送数、延迟毫秒）", ["state"]
+)
+CACHE_STATE = _metrics.gauge(
+    "xiaozhi_cache", "进程内缓存状态（条目数、字节数、命中/未命中/淘汰/过期次数）", ["cache", "state"]
+)
+
+
+def _collect_process_metrics():
+    """采集进程级共享组件的状态"""
+    executor_stats = get_shared_executor().stats()
+    for state, value in executor_stats.items():
+        EXECUTOR_STATE.set(value, "connection", state)
+    for state, value in get_transport_registry().stats().items():
+        TRANSPORT_STATE.set(value, state)
+    for state, value in get_audio_send_scheduler().stats().items():
+        AUDIO_SCHEDULER_STATE.set(value, state)
+    for cache_name, stats in cache_manager.get_stats().items():
+        for state in ("entries", "bytes", "hits", "misses", "evictions", "expirations"):
+            CACHE_STATE.set(stats[state], cache_name, state)
+
 
 class WebSocketServer:
     def __init__(self, config: dict):
         self.config = config
         self.logger = setup_logging()
         self.config_lock = asyncio.Lock()
-        modules = initialize_modules(
-            self.logger,
-            self.config,
-            "VAD" in self.config["selected_module"],
-            "ASR" in self.config["selected_module"],
-            "LLM" in self.config["selected_module"],
-            False,
-            "Memory" in self.config["selected_module"],
-            "Intent" in self.config["selected_module"],
-        )
-        self._vad = modules["vad"] if "vad" in modules else None
-        self._asr = modules["asr"] if "asr" in modules else None
-        self._llm = modules["llm"] if "llm" in modules else None
-        self._intent = modules["intent"] if "intent" in modules else None
-        self._memory = modules["memory"] if "memory" in modules else None
+        self._server = None
+        # 当前进程中正在处理的连接，用于退出前排空
+        self.active_connections = set()
+        # 连接对应的ConnectionHandler，用于导出队列深度等指标
+        self.active_handlers = set()
+        _metrics.add_collector(self._collect_metrics)
+        _metrics.add_collector(_collect_process_metrics)
+        self._last_config_update = 0.0
+        # 各模块在 start 中加载和预热，期间HTTP服务已可响应健康检查
+        self._vad = None
+        self._asr = None
+        self._llm = None
+        self._intent = None
+        self._memory = None
+        # 配置更新后被替换的VAD，最后一个使用它的连接结束后关闭
+        self._retired_vads = []
 
         auth_config = self.config["server"].get("auth", {})
         self.auth_enable = auth_config.get("enabled", False)
@@ -68,16 +121,134 @@ class WebSocketServer:
         expire_seconds = auth_config.get("expire_seconds", None)
         self.auth = AuthManager(secret_key=secret_key, expire_seconds=expire_seconds)
 
+    def _load_modules(self, config: dict, init_vad: bool, init_asr: bool) -> dict:
+        """在线程中并行加载各模块并预热本地模型"""
+        startup_config = get_startup_config(config)
+        start = time.monotonic()
+        modules = initialize_modules(
+            self.logger,
+            config,
+            init_vad,
+            init_asr,
+            "LLM" in config["selected_module"],
+            False,
+            "Memory" in config["selected_module"],
+            "Intent" in config["selected_module"],
+            parallel=startup_config["parallel_init"],
+        )
+        record_phase("init", time.monotonic() - start)
+        if startup_config["warmup"]:
+            warmup_modules(modules)
+        return modules
+
+    def _apply_modules(self, modules: dict):
+        if "vad" in modules:
+            old_vad, self._vad = self._vad, modules["vad"]
+            if old_vad is not None and old_vad is not self._vad:
+                self._retired_vads.append(old_vad)
+            self._close_retired_vads()
+        if "asr" in modules:
+            self._asr = modules["asr"]
+        if "llm" in modules:
+            self._llm = modules["llm"]
+        if "intent" in modules:
+            self._intent = modules["intent"]
+        if "memory" in modules:
+            self._memory = modules["memory"]
+
+    def _close_retired_vads(self):
+        """关闭已没有连接使用的旧VAD，停止其推理线程"""
+        if not self._retired_vads:
+            return
+        in_use = {id(handler.vad) for handler in self.active_handlers}
+        in_use |= {id(handler._vad) for handler in self.active_handlers}
+        still_used = []
+        for vad in self._retired_vads:
+            if id(vad) in in_use:
+                still_used.append(vad)
+                continue
+            try:
+                vad.close()
+            except Exception as e:
+                self.logger.bind(tag=TAG).error(f"关闭旧VAD失败: {e}")
+        self._retired_vads = still_used
+
     async def start(self):
+        start_time = time.monotonic()
+        modules = await asyncio.get_running_loop().run_in_executor(
+            get_shared_executor().pool,
+            self._load_modules,
+            self.config,
+            "VAD" in self.config["selected_module"],
+            "ASR" in self.config["selected_module"],
+        )
+        self._apply_modules(modules)
+
         server_config = self.config["server"]
         host = server_config.get("ip", "0.0.0.0")
         port = int(server_config.get("port", 8000))
 
+        serve_kwargs = {}
+        if get_worker_count(self.config) > 1:
+            # 多进程模式下各工作进程共享同一个监听端口
+            serve_kwargs["reuse_port"] = True
+
         async with websockets.serve(
-            self._handle_connection, host, port, process_request=self._http_response
-        ):
+            self._handle_connection,
+            host,
+            port,
+            process_request=self._http_response,
+            **serve_kwargs,
+        ) as server:
+            self._server = server
+            elapsed = time.monotonic() - start_time
+            record_phase("ready", elapsed)
+            mark_ready()
+            self.logger.bind(tag=TAG).info(f"服务已就绪，模块加载和预热耗时 {elapsed:.3f}s")
+            notify_ready()
             await asyncio.Future()
 
+    def _collect_metrics(self):
+        """采集连接数和各连接的队列深度"""
+        ACTIVE_CONNECTIONS.set(len(self.active_connections))
+        depths = {"asr_audio": 0, "tts_text": 0, "tts_audio": 0, "executor_pending": 0}
+        for handler in list(self.active_handlers):
+            depths["asr_audio"] += handler.asr_audio_queue.qsize()
+            # 连接关闭后 executor 置为None，但在连接处理结束前仍在 active_handlers 中
+            executor = handler.executor
+            if executor is not None:
+                depths["executor_pending"] += executor.pending
+            tts = handler.tts
+            if tts is not None:
+                depths["tts_text"] += tts.tts_text_queue.qsize()
+                depths["tts_audio"] += tts.tts_audio_queue.qsize()
+        for queue_name, depth in depths.items():
+            QUEUE_DEPTH.set(depth, queue_name)
+
+    async def drain(self, timeout: float = 30):
+        """停止接收新连接，等待已有连接结束，超时后关闭剩余连接
+
+        Args:
+            timeout: 等待已有连接结束的最长时间（秒）
+        """
+        if self._server is None:
+            return
+        self._server.close(close_connections=False)
+        self.logger.bind(tag=TAG).info(
+            f"已停止接收新连接，等待{len(self.active_connections)}个连接结束"
+        )
+        deadline = time.monotonic() + timeout
+        while self.active_connections and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+        if self.active_connections:
+            self.logger.bind(tag=TAG).warning(
+                f"排空超时，关闭剩余{len(self.active_connections)}个连接"
+            )
+            await asyncio.gather(
+                *(ws.close(1001) for ws in list(self.active_connections)),
+                return_exceptions=True,
+            )
+
     async def _handle_connection(self, websocket):
         headers = dict(websocket.request.headers)
         if headers.get("device-id", None) is None:
@@ -123,11 +294,17 @@ class WebSocketServer:
             self._intent,
             self,  # 传入server实例
         )
+        self.active_connections.add(websocket)
+        self.active_handlers.add(handler)
+        CONNECTIONS_TOTAL.inc()
         try:
             await handler.handle_connection(websocket)
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"处理连接时出错: {e}")
         finally:
+            self.active_connections.discard(websocket)
+            self.active_handlers.discard(handler)
+            self._close_retired_vads()
             # 强制关闭连接（如果还没有关闭的话）
             try:
                 # 安全地检查WebSocket状态并关闭
@@ -152,9 +329,12 @@ class WebSocketServer:
             # 如果是普通 HTTP 请求，返回 "server is running"
             return websocket.respond(200, "Server is running\n")
 
-    async def update_config(self) -> bool:
+    async def update_config(self, broadcast: bool = True) -> bool:
         """更新服务器配置并重新初始化组件
 
+        Args:
+            broadcast: 多进程模式下更新成功后是否通知其他工作进程一起更新
+
         Returns:
             bool: 更新是否成功
         """
@@ -174,35 +354,33 @@ class WebSocketServer:
                 )
                 # 更新配置
                 self.config = new_config
-                # 重新初始化组件
-                modules = initialize_modules(
-                    self.logger,
+                # 重新初始化组件，新模块预热完成后再替换，不阻塞事件循环
+                modules = await asyncio.get_running_loop().run_in_executor(
+                    get_shared_executor().pool,
+                    self._load_modules,
                     new_config,
                     update_vad,
                     update_asr,
-                    "LLM" in new_config["selected_module"],
-                    False,
-                    "Memory" in new_config["selected_module"],
-                    "Intent" in new_config["selected_module"],
                 )
 
                 # 更新组件实例
-                if "vad" in modules:
-                    self._vad = modules["vad"]
-                if "asr" in modules:
-                    self._asr = modules["asr"]
-                if "llm" in modules:
-                    self._llm = modules["llm"]
-                if "intent" in modules:
-                    self._intent = modules["intent"]
-                if "memory" in modules:
-                    self._memory = modules["memory"]
+                self._apply_modules(modules)
                 self.logger.bind(tag=TAG).info(f"更新配置任务执行完毕")
-                return True
+                self._last_config_update = time.monotonic()
+            if broadcast:
+                # 由主控进程向所有工作进程广播SIGHUP
+                notify_supervisor(signal.SIGHUP)
+            return True
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"更新服务器配置失败: {str(e)}")
             return False
 
+    async def reload_config(self):
+        """响应主控进程广播的配置更新，本进程刚更新过时跳过"""
+        if time.monotonic() - self._last_config_update < 5:
+            return
+        await self.update_config(broadcast=False)
+
     async def _handle_auth(self, websocket):
         # 先认证，后建立连接
         if self.auth_enable:
@@ -0,0 +1,315 @@
+import os
+import sys
+import json
+import time
+import struct
+import platform
+import argparse
+import tempfile
+import tracemalloc
+from types import SimpleNamespace
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# 直接运行本文件时把项目根目录加入Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.utils import p3
+from core.utils.audio_decoder import decode_to_pcm
+from core.utils.opus_encoder_utils import OpusEncoderUtils
+from core.utils.util import pcm_to_data_stream, opus_datas_to_wav_bytes
+
+description = "音频处理热点函数基准测试（本地音频，无需网络）"
+
+DEFAULT_BASELINE = "data/audio_benchmark_baseline.json"
+
+
+class Benchmark:
+    """
+    一个基准测试项
+    func 每调用一次为一次操作，items 为一次操作处理的音频帧数，用于换算单帧耗时
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], object],
+        items: int = 1,
+        close: Optional[Callable[[], object]] = None,
+    ):
+        self.name = name
+        self.func = func
+        self.items = items
+        self._close = close
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+
+    def run(self, min_time: float, alloc_rounds: int) -> dict:
+        func = self.func
+        # 预热：首次调用可能创建线程局部编码器、加载缓存等
+        for _ in range(3):
+            func()
+
+        rounds = 0
+        start = time.perf_counter()
+        deadline = start + min_time
+        while True:
+            func()
+            rounds += 1
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+        elapsed = now - start
+
+        alloc_rounds = max(1, alloc_rounds)
+        # 内存统计单独进行，tracemalloc 本身会拖慢执行，不计入耗时
+        tracemalloc.start()
+        try:
+            peaks = []
+            retained = 0
+            for _ in range(alloc_rounds):
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                func()
+                after, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - before)
+                retained += after - before
+        finally:
+            tracemalloc.stop()
+
+        ops = rounds / elapsed
+        return {
+            "ops_per_sec": round(ops, 2),
+            "us_per_op": round(elapsed / rounds * 1e6, 2),
+            "us_per_item": round(elapsed / rounds / self.items * 1e6, 3),
+            "items": self.items,
+            "rounds": rounds,
+            # 单次操作期间Python堆上的峰值增量（包含numpy缓冲区）
+            "peak_kb_per_op": round(max(peaks) / 1024, 2),
+            # 单次操作结束后仍未释放的内存，持续大于0说明有缓存或泄漏
+            "retained_b_per_op": round(retained / alloc_rounds),
+        }
+
+
+def _write_p3(opus_frames: List[bytes]) -> str:
+    """把Opus帧写成p3文件：每帧4字节头部[类型, 保留, 2字节长度]"""
+    fd, path = tempfile.mkstemp(suffix=".p3")
+    with os.fdopen(fd, "wb") as f:
+        for frame in opus_frames:
+            f.write(struct.pack(">BBH", 0, 0, len(frame)))
+            f.write(frame)
+    return path
+
+
+def _make_vad_benchmark(config: dict, opus_frames: List[bytes]) -> Optional[Benchmark]:
+    """VAD依赖torch和本地模型，环境不满足时跳过"""
+    vad_config = config.get("VAD", {}).get("SileroVAD")
+    if not vad_config or not os.path.exists(vad_config.get("model_dir", "")):
+        print("未找到SileroVAD模型，跳过 VADProvider.is_vad")
+        return None
+    try:
+        from core.providers.vad.silero import VADProvider
+    except ImportError as e:
+        print(f"无法加载SileroVAD（{e}），跳过 VADProvider.is_vad")
+        return None
+
+    vad = VADProvider(vad_config)
+    # 只包含VAD用到的连接属性
+    conn = SimpleNamespace(
+        client_listen_mode="auto",
+        vad_stream=None,
+        client_audio_buffer=bytearray(),
+        client_voice_window=deque(maxlen=5),
+        client_have_voice=False,
+        client_voice_stop=False,
+        last_is_voice=False,
+        last_activity_time=time.time() * 1000,
+    )
+    state = {"index": 0}
+
+    def is_vad():
+        # 循环送入示例语音的各帧，覆盖有声和静音两种情况
+        frame = opus_frames[state["index"] % len(opus_frames)]
+        state["index"] += 1
+        vad.is_vad(conn, frame)
+        if conn.client_voice_stop:
+            conn.client_have_voice = False
+            conn.client_voice_stop = False
+
+    def close():
+        vad.release(conn)
+        vad.inference.stop()
+
+    return Benchmark("VADProvider.is_vad", is_vad, close=close)
+
+
+def build_benchmarks(audio_file: str, config: dict, with_vad: bool = True) -> List[Benchmark]:
+    pcm = decode_to_pcm(audio_file)
+    opus_frames: List[bytes] = []
+    pcm_to_data_stream(pcm, is_opus=True, callback=opus_frames.append)
+    frame_count = len(opus_frames)
+    p3_file = _write_p3(opus_frames)
+
+    with open(audio_file, "rb") as f:
+        audio_bytes = f.read()
+    file_type = os.path.splitext(audio_file)[1].lstrip(".")
+
+    encoder = OpusEncoderUtils(sample_rate=16000, channels=1, frame_size_ms=60)
+
+    def encode_stream():
+        encoder.reset_state()
+        encoder.encode_pcm_to_opus_stream(pcm, True, lambda _: None)
+
+    from core.providers.asr.mock import ASRProvider
+
+    asr = ASRProvider({"delay_ms": 0}, True)
+
+    benchmarks = [
+        Benchmark(
+            "pcm_to_data_stream(opus)",
+            lambda: pcm_to_data_stream(pcm, True, lambda _: None),
+            frame_count,
+        ),
+        Benchmark(
+            "pcm_to_data_stream(pcm)",
+            lambda: pcm_to_data_stream(pcm, False, lambda _: None),
+            frame_count,
+        ),
+        Benchmark(
+            "OpusEncoderUtils.encode_pcm_to_opus_stream", encode_stream, frame_count
+        ),
+        Benchmark(
+            "p3.decode_opus_from_file",
+            lambda: p3.decode_opus_from_file(p3_file),
+            frame_count,
+            close=lambda: os.remove(p3_file),
+        ),
+        Benchmark(
+            "opus_datas_to_wav_bytes",
+            lambda: opus_datas_to_wav_bytes(opus_frames),
+            frame_count,
+        ),
+        Benchmark(
+            "ASRProviderBase._pcm_to_wav",
+            lambda: asr._pcm_to_wav(pcm),
+            frame_count,
+        ),
+        Benchmark(
+            f"decode_to_pcm({file_type})",
+            lambda: decode_to_pcm(audio_bytes, file_type),
+            frame_count,
+        ),
+    ]
+    if with_vad:
+        vad_benchmark = _make_vad_benchmark(config, opus_frames)
+        if vad_benchmark is not None:
+            benchmarks.append(vad_benchmark)
+    return benchmarks
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """与基准结果对比，返回变慢超过阈值的测试项"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("ops_per_sec"):
+            result["change"] = None
+            continue
+        change = result["ops_per_sec"] / base["ops_per_sec"] - 1
+        result["change"] = round(change * 100, 1)
+        if change < -threshold:
+            regressions.append(name)
+    return regressions
+
+
+def print_results(results: Dict[str, dict]):
+    header = f"{'测试项':<44}{'ops/s':>12}{'us/op':>12}{'us/帧':>10}{'峰值KB':>10}{'残留B':>8}{'对比基准':>10}"
+    print(header)
+    print("-" * 106)
+    for name, r in results.items():
+        change = r.get("change")
+        change_text = "-" if change is None else f"{change:+.1f}%"
+        print(
+            f"{name:<44}{r['ops_per_sec']:>12}{r['us_per_op']:>12}{r['us_per_item']:>10}"
+            f"{r['peak_kb_per_op']:>10}{r['retained_b_per_op']:>8}{change_text:>10}"
+        )
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--audio", default="config/assets/wakeup_words_short.wav", help="测试用的语音文件")
+    parser.add_argument("--min-time", type=float, default=1.0, help="每个测试项至少运行的时间（秒）")
+    parser.add_argument("--alloc-rounds", type=int, default=20, help="统计内存时运行的次数")
+    parser.add_argument("--filter", default="", help="只运行名称包含该字符串的测试项")
+    parser.add_argument("--no-vad", action="store_true", help="跳过需要torch和模型的VAD测试")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基准结果文件，存在时自动对比")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基准")
+    parser.add_argument("--threshold", type=float, default=10, help="ops/s下降超过该百分比视为变慢")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+def main(argv=None) -> bool:
+    """运行基准测试，没有变慢的测试项时返回True"""
+    args = _parse_args(argv)
+    from config.settings import load_config
+
+    config = load_config()
+    benchmarks = build_benchmarks(args.audio, config, with_vad=not args.no_vad)
+
+    results = {}
+    try:
+        for benchmark in benchmarks:
+            if args.filter and args.filter not in benchmark.name:
+                continue
+            print(f"运行 {benchmark.name} ...")
+            results[benchmark.name] = benchmark.run(args.min_time, args.alloc_rounds)
+    finally:
+        for benchmark in benchmarks:
+            benchmark.close()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.threshold / 100)
+
+    print(f"\n音频文件: {args.audio}")
+    print_results(results)
+    if baseline:
+        if regressions:
+            print(f"\n以下测试项比基准慢了{args.threshold}%以上: {', '.join(regressions)}")
+        else:
+            print("\n与基准相比没有明显变慢")
+    elif not args.save_baseline:
+        print(f"\n未找到基准结果 {args.baseline}，可加 --save-baseline 保存本次结果作为基准")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "created_at": datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "processor": platform.processor(),
+                    "cpu_count": os.cpu_count(),
+                    "audio": args.audio,
+                    "results": results,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"\n已保存基准结果到 {args.baseline}")
+    return not regressions
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,458 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import statistics
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional
+from urllib.parse import urlparse
+
+# 直接运行本文件时把项目根目录加入Python路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import psutil
+import websockets
+from core.utils.util import audio_to_data, pcm_to_data_stream
+
+description = "整机压力测试：模拟多台设备通过WebSocket/MQTT网关帧格式对话（服务端需使用模拟供应商）"
+
+# 每个Opus帧的时长（秒），与设备端保持一致
+FRAME_DURATION = 0.06
+MQTT_HEADER_SIZE = 16
+
+
+@dataclass
+class TurnResult:
+    device: int
+    # 从说完话（手动模式发出listen stop，自动模式最后一帧语音）到收到第一个音频包的耗时
+    first_audio: Optional[float] = None
+    # 从说完话到收到 tts stop 的耗时
+    total: Optional[float] = None
+    audio_packets: int = 0
+    error: str = ""
+
+
+@dataclass
+class LoadStats:
+    connect_ok: int = 0
+    connect_failed: int = 0
+    # 压测结束前被服务端断开的连接
+    dropped: int = 0
+    active: int = 0
+    peak_active: int = 0
+    turns: List[TurnResult] = field(default_factory=list)
+    server_samples: List[dict] = field(default_factory=list)
+    client_samples: List[dict] = field(default_factory=list)
+
+    def connected(self):
+        self.connect_ok += 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+
+    def disconnected(self):
+        self.active -= 1
+
+
+class SimulatedDevice:
+    """一台模拟设备：握手后循环进行“说话 -> 等待回复播放完毕”的对话"""
+
+    def __init__(self, index: int, args, speech_frames, silence_frames, stats: LoadStats):
+        self.index = index
+        self.args = args
+        self.speech_frames = speech_frames
+        self.silence_frames = silence_frames
+        self.stats = stats
+        self.device_id = "load-test-" + ":".join(
+            f"{b:02x}" for b in uuid.uuid4().bytes[:6]
+        )
+        self.sequence = 0
+        self.start_time = time.monotonic()
+        self.hello_event = asyncio.Event()
+        self.reply_started = asyncio.Event()
+        self.turn_done = asyncio.Event()
+        self.turn: Optional[TurnResult] = None
+        self.turn_start: Optional[float] = None
+        self.closed = False
+
+    def _url(self):
+        if self.args.mqtt_gateway:
+            # 服务端根据路径结尾判断是否来自MQTT网关
+            return self.args.url + "?from=mqtt_gateway"
+        return self.args.url
+
+    async def run(self, deadline: float):
+        headers = {
+            "device-id": self.device_id,
+            "client-id": str(uuid.uuid4()),
+            "protocol-version": "1",
+        }
+        if self.args.token:
+            headers["authorization"] = f"Bearer {self.args.token}"
+        try:
+            ws = await websockets.connect(
+                self._url(),
+                additional_headers=headers,
+                open_timeout=self.args.turn_timeout,
+                max_size=None,
+            )
+        except Exception as e:
+            self.stats.connect_failed += 1
+            print(f"设备{self.index} 连接失败: {e}")
+            return
+
+        self.stats.connected()
+        reader = asyncio.create_task(self._reader(ws))
+        try:
+            await self._send_hello(ws)
+            # 等待服务端初始化ASR/VAD，初始化完成前发送的音频会被丢弃
+            await asyncio.sleep(self.args.settle)
+            while time.monotonic() < deadline and not self.closed:
+                await self._run_turn(ws)
+                await asyncio.sleep(random.uniform(0, self.args.think_time))
+        except websockets.ConnectionClosed:
+            pass
+        except Exception as e:
+            print(f"设备{self.index} 出错: {e}")
+        finally:
+            if self.closed and time.monotonic() < deadline:
+                self.stats.dropped += 1
+            reader.cancel()
+            self.stats.disconnected()
+            await ws.close()
+
+    async def _send_hello(self, ws):
+        await ws.send(
+            json.dumps(
+                {
+                    "type": "hello",
+                    "version": 1,
+                    "transport": "websocket",
+                    "audio_params": {
+                        "format": "opus",
+                        "sample_rate": 16000,
+                        "channels": 1,
+                        "frame_duration": int(FRAME_DURATION * 1000),
+                    },
+                }
+            )
+        )
+        await asyncio.wait_for(self.hello_event.wait(), self.args.turn_timeout)
+
+    async def _reader(self, ws):
+        try:
+            await self._read_messages(ws)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            # 连接断开后唤醒正在等待的对话
+            self.closed = True
+            self.hello_event.set()
+            self.reply_started.set()
+            self.turn_done.set()
+
+    async def _read_messages(self, ws):
+        async for message in ws:
+            now = time.monotonic()
+            if isinstance(message, bytes):
+                turn = self.turn
+                if turn is not None and self.turn_start is not None:
+                    turn.audio_packets += 1
+                    if turn.first_audio is None:
+                        turn.first_audio = now - self.turn_start
+                continue
+            try:
+                msg = json.loads(message)
+            except ValueError:
+                continue
+            msg_type = msg.get("type")
+            if msg_type == "hello":
+                self.hello_event.set()
+            elif msg_type in ("stt", "llm"):
+                self.reply_started.set()
+            elif msg_type == "tts":
+                state = msg.get("state")
+                if state in ("start", "sentence_start"):
+                    self.reply_started.set()
+                elif state == "stop":
+                    self.turn_done.set()
+
+    async def _send_frame(self, ws, frame: bytes):
+        if self.args.mqtt_gateway:
+            self.sequence += 1
+            timestamp = int((time.monotonic() - self.start_time) * 1000) & 0xFFFFFFFF
+            header = bytearray(MQTT_HEADER_SIZE)
+            header[0] = 1
+            header[2:4] = len(frame).to_bytes(2, "big")
+            header[4:8] = self.sequence.to_bytes(4, "big")
+            header[8:12] = timestamp.to_bytes(4, "big")
+            header[12:16] = len(frame).to_bytes(4, "big")
+            frame = bytes(header) + frame
+        await ws.send(frame)
+
+    async def _send_paced(self, ws, frames, stop_event: asyncio.Event = None):
+        """按实时速度发送音频帧，与真实设备一样每60ms一帧"""
+        start = time.monotonic()
+        for i, frame in enumerate(frames):
+            if stop_event is not None and stop_event.is_set():
+                return
+            await self._send_frame(ws, frame)
+            delay = start + (i + 1) * FRAME_DURATION - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def _run_turn(self, ws):
+        mode = self.args.mode
+        self.reply_started.clear()
+        self.turn_done.clear()
+        self.turn = TurnResult(device=self.index)
+        self.turn_start = None
+
+        await ws.send(json.dumps({"type": "listen", "state": "start", "mode": mode}))
+        await self._send_paced(ws, self.speech_frames)
+        self.turn_start = time.monotonic()
+        if mode == "manual":
+            await ws.send(json.dumps({"type": "listen", "state": "stop", "mode": mode}))
+        else:
+            # 自动模式由服务端VAD判断说话结束，继续发送静音直到开始回复
+            await self._send_paced(ws, self.silence_frames, self.reply_started)
+
+        turn = self.turn
+        try:
+            await asyncio.wait_for(self.turn_done.wait(), self.args.turn_timeout)
+            if self.closed:
+                turn.error = "closed"
+            else:
+                turn.total = time.monotonic() - self.turn_start
+        except asyncio.TimeoutError:
+            turn.error = "timeout"
+        self.stats.turns.append(turn)
+        self.turn = None
+
+
+def _collect_processes(process: psutil.Process) -> List[psutil.Process]:
+    """多进程模式下主进程和所有工作进程一起统计"""
+    try:
+        return [process] + process.children(recursive=True)
+    except psutil.Error:
+        return [process]
+
+
+def _find_server_process(port: int) -> Optional[psutil.Process]:
+    try:
+        for conn in psutil.net_connections(kind="tcp"):
+            if conn.status == psutil.CONN_LISTEN and conn.laddr.port == port and conn.pid:
+                process = psutil.Process(conn.pid)
+                # 多进程模式下监听端口的是工作进程，取其上层的监督进程（同一个Python解释器）
+                parent = process.parent()
+                if parent is not None and parent.exe() == process.exe():
+                    process = parent
+                return process
+    except psutil.Error:
+        return None
+    return None
+
+
+async def _monitor(process: Optional[psutil.Process], stats: LoadStats, stop: asyncio.Event):
+    """每秒采样一次服务端和压测端的CPU、内存"""
+    client = psutil.Process()
+    client.cpu_percent()
+    processes = _collect_processes(process) if process else []
+    for p in processes:
+        p.cpu_percent()
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), 1)
+        except asyncio.TimeoutError:
+            pass
+        if process is not None:
+            cpu, rss = 0.0, 0
+            for p in processes:
+                try:
+                    cpu += p.cpu_percent()
+                    rss += p.memory_info().rss
+                except psutil.Error:
+                    continue
+            stats.server_samples.append(
+                {"active": stats.active, "cpu": cpu, "rss_mb": rss / 1024 / 1024}
+            )
+            # 工作进程可能重启，重新获取子进程列表
+            current = _collect_processes(process)
+            for p in current:
+                if p not in processes:
+                    p.cpu_percent()
+            processes = current
+        stats.client_samples.append({"cpu": client.cpu_percent()})
+
+
+def _percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+def _summarize(stats: LoadStats, args, elapsed: float) -> dict:
+    ok_turns = [t for t in stats.turns if not t.error]
+    summary = {
+        "devices": args.devices,
+        "mode": args.mode,
+        "mqtt_gateway": args.mqtt_gateway,
+        "elapsed": round(elapsed, 1),
+        "connect_ok": stats.connect_ok,
+        "connect_failed": stats.connect_failed,
+        "dropped": stats.dropped,
+        "peak_connections": stats.peak_active,
+        "turns": len(stats.turns),
+        "turns_failed": len(stats.turns) - len(ok_turns),
+        "turns_per_second": round(len(ok_turns) / elapsed, 2) if elapsed else 0,
+        "no_audio_turns": sum(1 for t in ok_turns if t.first_audio is None),
+    }
+    for name in ("first_audio", "total"):
+        values = [getattr(t, name) for t in ok_turns if getattr(t, name) is not None]
+        for p in (50, 90, 99):
+            value = _percentile(values, p)
+            summary[f"{name}_p{p}"] = round(value, 3) if value is not None else None
+        summary[f"{name}_max"] = round(max(values), 3) if values else None
+    if stats.server_samples:
+        cpus = [s["cpu"] for s in stats.server_samples]
+        rss = [s["rss_mb"] for s in stats.server_samples]
+        summary.update(
+            server_cpu_avg=round(statistics.mean(cpus), 1),
+            server_cpu_max=round(max(cpus), 1),
+            server_rss_start_mb=round(rss[0], 1),
+            server_rss_max_mb=round(max(rss), 1),
+            server_rss_end_mb=round(rss[-1], 1),
+        )
+    if stats.client_samples:
+        summary["client_cpu_max"] = round(max(s["cpu"] for s in stats.client_samples), 1)
+    return summary
+
+
+def _print_summary(summary: dict):
+    labels = {
+        "devices": "模拟设备数",
+        "mode": "拾音模式",
+        "mqtt_gateway": "MQTT网关帧格式",
+        "elapsed": "测试时长(秒)",
+        "connect_ok": "连接成功",
+        "connect_failed": "连接失败",
+        "dropped": "中途断开",
+        "peak_connections": "最高同时连接数",
+        "turns": "对话轮数",
+        "turns_failed": "失败轮数",
+        "turns_per_second": "每秒完成轮数",
+        "no_audio_turns": "无音频回复轮数",
+        "server_cpu_avg": "服务端CPU平均(%)",
+        "server_cpu_max": "服务端CPU峰值(%)",
+        "server_rss_start_mb": "服务端内存起始(MB)",
+        "server_rss_max_mb": "服务端内存峰值(MB)",
+        "server_rss_end_mb": "服务端内存结束(MB)",
+        "client_cpu_max": "压测端CPU峰值(%)",
+    }
+    print("\n压力测试结果")
+    print("-" * 40)
+    for key, label in labels.items():
+        if key in summary:
+            print(f"{label:<20}{summary[key]}")
+    print("-" * 40)
+    print(f"{'耗时(秒)':<14}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}")
+    for name, label in (("first_audio", "首个音频包"), ("total", "整轮完成")):
+        row = [summary.get(f"{name}_p{p}") for p in (50, 90, 99)] + [
+            summary.get(f"{name}_max")
+        ]
+        print(f"{label:<12}" + "".join(f"{'-' if v is None else v:>8}" for v in row))
+    if summary.get("client_cpu_max", 0) > 90:
+        print("\n注意：压测端CPU已接近满载，结果可能受压测端本身限制，请减少设备数或分多台机器压测")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/xiaozhi/v1/", help="服务端WebSocket地址")
+    parser.add_argument("--devices", type=int, default=20, help="模拟设备数")
+    parser.add_argument("--duration", type=float, default=60, help="全部设备上线后持续压测的时间（秒）")
+    parser.add_argument("--ramp", type=float, default=10, help="设备逐个上线的总时间（秒），避免瞬间全部握手")
+    parser.add_argument("--mode", choices=["manual", "auto"], default="manual", help="拾音模式：manual由设备发送listen stop，auto由服务端VAD判断")
+    parser.add_argument("--mqtt-gateway", action="store_true", help="按MQTT网关的16字节头部格式收发音频")
+    parser.add_argument("--audio", default="config/assets/wakeup_words_short.wav", help="每轮发送的语音文件")
+    parser.add_argument("--think-time", type=float, default=2, help="两轮对话之间的最长随机间隔（秒）")
+    parser.add_argument("--turn-timeout", type=float, default=30, help="单轮对话超时时间（秒）")
+    parser.add_argument("--settle", type=float, default=1, help="握手后等待服务端初始化的时间（秒）")
+    parser.add_argument("--token", default="", help="服务端开启认证时使用的token")
+    parser.add_argument("--server-pid", type=int, default=None, help="服务端进程号，不填时按监听端口查找")
+    parser.add_argument("--output", default="", help="将结果保存为JSON文件，便于不同版本之间对比")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+async def main(argv=None):
+    args = _parse_args(argv)
+
+    speech_frames = await audio_to_data(args.audio, is_opus=True, use_cache=False)
+    silence_frames = []
+    # 自动模式下说完话后最多发送3秒静音
+    pcm_to_data_stream(
+        b"\x00\x00" * int(16000 * 3), is_opus=True, callback=silence_frames.append
+    )
+    print(
+        f"语音文件 {args.audio}：{len(speech_frames)} 帧，"
+        f"约 {len(speech_frames) * FRAME_DURATION:.1f} 秒"
+    )
+
+    if args.server_pid:
+        server_process = psutil.Process(args.server_pid)
+    else:
+        server_process = _find_server_process(urlparse(args.url).port or 80)
+    if server_process is None:
+        print("未找到服务端进程，不统计服务端CPU和内存，可通过 --server-pid 指定")
+    else:
+        print(f"服务端进程: {server_process.pid}")
+
+    stats = LoadStats()
+    stop_monitor = asyncio.Event()
+    monitor = asyncio.create_task(_monitor(server_process, stats, stop_monitor))
+
+    start = time.monotonic()
+    deadline = start + args.ramp + args.duration
+    devices = []
+    for i in range(args.devices):
+        device = SimulatedDevice(i, args, speech_frames, silence_frames, stats)
+        delay = args.ramp * i / args.devices if args.devices else 0
+        devices.append(asyncio.create_task(_start_later(device, delay, deadline)))
+
+    print(f"启动 {args.devices} 台模拟设备，{args.ramp} 秒内逐个上线，持续 {args.duration} 秒")
+    await asyncio.gather(*devices)
+    elapsed = time.monotonic() - start
+    stop_monitor.set()
+    await monitor
+
+    summary = _summarize(stats, args, elapsed)
+    _print_summary(summary)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {"summary": summary, "turns": [asdict(t) for t in stats.turns]},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"结果已保存到 {args.output}")
+    return summary
+
+
+async def _start_later(device: SimulatedDevice, delay: float, deadline: float):
+    await asyncio.sleep(delay)
+    await device.run(deadline)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""
+本地意图快速分类器测试
+在 main/xiaozhi-server 目录下运行: python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.providers.intent.local_classifier import (  # noqa: E402
+    CONTINUE_CHAT,
+    LocalIntentClassifier,
+)
+
+
+def _function(name, description, properties=None):
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {"type": "object", "properties": properties or {}},
+        },
+    }
+
+
+PLUGIN_FUNCTIONS = [
+    _function("get_weather", "获取某个地点的天气，用户应提供一个位置"),
+    _function("play_music", "唱歌、听歌、播放音乐的方法", {"song_name": {"description": "歌曲名称"}}),
+    _function("handle_exit_intent", "当用户想结束对话或需要退出系统时调用"),
+    _function("get_news_from_newsnow", "获取最新新闻，随机选择一条新闻进行播报"),
+]
+
+HASS_FUNCTIONS = [
+    _function(
+        "hass_set_state",
+        "Set the state of a Home Assistant device, such as turning lights on or off",
+        {"entity_id": {"description": "The entity id of the device"}},
+    ),
+    _function(
+        "hass_get_state",
+        "Get the state of a Home Assistant device",
+        {"entity_id": {"description": "The entity id of the device"}},
+    ),
+]
+
+DEVICE_MCP_FUNCTIONS = [
+    _function(
+        "self_audio_speaker_set_volume",
+        "Set the volume of the audio speaker",
+        {"volume": {"description": "Volume level from 0 to 100"}},
+    ),
+    _function(
+        "self_screen_set_brightness",
+        "Set the brightness of the screen",
+        {"brightness": {"description": "Brightness level from 0 to 100"}},
+    ),
+]
+
+DEVICE_COMMANDS = ["打开客厅的灯", "关灯", "帮我开一下空调", "声音大一点", "屏幕亮一点"]
+
+
+class LocalIntentClassifierTest(unittest.TestCase):
+    def test_chat_tier_disabled_by_default(self):
+        classifier = LocalIntentClassifier()
+        for text in DEVICE_COMMANDS + ["给我讲个故事吧"]:
+            self.assertIsNone(classifier.classify(text, PLUGIN_FUNCTIONS), text)
+
+    def test_device_commands_never_chat_with_hass_tools(self):
+        classifier = LocalIntentClassifier({"chat_threshold": 0.1})
+        functions = PLUGIN_FUNCTIONS + HASS_FUNCTIONS
+        for text in DEVICE_COMMANDS:
+            self.assertIsNone(classifier.classify(text, functions), text)
+
+    def test_device_commands_never_chat_with_device_tools(self):
+        classifier = LocalIntentClassifier({"chat_threshold": 0.1})
+        functions = PLUGIN_FUNCTIONS + DEVICE_MCP_FUNCTIONS
+        for text in DEVICE_COMMANDS:
+            self.assertIsNone(
+                classifier.classify(text, functions, device_tools=True), text
+            )
+
+    def test_chat_tier_with_plugins_only(self):
+        classifier = LocalIntentClassifier({"chat_threshold": 0.1})
+        self.assertEqual(
+            classifier.classify("给我讲个故事吧", PLUGIN_FUNCTIONS), CONTINUE_CHAT
+        )
+
+    def test_rules_still_match_with_device_tools(self):
+        classifier = LocalIntentClassifier()
+        functions = PLUGIN_FUNCTIONS + HASS_FUNCTIONS + DEVICE_MCP_FUNCTIONS
+        result = classifier.classify("现在几点了", functions, device_tools=True)
+        self.assertEqual(
+            json.loads(result)["function_call"]["name"], "result_for_context"
+        )
+        result = classifier.classify("播放周杰伦的歌", functions, device_tools=True)
+        self.assertEqual(json.loads(result)["function_call"]["name"], "play_music")
+
+    def _call(self, text, functions=PLUGIN_FUNCTIONS):
+        result = LocalIntentClassifier().classify(text, functions)
+        return None if result is None else json.loads(result)["function_call"]
+
+    def test_play_music_without_title_is_random(self):
+        for text in ["来点音乐", "放首歌吧", "唱首歌给我听", "放歌", "播放音乐"]:
+            call = self._call(text)
+            self.assertIsNotNone(call, text)
+            self.assertEqual(call["name"], "play_music", text)
+            self.assertEqual(call["arguments"], {"song_name": "random"}, text)
+
+    def test_play_music_with_title(self):
+        for text, song_name in [
+            ("播放周杰伦的歌", "周杰伦"),
+            ("来首周杰伦的歌给我听", "周杰伦"),
+            ("播放歌曲稻香吧", "稻香"),
+        ]:
+            call = self._call(text)
+            self.assertEqual(call["arguments"], {"song_name": song_name}, text)
+
+    def test_ambiguous_music_requests_go_to_llm(self):
+        for text in ["播放下一首歌", "换一首歌", "来点我喜欢的歌", "放点好听的歌", "唱周杰伦的歌"]:
+            self.assertIsNone(self._call(text), text)
+
+    def test_exit_uses_plugin_goodbye(self):
+        functions = PLUGIN_FUNCTIONS
+        for text in ["不聊了", "退出系统"]:
+            call = self._call(text, functions)
+            self.assertEqual(call["name"], "handle_exit_intent", text)
+            self.assertNotIn("arguments", call)
+
+
+if __name__ == "__main__":
+    unittest.main()